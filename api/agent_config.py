@@ -0,0 +1,247 @@
+"""
+Agent Configuration Cache
+
+Every PATCH to an ElevenLabs agent may make ElevenLabs re-index its
+knowledge base, which adds seconds to onboarding. Most updates from the
+sketchbook point the agent at the knowledge base it already uses, so this
+module keeps a copy of each agent's configuration and works out which
+fields of an update actually change. Only those are sent; an update that
+changes nothing is not sent at all.
+
+The copy is fetched once per agent, replaced by every PATCH response, and
+re-fetched after max_age seconds so edits made in the ElevenLabs dashboard
+are picked up.
+"""
+
+import asyncio
+import copy
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+def matches(current: Any, desired: Any) -> bool:
+    """
+    Return True if the current value already satisfies the desired one
+
+    Only the keys present in desired are compared, so extra fields that
+    ElevenLabs adds to its responses (timestamps, defaults) don't count as
+    differences. Lists must have the same length and matching elements.
+    """
+    if isinstance(desired, dict):
+        return isinstance(current, dict) and all(
+            key in current and matches(current[key], value) for key, value in desired.items()
+        )
+    if isinstance(desired, list):
+        return (
+            isinstance(current, list)
+            and len(current) == len(desired)
+            and all(matches(c, d) for c, d in zip(current, desired))
+        )
+    return current == desired
+
+
+def diff_update(current: Optional[Dict[str, Any]], desired: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the part of a PATCH payload that would change the current config
+
+    Nested objects are diffed key by key. Lists are replaced as a whole by
+    ElevenLabs, so a list that differs is sent complete.
+
+    Args:
+        current (dict, optional): Current agent configuration, None if unknown
+        desired (dict): Full PATCH payload
+
+    Returns:
+        Dict[str, Any]: The fields to send (empty if nothing would change)
+    """
+    if current is None:
+        return desired
+    changes = {}
+    for key, value in desired.items():
+        if key not in current:
+            changes[key] = value
+        elif isinstance(value, dict) and isinstance(current[key], dict):
+            nested = diff_update(current[key], value)
+            if nested:
+                changes[key] = nested
+        elif not matches(current[key], value):
+            changes[key] = value
+    return changes
+
+
+def merge_update(config: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of config with a PATCH payload applied to it"""
+    merged = copy.deepcopy(config)
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_update(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+class AgentConfigCache:
+    """
+    Per-agent configuration copies used to skip no-op PATCHes
+
+    This class handles:
+    - Fetching an agent's configuration on first use (and after max_age)
+    - Diffing an update against it and sending only the changed fields
+    - Replacing the copy with the PATCH response
+    - Counters for sent and skipped updates
+
+    Updates of the same agent are serialized so each diff is made against
+    the result of the previous update.
+    """
+
+    def __init__(self, max_age: float):
+        """
+        Args:
+            max_age (float): Seconds a cached configuration is trusted before re-fetching
+        """
+        self.max_age = max_age
+        self._configs: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+        # Metrics
+        self.fetches = 0
+        self.fetch_errors = 0
+        self.patches_sent = 0
+        self.patches_skipped = 0
+        self.fields_skipped = 0
+
+    def _lock_for(self, agent_id: str) -> asyncio.Lock:
+        """Return the update lock for an agent"""
+        lock = self._locks.get(agent_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[agent_id] = lock
+        return lock
+
+    async def _current(self, agent_id: str,
+                       fetch: Callable[[str], Awaitable[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Return the cached configuration of an agent, fetching it if missing or too old"""
+        cached = self._configs.get(agent_id)
+        if cached is not None and time.monotonic() - cached[1] < self.max_age:
+            return cached[0]
+        try:
+            config = await fetch(agent_id)
+        except Exception as e:
+            # Without a known configuration we fall back to sending the full update
+            self.fetch_errors += 1
+            print(f"⚠️ Fetching configuration of agent {agent_id} failed: {e}")
+            return None
+        self.fetches += 1
+        self._configs[agent_id] = (config, time.monotonic())
+        return config
+
+    async def get(self, agent_id: str,
+                  fetch: Callable[[str], Awaitable[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """
+        Return an agent's configuration, from the cache when it is recent enough
+
+        Args:
+            agent_id (str): Agent to look up
+            fetch (Callable): Coroutine function returning an agent's configuration
+
+        Returns:
+            Optional[Dict[str, Any]]: The configuration, or None if it couldn't be fetched
+        """
+        return await self._current(agent_id, fetch)
+
+    async def update(self, agent_id: str, payload: Dict[str, Any],
+                     fetch: Callable[[str], Awaitable[Dict[str, Any]]],
+                     patch: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Apply an update to an agent, sending only the fields that change
+
+        Args:
+            agent_id (str): Agent to update
+            payload (dict): Full PATCH payload describing the desired state
+            fetch (Callable): Coroutine function returning an agent's configuration
+            patch (Callable): Coroutine function sending a PATCH payload and
+                returning the updated configuration
+
+        Returns:
+            Dict[str, Any]: The agent configuration after the update
+
+        Raises:
+            Exception: Whatever patch raises
+        """
+        return await self.update_from(agent_id, lambda current: payload, fetch, patch)
+
+    async def update_from(self, agent_id: str,
+                          build: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+                          fetch: Callable[[str], Awaitable[Dict[str, Any]]],
+                          patch: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Like update(), but the payload is built from the current configuration
+
+        Use this for read-modify-write updates such as adding entries to a
+        list: build runs under the agent's update lock, so concurrent updates
+        don't overwrite each other's additions.
+
+        Args:
+            agent_id (str): Agent to update
+            build (Callable): Returns the full PATCH payload given the current
+                configuration (None if it couldn't be fetched)
+            fetch (Callable): Coroutine function returning an agent's configuration
+            patch (Callable): Coroutine function sending a PATCH payload
+
+        Returns:
+            Dict[str, Any]: The agent configuration after the update
+        """
+        async with self._lock_for(agent_id):
+            current = await self._current(agent_id, fetch)
+            payload = build(current)
+            changes = diff_update(current, payload)
+            if not changes:
+                self.patches_skipped += 1
+                return current
+
+            if current is not None:
+                self.fields_skipped += _count_leaves(payload) - _count_leaves(changes)
+            try:
+                result = await patch(changes)
+            except Exception:
+                # The agent may or may not have been changed; re-fetch next time
+                self._configs.pop(agent_id, None)
+                raise
+            self.patches_sent += 1
+
+            if isinstance(result, dict) and "conversation_config" in result:
+                self._configs[agent_id] = (result, time.monotonic())
+            elif current is not None:
+                # Response without the full configuration: apply the change ourselves
+                self._configs[agent_id] = (merge_update(current, changes), time.monotonic())
+            return result
+
+    def invalidate(self, agent_id: Optional[str] = None):
+        """Forget the cached configuration of one agent, or of all agents"""
+        if agent_id is None:
+            self._configs.clear()
+        else:
+            self._configs.pop(agent_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Cached agents, fetches, sent and skipped updates
+        """
+        return {
+            "cached_agents": len(self._configs),
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+            "patches_sent": self.patches_sent,
+            "patches_skipped": self.patches_skipped,
+            "fields_skipped": self.fields_skipped
+        }
+
+
+def _count_leaves(payload: Any) -> int:
+    """Count the non-object values in a payload (lists count as one value)"""
+    if isinstance(payload, dict):
+        return sum(_count_leaves(value) for value in payload.values())
+    return 1
@@ -0,0 +1,220 @@
+"""
+Inbound Audio Framing
+
+Browsers hand us mic audio (16 kHz 16-bit mono PCM) in chunks of whatever
+size they like, and each one used to become its own JSON + base64 message to
+ElevenLabs. For small chunks the per-message overhead dominates. An
+AudioFramer sits between the browser and send_audio_chunk and re-frames the
+byte stream into fixed-duration frames (WS_AUDIO_FRAME_MS, 100ms by default,
+which is WS_AUDIO_FRAME_MS * WS_AUDIO_BYTES_PER_MS bytes of PCM):
+
+- Whole frames inside an incoming chunk are sent as memoryview slices of it,
+  without copying
+- Leftover bytes wait in a frame-sized buffer (written through a memoryview)
+  until the next chunk completes the frame
+- Base64 chunks that are exactly one frame, with nothing buffered, are sent
+  as they came, without decoding
+- A partial frame is flushed when the browser says the utterance ended
+  ({"type": "audio_end"}) or when no audio arrives for WS_AUDIO_FLUSH_MS,
+  so the end of what the user said is never held back
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Union
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class AudioFramer:
+    """
+    Re-frames one session's inbound audio into fixed-size upstream messages
+
+    Frames are passed to `send` one at a time and in order; a memoryview
+    frame is only valid until `send` returns.
+    """
+
+    def __init__(self, send: Callable[[BytesLike], Awaitable[None]], frame_bytes: int,
+                 flush_after: float, metrics: Optional["AudioFramingMetrics"] = None):
+        """
+        Args:
+            send (Callable): Coroutine function sending one frame upstream
+            frame_bytes (int): Size of a full frame
+            flush_after (float): Seconds without audio after which a partial frame is sent
+            metrics (AudioFramingMetrics, optional): Shared counters to update
+        """
+        self.send = send
+        self.frame_bytes = frame_bytes
+        self.flush_after = flush_after
+        self.metrics = metrics or AudioFramingMetrics()
+        self._buffer = bytearray(frame_bytes)
+        self._view = memoryview(self._buffer)
+        self._pending = 0
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes waiting for the rest of their frame"""
+        return self._pending
+
+    async def push(self, data: BytesLike):
+        """
+        Add a chunk of audio and send every frame it completes
+
+        Args:
+            data (BytesLike): Audio bytes from the browser
+        """
+        self._cancel_timer()
+        data = memoryview(data).cast("B")
+        self.metrics.record_chunk(len(data))
+        async with self._lock:
+            offset = 0
+            if self._pending:
+                # Complete the buffered frame first
+                taken = min(self.frame_bytes - self._pending, len(data))
+                self._view[self._pending:self._pending + taken] = data[:taken]
+                self._pending += taken
+                offset = taken
+                if self._pending == self.frame_bytes:
+                    self._pending = 0
+                    await self._send(self._view)
+            # Whole frames straight from the chunk
+            while len(data) - offset >= self.frame_bytes:
+                await self._send(data[offset:offset + self.frame_bytes])
+                offset += self.frame_bytes
+            # Keep the remainder for the next chunk
+            remainder = len(data) - offset
+            if remainder:
+                self._view[self._pending:self._pending + remainder] = data[offset:]
+                self._pending += remainder
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_after, self._on_timeout)
+
+    def take_whole_frame(self, size: int) -> bool:
+        """
+        Claim a chunk that is exactly one frame, for sending without re-framing
+
+        Lets base64 pass-through chunks that are already frame-sized skip
+        decoding. Nothing may be buffered, or the chunk would overtake it.
+
+        Args:
+            size (int): Decoded size of the chunk
+
+        Returns:
+            bool: True if the caller should send the chunk as is (it is counted as a frame)
+        """
+        if self._pending or size != self.frame_bytes:
+            return False
+        self.metrics.record_chunk(size)
+        self.metrics.record_frame(size)
+        self.metrics.passed_through += 1
+        return True
+
+    async def flush(self, reason: str = "end"):
+        """
+        Send the buffered partial frame, if any
+
+        Args:
+            reason (str): Why the frame is flushed ("end", "timeout" or "close"), for metrics
+        """
+        self._cancel_timer()
+        async with self._lock:
+            if not self._pending:
+                return
+            size, self._pending = self._pending, 0
+            self.metrics.flushes[reason] = self.metrics.flushes.get(reason, 0) + 1
+            await self._send(self._view[:size])
+
+    def close(self):
+        """Stop the flush timer; buffered audio is discarded"""
+        self._cancel_timer()
+        self._pending = 0
+
+    async def _send(self, frame: memoryview):
+        self.metrics.record_frame(len(frame))
+        await self.send(frame)
+
+    def _on_timeout(self):
+        self._timer = None
+        task = asyncio.get_running_loop().create_task(self.flush("timeout"))
+        # Send errors are reported by `send`; just mark them as retrieved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+class AudioFramingMetrics:
+    """Counters for inbound audio framing, shared by all sessions"""
+
+    def __init__(self, rate_window: float = 60.0):
+        """
+        Args:
+            rate_window (float): Seconds over which the upstream message rate is measured
+        """
+        self.rate_window = rate_window
+        self.chunks_in = 0
+        self.bytes_in = 0
+        self.frames_out = 0
+        self.passed_through = 0
+        self.flushes: Dict[str, int] = {}
+        self._chunk_sizes: Deque[int] = deque(maxlen=1000)
+        self._frame_sizes: Deque[int] = deque(maxlen=1000)
+        self._frame_times: Deque[float] = deque()
+
+    def record_chunk(self, size: int):
+        """Count a chunk received from a browser"""
+        self.chunks_in += 1
+        self.bytes_in += size
+        self._chunk_sizes.append(size)
+
+    def record_frame(self, size: int):
+        """Count a frame sent upstream"""
+        self.frames_out += 1
+        self._frame_sizes.append(size)
+        now = time.monotonic()
+        self._frame_times.append(now)
+        while self._frame_times and self._frame_times[0] < now - self.rate_window:
+            self._frame_times.popleft()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return framing counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Chunk and frame counts, size percentiles of the last
+                1000 chunks and frames, flushes by reason, and upstream audio
+                messages per second over the rate window
+        """
+        now = time.monotonic()
+        recent = sum(1 for sent_at in self._frame_times if sent_at >= now - self.rate_window)
+        return {
+            "chunks_in": self.chunks_in,
+            "bytes_in": self.bytes_in,
+            "frames_out": self.frames_out,
+            "frames_passed_through": self.passed_through,
+            "chunk_bytes": _size_distribution(self._chunk_sizes),
+            "frame_bytes": _size_distribution(self._frame_sizes),
+            "flushes": dict(self.flushes),
+            "upstream_messages_per_second": round(recent / self.rate_window, 3)
+        }
+
+
+def _size_distribution(sizes: Deque[int]) -> Dict[str, int]:
+    ordered = sorted(sizes)
+
+    def percentile(p: float) -> int:
+        if not ordered:
+            return 0
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {
+        "min": ordered[0] if ordered else 0,
+        "p50": percentile(0.5),
+        "p95": percentile(0.95),
+        "max": ordered[-1] if ordered else 0
+    }
@@ -0,0 +1,69 @@
+"""
+Batch Story Uploads
+
+Teachers attach a whole reading list to one agent at once. This module runs
+the per-document uploads of a batch concurrently (up to a configurable cap)
+and reports each result as soon as it finishes, so the caller can stream
+progress back while the rest of the batch is still uploading.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+
+async def run_concurrently(count: int, upload: Callable[[int], Awaitable[Dict[str, Any]]],
+                           concurrency: int
+                           ) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Run count uploads with bounded concurrency
+
+    Results are yielded in completion order. If the consumer stops early
+    (e.g. the client disconnects), uploads that haven't finished are cancelled.
+
+    Args:
+        count (int): Number of documents in the batch
+        upload (Callable): Coroutine function uploading the document at an index
+        concurrency (int): Maximum uploads running at the same time
+
+    Yields:
+        Tuple: (index, result or None, error or None)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int):
+        async with semaphore:
+            try:
+                return index, await upload(index), None
+            except Exception as e:
+                return index, None, e
+
+    tasks = [asyncio.create_task(run(index)) for index in range(count)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class BatchUploadMetrics:
+    """Counters for batch uploads"""
+
+    def __init__(self):
+        self.batches = 0
+        self.batches_in_progress = 0
+        self.documents_uploaded = 0
+        self.documents_failed = 0
+        self.agent_updates = 0
+        self.agent_update_errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch upload counters for monitoring"""
+        return {
+            "batches": self.batches,
+            "batches_in_progress": self.batches_in_progress,
+            "documents_uploaded": self.documents_uploaded,
+            "documents_failed": self.documents_failed,
+            "agent_updates": self.agent_updates,
+            "agent_update_errors": self.agent_update_errors
+        }
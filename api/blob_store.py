@@ -0,0 +1,297 @@
+"""
+Content-Addressed Blob Store
+
+Keeps a local copy of every uploaded story under Config.UPLOAD_FOLDER, named
+by the SHA-256 of its content. With the file on local disk, re-uploading it
+to ElevenLabs, extracting its text and (re)building its retrieval index no
+longer need the user to send it again.
+
+Layout: <root>/<hash[0:2]>/<hash[2:4]>/<hash>, so no directory ever holds
+more than a few hundred files. Files are written with aiofiles to a
+temporary name, hashed through a memory map (hashlib releases the GIL, and
+the file is never copied into Python memory) and then renamed into place,
+so a blob is either complete or absent.
+
+The store is bounded by total size: when it grows past max_bytes the least
+recently used blobs are deleted. A blob's modification time is its last
+use, so the LRU order survives restarts.
+"""
+
+import asyncio
+import hashlib
+import mmap
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import aiofiles
+
+
+def hash_file(path: str) -> Tuple[str, int]:
+    """
+    Compute the SHA-256 of a file through a memory map
+
+    Args:
+        path (str): File to hash
+
+    Returns:
+        Tuple[str, int]: Hex digest and file size in bytes
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return hashlib.sha256().hexdigest(), 0  # Empty files can't be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return hashlib.sha256(mapped).hexdigest(), size
+
+
+class BlobStore:
+    """
+    Sharded on-disk store of files by content hash, with LRU size retention
+
+    This class handles:
+    - Writing uploads and byte strings to disk without blocking the event loop
+    - Looking up and reading blobs by content hash
+    - Deleting the least recently used blobs over the size budget
+    - Hit, write and eviction counters for monitoring
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        """
+        Args:
+            root (str): Folder holding the blobs
+            max_bytes (int): Total size kept on disk before evicting
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self._tmp_folder = os.path.join(root, "tmp")
+        self._lock = threading.Lock()
+        # content hash -> size, least recently used first
+        self._blobs: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+
+        # Metrics
+        self.writes = 0
+        self.existing_writes = 0
+        self.write_errors = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.hash_seconds = 0.0
+
+        os.makedirs(self._tmp_folder, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Index the blobs already on disk, oldest use first, and drop leftover temp files"""
+        for name in os.listdir(self._tmp_folder):
+            os.remove(os.path.join(self._tmp_folder, name))
+
+        found = []
+        for first in os.scandir(self.root):
+            if not first.is_dir() or len(first.name) != 2:
+                continue
+            for second in os.scandir(first.path):
+                if not second.is_dir():
+                    continue
+                for blob in os.scandir(second.path):
+                    stat = blob.stat()
+                    found.append((stat.st_mtime, blob.name, stat.st_size))
+
+        for _, content_hash, size in sorted(found):
+            self._blobs[content_hash] = size
+            self.total_bytes += size
+        if found:
+            print(f"📦 Blob store: {len(found)} stored file(s), {self.total_bytes / (1024 * 1024):.1f}MB")
+
+    def path_for(self, content_hash: str) -> str:
+        """Return where the blob with this hash is (or would be) stored"""
+        return os.path.join(self.root, content_hash[:2], content_hash[2:4], content_hash)
+
+    def __contains__(self, content_hash: str) -> bool:
+        return content_hash in self._blobs
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """
+        Return the path of a stored blob and mark it as recently used
+
+        Args:
+            content_hash (str): SHA-256 of the content
+
+        Returns:
+            Optional[str]: Path of the blob, or None if it isn't stored
+        """
+        path = self.path_for(content_hash)
+        with self._lock:
+            if content_hash not in self._blobs:
+                self.misses += 1
+                return None
+            self._blobs.move_to_end(content_hash)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Deleted behind our back
+            self._forget(content_hash)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    async def read(self, content_hash: str) -> Optional[bytes]:
+        """
+        Read a stored blob
+
+        Args:
+            content_hash (str): SHA-256 of the content
+
+        Returns:
+            Optional[bytes]: The content, or None if it isn't stored
+        """
+        path = self.get(content_hash)
+        if path is None:
+            return None
+        try:
+            async with aiofiles.open(path, "rb") as f:
+                return await f.read()
+        except FileNotFoundError:
+            self._forget(content_hash)
+            return None
+
+    async def put(self, upload_file, chunk_size: int) -> Tuple[str, int]:
+        """
+        Store an uploaded file and return its content hash
+
+        The file is copied to disk chunk by chunk and then hashed from disk,
+        so it is never fully in memory. The upload is rewound afterwards.
+
+        Args:
+            upload_file: FastAPI/Starlette UploadFile
+            chunk_size (int): Bytes read per chunk
+
+        Returns:
+            Tuple[str, int]: SHA-256 hex digest and size of the file
+
+        Raises:
+            OSError: If the file can't be written
+        """
+        tmp_path = self._tmp_path()
+        try:
+            await upload_file.seek(0)
+            async with aiofiles.open(tmp_path, "wb") as out:
+                while True:
+                    chunk = await upload_file.read(chunk_size)
+                    if not chunk:
+                        break
+                    await out.write(chunk)
+            await upload_file.seek(0)
+
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            content_hash, size = await loop.run_in_executor(None, hash_file, tmp_path)
+            self.hash_seconds += time.perf_counter() - started
+            await loop.run_in_executor(None, self._commit, tmp_path, content_hash, size)
+        except OSError:
+            self.write_errors += 1
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return content_hash, size
+
+    async def put_bytes(self, data: bytes, content_hash: str) -> bool:
+        """
+        Store content that is already in memory and hashed
+
+        Keeping the copy is best effort: a write error is logged, not raised.
+
+        Args:
+            data (bytes): The content
+            content_hash (str): SHA-256 of data
+
+        Returns:
+            bool: True if the blob is stored
+        """
+        if self.get(content_hash) is not None:
+            self.existing_writes += 1
+            return True
+        tmp_path = self._tmp_path()
+        try:
+            async with aiofiles.open(tmp_path, "wb") as out:
+                await out.write(data)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._commit, tmp_path, content_hash, len(data))
+            return True
+        except OSError as e:
+            self.write_errors += 1
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"⚠️ Could not keep a local copy of {content_hash[:12]}: {e}")
+            return False
+
+    def _tmp_path(self) -> str:
+        """Return a unique temporary file path inside the store"""
+        return os.path.join(self._tmp_folder, uuid.uuid4().hex)
+
+    def _commit(self, tmp_path: str, content_hash: str, size: int):
+        """Move a written temp file to its blob path and evict over budget (runs in a worker thread)"""
+        path = self.path_for(content_hash)
+        with self._lock:
+            if content_hash in self._blobs and os.path.exists(path):
+                # Same content stored before: keep the old copy, just mark it used
+                os.remove(tmp_path)
+                os.utime(path)
+                self._blobs.move_to_end(content_hash)
+                self.existing_writes += 1
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            self.total_bytes += size - self._blobs.pop(content_hash, 0)
+            self._blobs[content_hash] = size
+            self.writes += 1
+            self._evict(keep=content_hash)
+
+    def _evict(self, keep: str):
+        """Delete least recently used blobs until the store fits its budget (lock held)"""
+        while self.total_bytes > self.max_bytes and len(self._blobs) > 1:
+            content_hash, size = next(iter(self._blobs.items()))
+            if content_hash == keep:
+                break
+            del self._blobs[content_hash]
+            self.total_bytes -= size
+            self.evictions += 1
+            self.evicted_bytes += size
+            try:
+                os.remove(self.path_for(content_hash))
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, content_hash: str):
+        """Drop a blob that disappeared from disk from the index"""
+        with self._lock:
+            size = self._blobs.pop(content_hash, None)
+            if size is not None:
+                self.total_bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return store counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Stored files and bytes, hits, writes and evictions
+        """
+        return {
+            "blobs": len(self._blobs),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "existing_writes": self.existing_writes,
+            "write_errors": self.write_errors,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "hash_seconds": round(self.hash_seconds, 3)
+        }
@@ -0,0 +1,206 @@
+"""
+In-Process Response Cache
+
+This module provides a small TTL cache with stale-while-revalidate for
+ElevenLabs reads that many browser tabs poll at once (e.g. the conversation
+list). Within the TTL an entry is served as is. After the TTL it is still
+served for a grace period while exactly one background task refreshes it,
+so callers never wait on ElevenLabs unless the entry is missing or too old.
+
+Keys often come from clients (e.g. an agent ID), so the cache holds at most
+max_entries entries, dropping the least recently read first, and entries
+past their stale window are removed instead of lingering.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from api.scheduler import BACKGROUND, priority_scope
+
+
+class _CacheEntry:
+    """A cached value and the time it was loaded"""
+
+    __slots__ = ("value", "loaded_at")
+
+    def __init__(self, value: Any, loaded_at: float):
+        self.value = value
+        self.loaded_at = loaded_at
+
+
+class StaleWhileRevalidateCache:
+    """
+    TTL cache that serves stale values while refreshing in the background
+
+    Entry lifecycle:
+    - age < ttl: fresh, returned directly
+    - ttl <= age < ttl + stale_ttl: stale, returned directly and refreshed in the background
+    - older, missing or invalidated: the caller waits for a new load
+
+    Concurrent loads for the same key share one in-flight task. A load only
+    stores its result while it is still the registered load for its key, so
+    invalidating one key discards that key's in-flight load and no other.
+    """
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float, max_entries: int = 256):
+        """
+        Args:
+            name (str): Cache name, used in logs
+            ttl (float): Seconds an entry is considered fresh
+            stale_ttl (float): Extra seconds a stale entry may still be served
+            max_entries (int): Entries kept; the least recently read is dropped first
+        """
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        # Least recently read first
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._loads: Dict[Hashable, asyncio.Task] = {}
+
+        # Metrics
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for a key, loading it if needed
+
+        Args:
+            key (Hashable): Cache key
+            loader (Callable): Zero-argument coroutine function that fetches a fresh value
+
+        Returns:
+            Any: The cached or freshly loaded value
+
+        Raises:
+            Exception: Whatever the loader raises when there is no usable cached value
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.loaded_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._refresh_in_background(key, loader)
+                return entry.value
+            del self._entries[key]
+            self.expirations += 1
+
+        self.misses += 1
+        # Shield the shared load so one cancelled caller doesn't cancel it for the others
+        return await asyncio.shield(self._start_load(key, loader))
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Return the in-flight load for a key, starting one if none is running"""
+        task = self._loads.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader))
+            # Mark the exception as retrieved even if every waiter went away
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._loads[key] = task
+        return task
+
+    def _refresh_in_background(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        """Start a background refresh for a key unless a load is already running"""
+        if key in self._loads:
+            return
+        # Nobody is waiting on this load, so it goes to the back of the upstream queue
+        with priority_scope(BACKGROUND):
+            task = self._start_load(key, loader)
+        task.add_done_callback(lambda done: self._on_refresh_done(key, done))
+
+    def _on_refresh_done(self, key: Hashable, task: asyncio.Task):
+        """Count the outcome of a background refresh"""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            self.refreshes += 1
+        else:
+            # Keep serving the stale value; the next stale hit retries the refresh
+            self.refresh_errors += 1
+            print(f"⚠️ Background refresh of {self.name} cache failed for {key}: {error}")
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Run the loader and store its result"""
+        try:
+            value = await loader()
+            # invalidate() unregisters the load, so data fetched before an
+            # invalidation of this key is not stored
+            if self._loads.get(key) is asyncio.current_task():
+                self._store(key, value)
+            return value
+        finally:
+            if self._loads.get(key) is asyncio.current_task():
+                self._loads.pop(key, None)
+
+    def _store(self, key: Hashable, value: Any):
+        """Store a loaded value, dropping expired entries and the least recently read ones over max_entries"""
+        now = time.monotonic()
+        self._entries[key] = _CacheEntry(value, now)
+        self._entries.move_to_end(key)
+        max_age = self.ttl + self.stale_ttl
+        for old_key in [k for k, entry in self._entries.items() if now - entry.loaded_at >= max_age]:
+            del self._entries[old_key]
+            self.expirations += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """
+        Drop a cached entry so the next read loads a fresh value
+
+        Loads of the dropped key(s) that are already in flight finish for
+        their current waiters but their (possibly outdated) result is not
+        stored; loads of other keys are unaffected.
+
+        Args:
+            key (Hashable, optional): Key to drop; drops everything when omitted
+        """
+        self.invalidations += 1
+        if key is None:
+            self._entries.clear()
+            self._loads.clear()
+        else:
+            self._entries.pop(key, None)
+            self._loads.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Entry count, hit/miss counters, background refresh counters
+                and entries dropped by the size limit or for being too old
+        """
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+            "background_refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "refreshes_in_flight": len(self._loads),
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
@@ -0,0 +1,399 @@
+"""
+Local Conversation Index
+
+Answering "what is the latest conversation for this agent?" used to mean
+listing conversations from ElevenLabs, unwrapping the response, sorting it
+and only then fetching the transcript. This module keeps a per-agent index
+of conversation metadata ordered by start time instead, so the latest
+conversation is a constant-time lookup.
+
+The index is kept current by (all at background upstream priority):
+- A background task that periodically pulls new conversations for every known agent
+- Session-end events from the WebSocket bridge, which trigger a quick refresh
+
+When the latest conversation of an agent changes and is complete, its
+transcript can be prefetched so the sketchbook gets it without waiting.
+
+The index is bounded: each agent keeps only its newest conversations, and at
+most max_agents agents are tracked. The agent looked up least recently is
+dropped first, and agents nobody has looked up for idle_timeout seconds stop
+being refreshed.
+"""
+
+import asyncio
+import bisect
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from api.transcript_store import is_completed
+from api.scheduler import BACKGROUND, priority_scope
+
+
+class AgentConversations:
+    """
+    Metadata of an agent's newest conversations, ordered by start time
+
+    Attributes:
+        by_id (dict): conversation_id -> metadata
+        order (list): (start_time_unix_secs, conversation_id), ascending
+        max_conversations (int): Conversations kept; older ones are dropped
+        backfilled (bool): Whether the newest max_conversations (or the whole history) have been loaded
+        refreshed_at (float): Monotonic time of the last refresh
+        used_at (float): Monotonic time of the last lookup
+    """
+
+    def __init__(self, max_conversations: int):
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.order: List[Tuple[int, str]] = []
+        self.max_conversations = max_conversations
+        self.backfilled = False
+        self.refreshed_at = 0.0
+        self.used_at = time.monotonic()
+
+    def upsert(self, conversation: Dict[str, Any]) -> bool:
+        """
+        Insert or update a conversation's metadata
+
+        Args:
+            conversation (dict): Conversation summary from ElevenLabs
+
+        Returns:
+            bool: True if the conversation was not known before
+        """
+        conversation_id = conversation.get("conversation_id")
+        start_time = conversation.get("start_time_unix_secs")
+        if not conversation_id or start_time is None:
+            return False
+
+        previous = self.by_id.get(conversation_id)
+        if previous is not None:
+            previous_key = (previous["start_time_unix_secs"], conversation_id)
+            if previous_key[0] != start_time:
+                self.order.pop(bisect.bisect_left(self.order, previous_key))
+                bisect.insort(self.order, (start_time, conversation_id))
+            self.by_id[conversation_id] = conversation
+            return False
+
+        self.by_id[conversation_id] = conversation
+        bisect.insort(self.order, (start_time, conversation_id))
+        if len(self.order) > self.max_conversations:
+            _, oldest_id = self.order.pop(0)
+            del self.by_id[oldest_id]
+            if oldest_id == conversation_id:
+                return False
+        return True
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Return the most recently started conversation, or None"""
+        if not self.order:
+            return None
+        return self.by_id[self.order[-1][1]]
+
+
+class ConversationIndex:
+    """
+    Per-agent conversation indexes and the tasks that keep them current
+
+    This class handles:
+    - First-page indexing of an agent on first use, then backfilling up to max_conversations
+    - Bounding the tracked agents (LRU by lookup) and dropping idle ones
+    - Incremental refreshes that stop at the first already-known conversation
+    - Periodic background refreshes of every known agent
+    - Session-end notifications from the WebSocket bridge
+    - Prefetching the transcript of a new latest conversation
+    """
+
+    def __init__(self, iter_conversations: Callable[..., AsyncIterator[Dict[str, Any]]],
+                 refresh_interval: float, session_end_delay: float, first_sync_size: int,
+                 prefetch: Optional[Callable[[str], Awaitable[Any]]] = None,
+                 max_agents: int = 100, max_conversations: int = 200, idle_timeout: float = 3600):
+        """
+        Args:
+            iter_conversations (Callable): Client method yielding conversations newest first
+            refresh_interval (float): Seconds between background refreshes
+            session_end_delay (float): Seconds to wait after a session ends before
+                refreshing, giving ElevenLabs time to register the conversation
+            first_sync_size (int): Conversations indexed before answering the first
+                lookup for an agent; the rest is backfilled in the background
+            prefetch (Callable, optional): Coroutine function called with the ID of a
+                new, completed latest conversation
+            max_agents (int): Agents tracked at once; the least recently looked up is dropped
+            max_conversations (int): Newest conversations kept per agent
+            idle_timeout (float): Seconds without a lookup after which an agent is dropped
+        """
+        self.iter_conversations = iter_conversations
+        self.refresh_interval = refresh_interval
+        self.session_end_delay = session_end_delay
+        self.first_sync_size = first_sync_size
+        self.prefetch = prefetch
+        self.max_agents = max_agents
+        self.max_conversations = max_conversations
+        self.idle_timeout = idle_timeout
+        # Least recently looked up first
+        self.agents: "OrderedDict[str, AgentConversations]" = OrderedDict()
+        # Agents indexed from the start (e.g. the default agent), never dropped
+        self._pinned: List[str] = []
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._refresher: Optional[asyncio.Task] = None
+        self._prefetched: Dict[str, str] = {}
+
+        # Metrics
+        self.lookups = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.session_end_events = 0
+        self.prefetches = 0
+        self.evictions = 0
+
+    def _lock_for(self, agent_id: str) -> asyncio.Lock:
+        """Return the refresh lock for an agent"""
+        lock = self._locks.get(agent_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[agent_id] = lock
+        return lock
+
+    async def latest(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the latest conversation of an agent
+
+        The first lookup for an unknown agent indexes the newest page of its
+        history (and starts a background backfill); every later lookup is a
+        constant-time read of the index.
+
+        Args:
+            agent_id (str): Agent to look up
+
+        Returns:
+            Optional[Dict[str, Any]]: Metadata of the latest conversation, or None
+        """
+        self.lookups += 1
+        agent = self.agents.get(agent_id)
+        if agent is None:
+            await self.refresh(agent_id)
+            agent = self.agents.get(agent_id)
+            if agent is None:
+                # Dropped again by concurrent lookups of other agents
+                return None
+        agent.used_at = time.monotonic()
+        self.agents.move_to_end(agent_id)
+        return agent.latest()
+
+    async def refresh(self, agent_id: str):
+        """
+        Pull new conversations for an agent into the index
+
+        An unknown agent gets its newest page indexed now and the rest of its
+        history loaded by a background backfill. A known agent is refreshed
+        incrementally: pages are read newest first until a conversation that
+        is already indexed and complete shows up.
+
+        Args:
+            agent_id (str): Agent to refresh
+
+        Raises:
+            Exception: If listing conversations from ElevenLabs fails
+        """
+        async with self._lock_for(agent_id):
+            agent = self.agents.get(agent_id)
+            first_sync = agent is None
+            if first_sync:
+                agent = AgentConversations(self.max_conversations)
+
+            conversations = self.iter_conversations(agent_id=agent_id)
+            try:
+                seen = 0
+                async for conversation in conversations:
+                    seen += 1
+                    known = conversation.get("conversation_id") in agent.by_id
+                    agent.upsert(conversation)
+                    if known and is_completed(conversation):
+                        break
+                    if first_sync and seen >= self.first_sync_size:
+                        break
+            finally:
+                await conversations.aclose()
+
+            agent.refreshed_at = time.monotonic()
+            if first_sync:
+                self.agents[agent_id] = agent
+                self._evict_over_limit()
+            self.refreshes += 1
+
+        if agent_id not in self.agents:
+            return
+        if first_sync:
+            self._spawn(f"backfill:{agent_id}", self._backfill(agent_id))
+        self._maybe_prefetch(agent_id)
+
+    def _evict_over_limit(self):
+        """Drop the least recently looked up agents beyond max_agents"""
+        for agent_id in list(self.agents):
+            if len(self.agents) <= self.max_agents:
+                break
+            if agent_id not in self._pinned:
+                self._drop(agent_id)
+
+    def _evict_idle(self):
+        """Drop agents that have not been looked up for idle_timeout seconds"""
+        cutoff = time.monotonic() - self.idle_timeout
+        for agent_id, agent in list(self.agents.items()):
+            if agent.used_at < cutoff and agent_id not in self._pinned:
+                self._drop(agent_id)
+
+    def _drop(self, agent_id: str):
+        """Forget an agent and stop its backfill"""
+        self.agents.pop(agent_id, None)
+        self._prefetched.pop(agent_id, None)
+        lock = self._locks.get(agent_id)
+        if lock is not None and not lock.locked():
+            del self._locks[agent_id]
+        task = self._tasks.get(f"backfill:{agent_id}")
+        if task is not None:
+            task.cancel()
+        self.evictions += 1
+
+    async def _backfill(self, agent_id: str):
+        """Load an agent's newest max_conversations conversations into the index in the background"""
+        try:
+            agent = self.agents.get(agent_id)
+            if agent is None:
+                return
+            conversations = self.iter_conversations(agent_id=agent_id)
+            try:
+                seen = 0
+                async for conversation in conversations:
+                    agent.upsert(conversation)
+                    seen += 1
+                    if seen >= self.max_conversations:
+                        break
+            finally:
+                await conversations.aclose()
+            agent.backfilled = True
+        except Exception as e:
+            self.refresh_errors += 1
+            print(f"⚠️ Backfilling conversation index for {agent_id} failed: {e}")
+
+    def _maybe_prefetch(self, agent_id: str):
+        """Prefetch the transcript of a new, completed latest conversation"""
+        if self.prefetch is None:
+            return
+        latest = self.agents[agent_id].latest()
+        if latest is None or not is_completed(latest):
+            return
+        conversation_id = latest["conversation_id"]
+        if self._prefetched.get(agent_id) == conversation_id:
+            return
+        self._prefetched[agent_id] = conversation_id
+        self.prefetches += 1
+        self._spawn(f"prefetch:{agent_id}", self._run_prefetch(conversation_id))
+
+    async def _run_prefetch(self, conversation_id: str):
+        """Run the prefetch callback, logging failures"""
+        try:
+            await self.prefetch(conversation_id)
+        except Exception as e:
+            print(f"⚠️ Prefetching transcript {conversation_id} failed: {e}")
+
+    def notify_session_ended(self, agent_id: str, conversation_id: Optional[str] = None,
+                             started_at: Optional[float] = None):
+        """
+        Record that a WebSocket session with an agent has ended
+
+        The conversation is added to the index right away (as "processing")
+        so it is the latest immediately, and a refresh is scheduled to pick
+        up its final metadata from ElevenLabs.
+
+        Args:
+            agent_id (str): Agent the session talked to
+            conversation_id (str, optional): ID from the conversation initiation metadata
+            started_at (float, optional): Unix time the conversation started
+        """
+        self.session_end_events += 1
+        agent = self.agents.get(agent_id)
+        if agent is not None and conversation_id and started_at is not None:
+            if conversation_id not in agent.by_id:
+                agent.upsert({
+                    "agent_id": agent_id,
+                    "conversation_id": conversation_id,
+                    "start_time_unix_secs": int(started_at),
+                    "status": "processing"
+                })
+        self._spawn(f"session_end:{agent_id}", self._refresh_later(agent_id, self.session_end_delay))
+
+    async def _refresh_later(self, agent_id: str, delay: float):
+        """Refresh an agent after a delay, logging failures"""
+        await asyncio.sleep(delay)
+        try:
+            await self.refresh(agent_id)
+        except Exception as e:
+            self.refresh_errors += 1
+            print(f"⚠️ Refreshing conversation index for {agent_id} failed: {e}")
+
+    def _spawn(self, name: str, coroutine: Awaitable[Any]):
+        """Run a background-priority task, replacing an unfinished task with the same name"""
+        previous = self._tasks.get(name)
+        if previous is not None and not previous.done():
+            if name.startswith("session_end:"):
+                # Debounce: the newest session end decides when to refresh
+                previous.cancel()
+            else:
+                coroutine.close()
+                return
+        with priority_scope(BACKGROUND):
+            task = asyncio.create_task(coroutine)
+        self._tasks[name] = task
+        task.add_done_callback(lambda t: self._tasks.pop(name, None) if self._tasks.get(name) is t else None)
+
+    def start(self, agent_ids: List[str]):
+        """
+        Start the periodic background refresher
+
+        Args:
+            agent_ids (list): Agents to index from the start (e.g. the default agent)
+        """
+        self._pinned = [a for a in agent_ids if a]
+        if self._refresher is None or self._refresher.done():
+            with priority_scope(BACKGROUND):
+                self._refresher = asyncio.create_task(self._refresh_loop(self._pinned))
+
+    async def _refresh_loop(self, agent_ids: List[str]):
+        """Refresh every tracked agent once per refresh_interval, dropping idle ones first"""
+        for agent_id in agent_ids:
+            await self._refresh_later(agent_id, 0)
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            self._evict_idle()
+            for agent_id in list(self.agents):
+                await self._refresh_later(agent_id, 0)
+
+    async def stop(self):
+        """Cancel the background refresher and any pending tasks"""
+        tasks = list(self._tasks.values())
+        if self._refresher is not None:
+            tasks.append(self._refresher)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refresher = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return index counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Indexed agents and conversations, refresh and prefetch counters
+        """
+        return {
+            "agents": len(self.agents),
+            "conversations": sum(len(agent.by_id) for agent in self.agents.values()),
+            "backfilled_agents": sum(1 for agent in self.agents.values() if agent.backfilled),
+            "lookups": self.lookups,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "session_end_events": self.session_end_events,
+            "prefetches": self.prefetches,
+            "evicted_agents": self.evictions
+        }
@@ -2,44 +2,274 @@
 ElevenLabs API Client
 
 This module handles all communication with the ElevenLabs API including:
-- Uploading PDF files to knowledge base
+- Uploading PDF files (or their extracted text) to knowledge base
 - Updating agent configurations
 - Managing conversations
 - Retrieving transcripts
 
-The client uses the requests library for HTTP communication and
-follows ElevenLabs API specifications.
+The main client is AsyncElevenLabsClient. It keeps one pooled aiohttp session
+open for the lifetime of the application so keep-alive connections and TLS
+sessions are reused, and the FastAPI routes await it without blocking the
+event loop. ElevenLabsClient is a thin synchronous wrapper for scripts.
 """
 
-import requests
-import json
-from datetime import datetime
-from typing import Optional, Dict, Any
+import asyncio
+import aiohttp
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterator, List, Union
 from config import Config
+from api.resilience import ResilienceLayer
+from api.single_flight import SingleFlight
+from api.scheduler import UpstreamScheduler
+from api.agent_config import AgentConfigCache
 
-class ElevenLabsClient:
+# HTTP methods that are safe to retry by definition
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into seconds
+
+    Args:
+        value (str, optional): Header value, either delay-seconds or an HTTP date
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if missing or unparseable
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class ElevenLabsAPIError(Exception):
+    """
+    Raised when ElevenLabs answers with an HTTP error status
+
+    Attributes:
+        status_code (int): HTTP status returned by ElevenLabs
+        response_text (str): Raw response body, useful for debugging
+        retry_after (float, optional): Seconds from the Retry-After header, if sent
+    """
+
+    def __init__(self, status_code: int, response_text: str = "", retry_after: Optional[float] = None):
+        self.status_code = status_code
+        self.response_text = response_text
+        self.retry_after = retry_after
+        super().__init__(f"ElevenLabs API error {status_code}: {response_text}")
+
+
+def knowledge_base_entry(knowledge_base_id: str, knowledge_base_name: str,
+                         document_type: str = "file") -> Dict[str, str]:
+    """Return the agent configuration entry for an uploaded knowledge base document ("file" or "text")"""
+    return {
+        "name": knowledge_base_name,
+        "id": knowledge_base_id,
+        "usage_mode": "auto",  # Auto mode lets the agent decide when to use the knowledge base
+        "type": document_type
+    }
+
+
+def knowledge_base_payload(entries: List[Dict[str, str]], agent_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the agent PATCH payload that sets the agent's knowledge bases
+    
+    Args:
+        entries (list): Knowledge base entries (see knowledge_base_entry)
+        agent_name (str, optional): New name for the agent
+        
+    Returns:
+        Dict[str, Any]: Payload according to the ElevenLabs agent update specification
     """
-    Client class for interacting with ElevenLabs API
+    payload = {
+        "conversation_config": {
+            "agent": {
+                "prompt": {
+                    "knowledge_base": entries,
+                    "rag": {
+                        "enabled": True  # Enable RAG (Retrieval Augmented Generation)
+                    }
+                }
+            }
+        }
+    }
+    
+    # Add agent name if provided
+    if agent_name:
+        payload["name"] = agent_name
+    return payload
+
+
+def current_knowledge_bases(agent_config: Optional[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Return the knowledge base entries of an agent configuration (empty if unknown)"""
+    prompt = (((agent_config or {}).get("conversation_config") or {}).get("agent") or {}).get("prompt") or {}
+    return [
+        {key: entry[key] for key in ("name", "id", "usage_mode", "type") if key in entry}
+        for entry in prompt.get("knowledge_base") or []
+    ]
+
+
+class AsyncElevenLabsClient:
+    """
+    Async client class for interacting with ElevenLabs API
     
     This class encapsulates all the API calls needed for our application.
     It handles authentication, error checking, and response parsing.
+    
+    A single aiohttp session (and its connection pool) is created lazily on
+    first use and shared by every call, so create one instance per process
+    and call aclose() on shutdown. Every call goes through a ResilienceLayer
+    that retries idempotent requests and trips a circuit breaker per endpoint.
+    Identical concurrent reads are coalesced into one upstream request, and
+    every request waits for an UpstreamScheduler token so the API key quota
+    is shared by priority (see api.scheduler.priority_scope).
     """
     
-    def __init__(self):
-        """Initialize the client with configuration settings"""
+    def __init__(self, pool_size: Optional[int] = None, pool_size_per_host: Optional[int] = None,
+                 keepalive_timeout: Optional[float] = None):
+        """
+        Initialize the client with configuration settings
+        
+        Args:
+            pool_size (int, optional): Maximum open connections in total
+            pool_size_per_host (int, optional): Maximum open connections per host
+            keepalive_timeout (float, optional): Seconds an idle connection is kept open
+        """
         self.base_url = Config.ELEVENLABS_BASE_URL
         self.api_key = Config.ELEVENLABS_API_KEY
+        self.pool_size = pool_size or Config.HTTP_POOL_SIZE
+        self.pool_size_per_host = pool_size_per_host or Config.HTTP_POOL_SIZE_PER_HOST
+        self.keepalive_timeout = keepalive_timeout or Config.HTTP_KEEPALIVE_TIMEOUT
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.resilience = ResilienceLayer(
+            max_attempts=Config.RETRY_MAX_ATTEMPTS,
+            base_delay=Config.RETRY_BASE_DELAY,
+            max_delay=Config.RETRY_MAX_DELAY,
+            max_retry_after=Config.RETRY_AFTER_MAX,
+            failure_threshold=Config.CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=Config.CIRCUIT_RECOVERY_TIMEOUT
+        )
+        # Concurrent identical reads share one upstream request
+        self.single_flight = SingleFlight()
+        # Paces calls per API key and lets interactive calls go before background ones
+        self.scheduler = UpstreamScheduler(
+            rate=Config.UPSTREAM_RATE_LIMIT,
+            burst=Config.UPSTREAM_BURST,
+            min_rate=Config.UPSTREAM_MIN_RATE
+        )
+        # Agent configurations, so updates only send fields that change
+        self.agent_configs = AgentConfigCache(max_age=Config.AGENT_CONFIG_CACHE_TTL)
     
-    def upload_story_to_knowledge_base(self, file_content: bytes, file_name: str, 
-                                     story_name: str, user_id: str) -> Dict[str, Any]:
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Return the shared HTTP session, creating it on first use
+        
+        The session must be created inside a running event loop, which is
+        why this is not done in __init__.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300  # Avoid a DNS lookup for every new connection
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+    
+    async def aclose(self):
+        """Close the pooled HTTP session and all its open connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def _request(self, method: str, url: str, endpoint: str, error_context: str,
+                       timeout: float = 30, idempotent: Optional[bool] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Make an HTTP request through the resilience layer and return the JSON body
+        
+        Args:
+            method (str): HTTP method
+            url (str): Full URL to call
+            endpoint (str): Endpoint name for the circuit breaker and metrics
+            error_context (str): Short description used in error logs
+            timeout (float): Total timeout for each attempt in seconds
+            idempotent (bool, optional): Whether the call may be retried;
+                defaults to True for GET, HEAD, OPTIONS, PUT and DELETE
+            **kwargs: Passed through to aiohttp (headers, json, data, params)
+            
+        Returns:
+            Dict[str, Any]: Parsed JSON response
+            
+        Raises:
+            CircuitOpenError: If the endpoint's circuit is open
+            ElevenLabsAPIError: If ElevenLabs returns an error status
+            aiohttp.ClientError: If the connection fails
+            asyncio.TimeoutError: If the request times out
+        """
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        
+        async def attempt():
+            return await self._send(method, url, error_context, timeout, **kwargs)
+        
+        return await self.resilience.call(endpoint, attempt, idempotent)
+    
+    async def _send(self, method: str, url: str, error_context: str,
+                    timeout: float, **kwargs) -> Dict[str, Any]:
+        """Make a single HTTP request on the pooled session (see _request)"""
+        session = self._get_session()
+        
+        # Wait for our turn on the API key's quota (interactive calls go first)
+        await self.scheduler.acquire(self.api_key)
+        try:
+            async with session.request(
+                method,
+                url,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                **kwargs
+            ) as response:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.scheduler.record_response(self.api_key, response.status, retry_after)
+                
+                if response.status >= 400:
+                    response_text = await response.text()
+                    print(f"Error {error_context}")
+                    print(f"Response status: {response.status}")
+                    print(f"Response text: {response_text}")
+                    raise ElevenLabsAPIError(response.status, response_text, retry_after=retry_after)
+                
+                return await response.json(content_type=None)
+                
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error {error_context}: {e!r}")
+            raise
+    
+    async def upload_story_to_knowledge_base(self, file_content: Union[bytes, AsyncIterable[bytes]],
+                                             file_name: str, story_name: str, user_id: str) -> Dict[str, Any]:
         """
         Upload a PDF story to ElevenLabs knowledge base
         
         This method follows the ElevenLabs API specification for file uploads.
         It creates a unique name for the knowledge base entry using our naming convention.
         
+        The content can be bytes or an async iterable of byte chunks. With an
+        iterable the multipart body is streamed chunk by chunk, so the file is
+        never held in memory as a whole.
+        
         Args:
-            file_content (bytes): The PDF file content as bytes
+            file_content (bytes or AsyncIterable[bytes]): The PDF file content
             file_name (str): Original filename of the PDF
             story_name (str): User-provided name for the story
             user_id (str): Identifier for the user
@@ -48,7 +278,7 @@ class ElevenLabsClient:
             Dict[str, Any]: Response from ElevenLabs API containing id and name
             
         Raises:
-            requests.exceptions.RequestException: If the API call fails
+            ElevenLabsAPIError: If the API call fails
         """
         # Create a unique name following our naming convention
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -56,165 +286,268 @@ class ElevenLabsClient:
         
         # Prepare the multipart form data
         # ElevenLabs expects the file in a specific format
-        files = {
-            'file': (file_name, file_content, 'application/pdf')
-        }
-        
-        # Form data with the knowledge base name
-        data = {
-            'name': knowledge_base_name
-        }
+        form = aiohttp.FormData()
+        form.add_field('name', knowledge_base_name)
+        form.add_field('file', file_content, filename=file_name, content_type='application/pdf')
         
-        # Headers for file upload (no Content-Type as requests handles it)
+        # Headers for file upload (no Content-Type as aiohttp sets the multipart boundary)
         headers = Config.get_upload_headers()
         
-        try:
-            # Make the API call to upload the file
-            response = requests.post(
-                Config.KNOWLEDGE_BASE_UPLOAD_URL,
-                headers=headers,
-                files=files,
-                data=data,
-                timeout=60  # 60 second timeout for file uploads
-            )
-            
-            # Check if the request was successful
-            response.raise_for_status()
-            
-            # Parse and return the JSON response
-            result = response.json()
-            
-            # Add our custom naming info to the response
-            result['original_story_name'] = story_name
-            result['user_id'] = user_id
-            result['timestamp'] = timestamp
+        # Make the API call to upload the file
+        result = await self._request(
+            "POST",
+            Config.KNOWLEDGE_BASE_UPLOAD_URL,
+            endpoint="upload_file",
+            error_context="uploading file to ElevenLabs",
+            timeout=60,  # 60 second timeout for file uploads
+            headers=headers,
+            data=form
+        )
+        
+        # Add our custom naming info to the response
+        result['original_story_name'] = story_name
+        result['user_id'] = user_id
+        result['timestamp'] = timestamp
+        result['document_type'] = "file"
+        
+        return result
+    
+    async def upload_text_to_knowledge_base(self, text: str, story_name: str, user_id: str) -> Dict[str, Any]:
+        """
+        Upload a story's extracted text to ElevenLabs knowledge base
+        
+        Sending the text instead of the PDF keeps the request small when the
+        PDF is mostly images. The knowledge base is named like a PDF upload.
+        
+        Args:
+            text (str): Text of the story
+            story_name (str): User-provided name for the story
+            user_id (str): Identifier for the user
             
-            return result
+        Returns:
+            Dict[str, Any]: Response from ElevenLabs API containing id and name
             
-        except requests.exceptions.RequestException as e:
-            # Log the error and re-raise with more context
-            print(f"Error uploading file to ElevenLabs: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Response status: {e.response.status_code}")
-                print(f"Response text: {e.response.text}")
-            raise
+        Raises:
+            ElevenLabsAPIError: If the API call fails
+        """
+        # Create a unique name following our naming convention
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        knowledge_base_name = f"{user_id}_{story_name}_{timestamp}"
+        
+        result = await self._request(
+            "POST",
+            Config.KNOWLEDGE_BASE_TEXT_URL,
+            endpoint="upload_text",
+            error_context="uploading text to ElevenLabs",
+            timeout=60,
+            headers=Config.get_headers(),
+            json={"name": knowledge_base_name, "text": text}
+        )
+        
+        # Add our custom naming info to the response
+        result['original_story_name'] = story_name
+        result['user_id'] = user_id
+        result['timestamp'] = timestamp
+        result['document_type'] = "text"
+        
+        return result
     
-    def update_agent_knowledge_base(self, agent_id: str, knowledge_base_id: str, 
-                                  knowledge_base_name: str, agent_name: str = None) -> Dict[str, Any]:
+    async def update_agent_knowledge_base(self, agent_id: str, knowledge_base_id: str, 
+                                          knowledge_base_name: str, agent_name: str = None,
+                                          document_type: str = "file") -> Dict[str, Any]:
         """
         Update an ElevenLabs agent to use a specific knowledge base
         
         This method configures an agent to use the uploaded story as its knowledge base.
-        It follows the ElevenLabs agent update API specification.
+        It follows the ElevenLabs agent update API specification. The update is
+        diffed against the agent's cached configuration: only changed fields are
+        sent, and no request is made if the agent is already configured this way.
         
         Args:
             agent_id (str): The ID of the agent to update
             knowledge_base_id (str): ID of the uploaded knowledge base
             knowledge_base_name (str): Name of the knowledge base
             agent_name (str, optional): New name for the agent
+            document_type (str): "file" for PDF uploads, "text" for text uploads
             
         Returns:
             Dict[str, Any]: Updated agent configuration from ElevenLabs
             
         Raises:
-            requests.exceptions.RequestException: If the API call fails
+            ElevenLabsAPIError: If the API call fails
         """
-        # Construct the agent update URL
-        url = f"{Config.AGENT_UPDATE_URL}/{agent_id}"
+        entries = [knowledge_base_entry(knowledge_base_id, knowledge_base_name, document_type)]
+        # Send only what differs from the agent's current configuration
+        return await self.agent_configs.update(
+            agent_id,
+            knowledge_base_payload(entries, agent_name),
+            self.get_agent,
+            self._patch_agent(agent_id)
+        )
+    
+    async def attach_knowledge_bases(self, agent_id: str, knowledge_bases: List[Dict[str, str]],
+                                     replace: bool = False, agent_name: str = None) -> Dict[str, Any]:
+        """
+        Add several knowledge bases to an agent in a single update
         
-        # Prepare the update payload according to ElevenLabs specification
-        payload = {
-            "conversation_config": {
-                "agent": {
-                    "prompt": {
-                        "knowledge_base": [
-                            {
-                                "name": knowledge_base_name,
-                                "id": knowledge_base_id,
-                                "usage_mode": "auto",  # Auto mode lets the agent decide when to use the knowledge base
-                                "type": "file"
-                            }
-                        ],
-                        "rag": {
-                            "enabled": True  # Enable RAG (Retrieval Augmented Generation)
-                        }
-                    }
-                }
-            }
-        }
+        The new entries are merged with the agent's current knowledge base
+        list (entries with the same ID are not duplicated) and sent as one
+        PATCH, instead of one PATCH per document.
+        
+        Args:
+            agent_id (str): The ID of the agent to update
+            knowledge_bases (list): Dicts with the "id", "name" and optionally "type" of each knowledge base
+            replace (bool): Replace the agent's current knowledge bases instead of adding to them
+            agent_name (str, optional): New name for the agent
+            
+        Returns:
+            Dict[str, Any]: Updated agent configuration from ElevenLabs
+            
+        Raises:
+            ElevenLabsAPIError: If the API call fails
+        """
+        new_entries = [
+            knowledge_base_entry(kb["id"], kb["name"], kb.get("type", "file")) for kb in knowledge_bases
+        ]
         
-        # Add agent name if provided
-        if agent_name:
-            payload["name"] = agent_name
+        def build(current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            existing = [] if replace else current_knowledge_bases(current)
+            known_ids = {entry.get("id") for entry in existing}
+            merged = existing + [entry for entry in new_entries if entry["id"] not in known_ids]
+            return knowledge_base_payload(merged, agent_name)
         
-        # Headers for JSON API call
-        headers = Config.get_headers()
+        return await self.agent_configs.update_from(
+            agent_id, build, self.get_agent, self._patch_agent(agent_id)
+        )
+    
+    def _patch_agent(self, agent_id: str) -> Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]:
+        """Return a coroutine function that PATCHes the given changes to an agent"""
+        url = f"{Config.AGENT_UPDATE_URL}/{agent_id}"
         
-        try:
-            # Make the PATCH request to update the agent
-            response = requests.patch(
+        async def patch(changes: Dict[str, Any]) -> Dict[str, Any]:
+            return await self._request(
+                "PATCH",
                 url,
-                headers=headers,
-                json=payload,  # FastAPI automatically converts dict to JSON
-                timeout=30
+                endpoint="update_agent",
+                error_context="updating agent",
+                idempotent=True,  # The PATCH sets absolute values, so repeating it is safe
+                headers=Config.get_headers(),
+                json=changes
             )
+        
+        return patch
+    
+    async def get_agent(self, agent_id: str) -> Dict[str, Any]:
+        """
+        Get the full configuration of an agent
+        
+        Args:
+            agent_id (str): The ID of the agent
             
-            # Check if the request was successful
-            response.raise_for_status()
-            
-            # Parse and return the response
-            return response.json()
+        Returns:
+            Dict[str, Any]: Agent configuration from ElevenLabs
             
-        except requests.exceptions.RequestException as e:
-            print(f"Error updating agent: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Response status: {e.response.status_code}")
-                print(f"Response text: {e.response.text}")
-            raise
+        Raises:
+            ElevenLabsAPIError: If the API call fails
+        """
+        return await self.single_flight.do(
+            ("get_agent", agent_id),
+            lambda: self._request(
+                "GET",
+                f"{Config.AGENT_UPDATE_URL}/{agent_id}",
+                endpoint="get_agent",
+                error_context="getting agent",
+                headers=Config.get_headers()
+            )
+        )
     
-    def list_conversations(self, agent_id: str = None) -> Dict[str, Any]:
+    async def list_conversations(self, agent_id: str = None, cursor: Optional[str] = None,
+                                 page_size: Optional[int] = None, start_after: Optional[int] = None,
+                                 start_before: Optional[int] = None) -> Dict[str, Any]:
         """
         List conversations for an agent
         
-        This method retrieves conversation history and transcripts.
+        This method retrieves one page of conversation history. Use
+        iter_conversations() to walk the complete history.
         
         Args:
             agent_id (str, optional): Specific agent ID to filter conversations
+            cursor (str, optional): next_cursor from the previous page
+            page_size (int, optional): Number of conversations per page
+            start_after (int, optional): Only conversations started after this Unix time
+            start_before (int, optional): Only conversations started before this Unix time
             
         Returns:
-            Dict[str, Any]: List of conversations with transcripts
+            Dict[str, Any]: Page with "conversations", "next_cursor" and "has_more"
             
         Raises:
-            requests.exceptions.RequestException: If the API call fails
+            ElevenLabsAPIError: If the API call fails
         """
-        # Build URL with optional agent filter
-        url = Config.CONVERSATIONS_URL
+        # Build URL with optional agent filter and paging
         params = {}
         
         if agent_id:
             params['agent_id'] = agent_id
+        if cursor:
+            params['cursor'] = cursor
+        if page_size:
+            params['page_size'] = page_size
+        if start_after is not None:
+            params['call_start_after_unix'] = start_after
+        if start_before is not None:
+            params['call_start_before_unix'] = start_before
         
-        headers = Config.get_headers()
-        
-        try:
-            response = requests.get(
-                url,
-                headers=headers,
-                params=params,
-                timeout=30
+        return await self.single_flight.do(
+            ("list_conversations", agent_id, cursor, page_size, start_after, start_before),
+            lambda: self._request(
+                "GET",
+                Config.CONVERSATIONS_URL,
+                endpoint="list_conversations",
+                error_context="listing conversations",
+                headers=Config.get_headers(),
+                params=params
             )
+        )
+    
+    async def iter_conversations(self, agent_id: str = None, page_size: Optional[int] = None,
+                                 start_after: Optional[int] = None,
+                                 start_before: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over an agent's complete conversation history, newest first
+        
+        Pages are fetched lazily by following next_cursor, so only one page is
+        held in memory at a time and the caller can stop early.
+        
+        Args:
+            agent_id (str, optional): Specific agent ID to filter conversations
+            page_size (int, optional): Conversations per page (defaults to Config.CONVERSATIONS_PAGE_SIZE)
+            start_after (int, optional): Only conversations started after this Unix time
+            start_before (int, optional): Only conversations started before this Unix time
             
-            response.raise_for_status()
-            return response.json()
+        Yields:
+            Dict[str, Any]: One conversation summary at a time
             
-        except requests.exceptions.RequestException as e:
-            print(f"Error listing conversations: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Response status: {e.response.status_code}")
-                print(f"Response text: {e.response.text}")
-            raise
+        Raises:
+            ElevenLabsAPIError: If fetching a page fails
+        """
+        page_size = page_size or Config.CONVERSATIONS_PAGE_SIZE
+        cursor = None
+        while True:
+            page = await self.list_conversations(
+                agent_id=agent_id,
+                cursor=cursor,
+                page_size=page_size,
+                start_after=start_after,
+                start_before=start_before
+            )
+            for conversation in page.get("conversations", []):
+                yield conversation
+            
+            cursor = page.get("next_cursor")
+            if not page.get("has_more") or not cursor:
+                break
     
-    def get_conversation_transcript(self, conversation_id: str) -> Dict[str, Any]:
+    async def get_conversation_transcript(self, conversation_id: str) -> Dict[str, Any]:
         """
         Get detailed transcript for a specific conversation
         
@@ -225,19 +558,125 @@ class ElevenLabsClient:
             Dict[str, Any]: Detailed conversation transcript
             
         Raises:
-            requests.exceptions.RequestException: If the API call fails
+            ElevenLabsAPIError: If the API call fails
         """
-        url = f"{Config.CONVERSATIONS_URL}/{conversation_id}"
-        headers = Config.get_headers()
-        
+        return await self.single_flight.do(
+            ("get_conversation", conversation_id),
+            lambda: self._request(
+                "GET",
+                f"{Config.CONVERSATIONS_URL}/{conversation_id}",
+                endpoint="get_conversation",
+                error_context="getting conversation transcript",
+                headers=Config.get_headers()
+            )
+        )
+
+
+class ElevenLabsClient:
+    """
+    Synchronous wrapper around AsyncElevenLabsClient for scripts
+    
+    Each call runs the async client on a private event loop owned by this
+    wrapper, so the connection pool is still reused between calls. Do not
+    use it from inside a running event loop (e.g. a FastAPI route); await
+    AsyncElevenLabsClient there instead.
+    """
+    
+    def __init__(self):
+        """Initialize the wrapper and its underlying async client"""
+        self._async_client = AsyncElevenLabsClient()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.base_url = self._async_client.base_url
+        self.api_key = self._async_client.api_key
+    
+    def _run(self, coroutine):
+        """Run a coroutine to completion on the wrapper's private event loop"""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coroutine)
+    
+    def close(self):
+        """Close the pooled HTTP session and the private event loop"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.run_until_complete(self._async_client.aclose())
+            self._loop.close()
+        self._loop = None
+    
+    def upload_story_to_knowledge_base(self, file_content: bytes, file_name: str, 
+                                       story_name: str, user_id: str) -> Dict[str, Any]:
+        """Blocking version of AsyncElevenLabsClient.upload_story_to_knowledge_base"""
+        return self._run(self._async_client.upload_story_to_knowledge_base(
+            file_content=file_content,
+            file_name=file_name,
+            story_name=story_name,
+            user_id=user_id
+        ))
+    
+    def upload_text_to_knowledge_base(self, text: str, story_name: str, user_id: str) -> Dict[str, Any]:
+        """Blocking version of AsyncElevenLabsClient.upload_text_to_knowledge_base"""
+        return self._run(self._async_client.upload_text_to_knowledge_base(
+            text=text,
+            story_name=story_name,
+            user_id=user_id
+        ))
+    
+    def update_agent_knowledge_base(self, agent_id: str, knowledge_base_id: str, 
+                                    knowledge_base_name: str, agent_name: str = None,
+                                    document_type: str = "file") -> Dict[str, Any]:
+        """Blocking version of AsyncElevenLabsClient.update_agent_knowledge_base"""
+        return self._run(self._async_client.update_agent_knowledge_base(
+            agent_id=agent_id,
+            knowledge_base_id=knowledge_base_id,
+            knowledge_base_name=knowledge_base_name,
+            agent_name=agent_name,
+            document_type=document_type
+        ))
+    
+    def attach_knowledge_bases(self, agent_id: str, knowledge_bases: List[Dict[str, str]],
+                               replace: bool = False, agent_name: str = None) -> Dict[str, Any]:
+        """Blocking version of AsyncElevenLabsClient.attach_knowledge_bases"""
+        return self._run(self._async_client.attach_knowledge_bases(
+            agent_id=agent_id,
+            knowledge_bases=knowledge_bases,
+            replace=replace,
+            agent_name=agent_name
+        ))
+    
+    def get_agent(self, agent_id: str) -> Dict[str, Any]:
+        """Blocking version of AsyncElevenLabsClient.get_agent"""
+        return self._run(self._async_client.get_agent(agent_id))
+    
+    def list_conversations(self, agent_id: str = None, cursor: Optional[str] = None,
+                           page_size: Optional[int] = None, start_after: Optional[int] = None,
+                           start_before: Optional[int] = None) -> Dict[str, Any]:
+        """Blocking version of AsyncElevenLabsClient.list_conversations"""
+        return self._run(self._async_client.list_conversations(
+            agent_id=agent_id,
+            cursor=cursor,
+            page_size=page_size,
+            start_after=start_after,
+            start_before=start_before
+        ))
+    
+    def iter_conversations(self, agent_id: str = None, page_size: Optional[int] = None,
+                           start_after: Optional[int] = None,
+                           start_before: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Blocking version of AsyncElevenLabsClient.iter_conversations"""
+        conversations = self._async_client.iter_conversations(
+            agent_id=agent_id,
+            page_size=page_size,
+            start_after=start_after,
+            start_before=start_before
+        )
         try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Error getting conversation transcript: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Response status: {e.response.status_code}")
-                print(f"Response text: {e.response.text}")
-            raise 
\ No newline at end of file
+            while True:
+                try:
+                    yield self._run(conversations.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run(conversations.aclose())
+    
+    def get_conversation_transcript(self, conversation_id: str) -> Dict[str, Any]:
+        """Blocking version of AsyncElevenLabsClient.get_conversation_transcript"""
+        return self._run(self._async_client.get_conversation_transcript(conversation_id))
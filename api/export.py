@@ -0,0 +1,190 @@
+"""
+Bulk Transcript Export
+
+This module exports every transcript of an agent for offline analysis.
+Transcripts are fetched concurrently (up to a configurable cap) and written
+out as soon as each one finishes, either as NDJSON lines or as entries of a
+streamed zip archive. Only `concurrency` transcripts are held in memory at a
+time, however long the history is.
+"""
+
+import asyncio
+import json
+import zipfile
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+
+async def fetch_transcripts(conversations: AsyncIterator[Dict[str, Any]],
+                            fetch: Callable[[str], Awaitable[Dict[str, Any]]],
+                            concurrency: int
+                            ) -> AsyncIterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Fetch transcripts for a stream of conversations with bounded concurrency
+
+    Results are yielded in completion order, not listing order. If listing
+    conversations fails partway through, the transcripts already being fetched
+    are still yielded, followed by one last result with no conversation and
+    the listing error.
+
+    Args:
+        conversations (AsyncIterator): Conversation summaries to export
+        fetch (Callable): Coroutine function returning the transcript for a conversation ID
+        concurrency (int): Maximum transcripts fetched at the same time
+
+    Yields:
+        Tuple: (conversation summary or None, transcript or None, error or None)
+    """
+    pending: Dict[asyncio.Task, Dict[str, Any]] = {}
+    exhausted = False
+    listing_error: Optional[Exception] = None
+    try:
+        while True:
+            # Top up the in-flight set before waiting for the next result
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    conversation = await conversations.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                except Exception as e:
+                    print(f"⚠️ Listing conversations for export failed: {e}")
+                    exhausted = True
+                    listing_error = e
+                    break
+                task = asyncio.create_task(fetch(conversation["conversation_id"]))
+                pending[task] = conversation
+
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                conversation = pending.pop(task)
+                error = task.exception()
+                if error is None:
+                    yield conversation, task.result(), None
+                else:
+                    yield conversation, None, error
+
+        if listing_error is not None:
+            yield None, None, listing_error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def ndjson_record(conversation: Optional[Dict[str, Any]], transcript: Optional[Dict[str, Any]],
+                  error: Optional[Exception]) -> str:
+    """Format one export result as an NDJSON line"""
+    if conversation is None:
+        return json.dumps({"error": _listing_error_message(error)}) + "\n"
+    record = {"conversation_id": conversation["conversation_id"], "metadata": conversation}
+    if error is None:
+        record["transcript"] = transcript
+    else:
+        record["error"] = str(error)
+    return json.dumps(record) + "\n"
+
+
+def _listing_error_message(error: Exception) -> str:
+    return f"Listing conversations failed: {error}"
+
+
+class _ZipChunkBuffer:
+    """
+    Write-only, non-seekable file object that collects zip output
+
+    zipfile detects that it can't seek and writes data descriptors after
+    each entry, which lets us hand out the archive bytes as they are produced.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        """Return and forget everything written so far"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def zip_stream(results: AsyncIterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[Exception]]]
+                     ) -> AsyncIterator[bytes]:
+    """
+    Turn export results into a streamed zip archive
+
+    Each transcript becomes `transcripts/<conversation_id>.json`. Failed
+    fetches, and a failure to list conversations, are listed in a final
+    `errors.json` entry.
+
+    Args:
+        results (AsyncIterator): Output of fetch_transcripts()
+
+    Yields:
+        bytes: The next part of the archive
+    """
+    buffer = _ZipChunkBuffer()
+    errors = []
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        async for conversation, transcript, error in results:
+            if conversation is None:
+                errors.append({"conversation_id": None, "error": _listing_error_message(error)})
+                continue
+            if error is not None:
+                errors.append({"conversation_id": conversation["conversation_id"], "error": str(error)})
+                continue
+            archive.writestr(
+                f"transcripts/{conversation['conversation_id']}.json",
+                json.dumps({"metadata": conversation, "transcript": transcript})
+            )
+            yield buffer.drain()
+
+        if errors:
+            archive.writestr("errors.json", json.dumps(errors))
+    # Closing the archive writes the central directory
+    yield buffer.drain()
+
+
+class ExportMetrics:
+    """Counters for bulk exports"""
+
+    def __init__(self):
+        self.exports_started = 0
+        self.exports_in_progress = 0
+        self.transcripts_exported = 0
+        self.transcript_errors = 0
+        self.listing_errors = 0
+
+    async def track(self, results: AsyncIterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[Exception]]]
+                    ) -> AsyncIterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[Exception]]]:
+        """Pass export results through while counting them"""
+        self.exports_started += 1
+        self.exports_in_progress += 1
+        try:
+            async for conversation, transcript, error in results:
+                if conversation is None:
+                    self.listing_errors += 1
+                elif error is None:
+                    self.transcripts_exported += 1
+                else:
+                    self.transcript_errors += 1
+                yield conversation, transcript, error
+        finally:
+            self.exports_in_progress -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return export counters for monitoring"""
+        return {
+            "exports_started": self.exports_started,
+            "exports_in_progress": self.exports_in_progress,
+            "transcripts_exported": self.transcripts_exported,
+            "transcript_errors": self.transcript_errors,
+            "listing_errors": self.listing_errors
+        }
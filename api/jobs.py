@@ -0,0 +1,405 @@
+"""
+Background Job Queue
+
+Uploading a story to ElevenLabs can take up to a minute. Holding the HTTP
+request open that long makes proxies time out and users retry, doubling
+the load. This module lets a route hand the work to a bounded pool of
+background workers instead and answer 202 Accepted with a job ID right
+away. The caller then polls the job or follows it as Server-Sent Events.
+
+Jobs are kept in a small SQLite table, so jobs that were queued or running
+when the process stopped are picked up again on the next start.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATUSES = {SUCCEEDED, FAILED}
+
+# A handler gets the job and a report(stage) function, and returns the job's result
+JobHandler = Callable[[Dict[str, Any], Callable[[str], None]], Awaitable[Dict[str, Any]]]
+# Called once a job of the kind has succeeded or failed, e.g. to delete its files
+JobCleanup = Callable[[Dict[str, Any]], None]
+
+
+class JobQueue:
+    """
+    Persistent job table with a bounded pool of async workers
+
+    This class handles:
+    - Storing jobs and their status, stage, result and error in SQLite
+    - Running jobs on a fixed number of workers, by kind of job
+    - Re-queueing jobs interrupted by a restart (up to max_attempts runs)
+    - Notifying subscribers (e.g. SSE streams) of every change
+    - Deleting finished jobs after the retention period, at startup and
+      every cleanup_interval seconds
+    """
+
+    def __init__(self, db_path: str, workers: int, max_attempts: int, retention: float,
+                 cleanup_interval: float = 3600):
+        """
+        Args:
+            db_path (str): Path of the SQLite job table
+            workers (int): Jobs that may run at the same time
+            max_attempts (int): Runs before an interrupted job is marked failed
+            retention (float): Seconds finished jobs are kept
+            cleanup_interval (float): Seconds between deletions of expired jobs
+        """
+        self.db_path = db_path
+        self.worker_count = workers
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.cleanup_interval = cleanup_interval
+        self.handlers: Dict[str, JobHandler] = {}
+        self.cleanups: Dict[str, JobCleanup] = {}
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._active: Set[str] = set()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                stage TEXT,
+                params TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+        self._db.commit()
+
+        # Metrics
+        self.submitted = 0
+        self.started = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.recovered = 0
+        self.expired = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+
+    def register(self, kind: str, handler: JobHandler, cleanup: Optional[JobCleanup] = None):
+        """
+        Register the coroutine function that runs jobs of a kind
+
+        Args:
+            kind (str): Job kind, e.g. "upload_story"
+            handler (JobHandler): Called with (job, report) and returning the result
+            cleanup (JobCleanup, optional): Called once a job has succeeded or failed
+        """
+        self.handlers[kind] = handler
+        if cleanup is not None:
+            self.cleanups[kind] = cleanup
+
+    def start(self):
+        """
+        Start the workers, re-queue jobs left over from the previous run and
+        start deleting expired jobs periodically
+
+        Must be called from a running event loop.
+        """
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._recover()), asyncio.create_task(self._expire_periodically())] + [
+            asyncio.create_task(self._worker()) for _ in range(self.worker_count)
+        ]
+
+    async def stop(self):
+        """Cancel the workers; running jobs are picked up again on the next start"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _recover(self):
+        """Delete expired jobs and queue the ones that never finished"""
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._delete_expired)
+            job_ids = await loop.run_in_executor(None, self._unfinished_ids)
+        except Exception as e:
+            print(f"⚠️ Could not recover jobs: {e}")
+            return
+        if job_ids:
+            print(f"🔁 Resuming {len(job_ids)} unfinished job(s)")
+        for job_id in job_ids:
+            self.recovered += 1
+            self._queue.put_nowait(job_id)
+
+    async def _expire_periodically(self):
+        """Delete expired jobs every cleanup_interval, so retention holds without restarts"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                await loop.run_in_executor(None, self._delete_expired)
+            except Exception as e:
+                print(f"⚠️ Could not delete expired jobs: {e}")
+
+    def close(self):
+        """Close the job table"""
+        with self._lock:
+            self._db.close()
+
+    async def submit(self, kind: str, params: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Add a job and queue it for the workers
+
+        Args:
+            kind (str): Job kind (must have a registered handler)
+            params (dict): JSON-serializable parameters for the handler
+            job_id (str, optional): ID to use, e.g. if files were already stored under it
+
+        Returns:
+            Dict[str, Any]: The new job
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind {kind}")
+        job = {
+            "id": job_id or new_job_id(),
+            "kind": kind,
+            "status": QUEUED,
+            "stage": QUEUED,
+            "params": params,
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None
+        }
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._insert, job)
+        self.submitted += 1
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job by ID, or None if it doesn't exist (or has expired)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._read, job_id)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """
+        Return a queue that receives the job every time it changes
+
+        Call unsubscribe() with the same queue when done.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        """Stop sending job changes to a queue from subscribe()"""
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    async def _worker(self):
+        """Run queued jobs one at a time"""
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"⚠️ Job worker error for {job_id}: {e}")
+
+    async def _run(self, job_id: str):
+        """Run one job unless another worker already has it"""
+        # A job submitted while _recover() runs can be queued twice
+        if job_id in self._active:
+            return
+        self._active.add(job_id)
+        try:
+            job = await self.get(job_id)
+            if job is None or job["status"] in FINISHED_STATUSES:
+                return
+            await self._run_job(job)
+        finally:
+            self._active.discard(job_id)
+
+    async def _run_job(self, job: Dict[str, Any]):
+        """Run one job and record its outcome"""
+        loop = asyncio.get_running_loop()
+        job_id = job["id"]
+        if job["attempts"] >= self.max_attempts:
+            await self._finish(job, FAILED, error=f"Interrupted {job['attempts']} times, giving up")
+            return
+
+        started = time.time()
+        self.started += 1
+        self.total_wait += started - job["created_at"]
+        await self._update(job, status=RUNNING, stage=RUNNING, started_at=started,
+                           attempts=job["attempts"] + 1)
+
+        def report(stage: str):
+            # Stage changes are cheap progress hints; persist them without waiting
+            job["stage"] = stage
+            loop.run_in_executor(None, self._write, job)
+            self._notify(job)
+
+        handler = self.handlers[job["kind"]]
+        try:
+            result = await handler(job, report)
+        except asyncio.CancelledError:
+            raise  # Shutting down: the job stays "running" and is re-queued on the next start
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            print(f"❌ Job {job_id} failed: {detail}")
+            await self._finish(job, FAILED, error=str(detail))
+        else:
+            await self._finish(job, SUCCEEDED, result=result)
+        self.total_run += time.time() - started
+
+    async def _finish(self, job: Dict[str, Any], status: str, **changes):
+        """Record a job's final status and run its kind's cleanup"""
+        await self._update(job, status=status, stage=status, finished_at=time.time(), **changes)
+        if status == SUCCEEDED:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        cleanup = self.cleanups.get(job["kind"])
+        if cleanup is not None:
+            try:
+                cleanup(job)
+            except Exception as e:
+                print(f"⚠️ Cleanup of job {job['id']} failed: {e}")
+
+    async def _update(self, job: Dict[str, Any], **changes):
+        """Apply changes to a job, persist it and notify subscribers"""
+        job.update(changes)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write, job)
+        self._notify(job)
+
+    def _notify(self, job: Dict[str, Any]):
+        """Send a snapshot of the job to its subscribers"""
+        for queue in self._subscribers.get(job["id"], ()):
+            queue.put_nowait(dict(job))
+
+    def _insert(self, job: Dict[str, Any]):
+        """Insert a new job row (runs in a worker thread)"""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, status, stage, params, attempts, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job["id"], job["kind"], job["status"], job["stage"], json.dumps(job["params"]),
+                 job["attempts"], job["created_at"])
+            )
+            self._db.commit()
+
+    def _write(self, job: Dict[str, Any]):
+        """Persist a job's mutable fields (runs in a worker thread)"""
+        with self._lock:
+            self._db.execute(
+                """
+                UPDATE jobs SET status = ?, stage = ?, result = ?, error = ?, attempts = ?,
+                                started_at = ?, finished_at = ?
+                WHERE id = ?
+                """,
+                (job["status"], job["stage"],
+                 json.dumps(job["result"]) if job["result"] is not None else None,
+                 job["error"], job["attempts"], job["started_at"], job["finished_at"], job["id"])
+            )
+            self._db.commit()
+
+    def _read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Read a job row (runs in a worker thread)"""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def _unfinished_ids(self) -> List[str]:
+        """Return queued and interrupted jobs, oldest first (runs in a worker thread)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _delete_expired(self):
+        """Delete finished jobs older than the retention period (runs in a worker thread)"""
+        with self._lock:
+            deleted = self._db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (SUCCEEDED, FAILED, time.time() - self.retention)
+            ).rowcount
+            self._db.commit()
+        self.expired += deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return queue counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Queue depth, outcomes and average wait/run times
+        """
+        finished = self.succeeded + self.failed
+        return {
+            "workers": self.worker_count,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "recovered_after_restart": self.recovered,
+            "expired_deleted": self.expired,
+            "avg_wait_seconds": round(self.total_wait / self.started, 3) if self.started else 0.0,
+            "avg_run_seconds": round(self.total_run / finished, 3) if finished else 0.0,
+            "sse_subscribers": sum(len(queues) for queues in self._subscribers.values())
+        }
+
+
+def new_job_id() -> str:
+    """Return a new random job ID"""
+    return uuid.uuid4().hex
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the fields of a job that are shown to API callers"""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "result": job["result"],
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"]
+    }
@@ -0,0 +1,208 @@
+"""
+Outbound Queues for Browser WebSockets
+
+The ElevenLabs listener used to await every send to the browser itself, so one
+browser on a bad connection stalled its session's listener, and with it the
+pong replies ElevenLabs needs to keep the conversation open. Now each browser
+socket gets a bounded OutboundQueue and a writer task of its own; the listener
+only enqueues, which never waits.
+
+When a queue is full, the overflow policies (WS_OUTBOUND_OVERFLOW, tried in
+order until there is room) decide what gives:
+
+- "drop_audio": drop the oldest queued audio; late audio is useless anyway
+- "coalesce": merge a transcript or agent response into the last queued
+  message if it has the same type, instead of taking another slot
+- "disconnect": close the browser socket; the client is too slow to keep up
+
+If no policy makes room, the new message is dropped.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional, Union
+
+DROP_AUDIO = "drop_audio"
+COALESCE = "coalesce"
+DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (DROP_AUDIO, COALESCE, DISCONNECT)
+
+# Messages whose "text" can be merged under the coalesce policy
+COALESCIBLE_TYPES = ("transcript", "agent_response")
+
+
+class OutboundMessage:
+    """
+    A message waiting for the browser
+
+    Control messages are kept as dicts until they are sent, so they can still
+    be coalesced; audio is queued already encoded.
+    """
+    __slots__ = ("kind", "message", "data", "audio_bytes")
+
+    def __init__(self, kind: str, message: Optional[Dict[str, Any]] = None,
+                 data: Union[str, bytes, None] = None, audio_bytes: int = 0):
+        self.kind = kind
+        self.message = message
+        self.data = data
+        self.audio_bytes = audio_bytes
+
+
+class OutboundQueue:
+    """
+    Bounded queue of messages for one browser socket, drained by a writer task
+
+    Attributes:
+        high_water (int): Most messages that were ever queued at once
+        dropped_audio (int): Audio messages dropped to make room
+        purged_audio (int): Audio messages dropped by drop_audio()
+        coalesced (int): Messages merged into a queued one
+        dropped (int): Messages dropped because no policy made room
+        overflowed (bool): Whether the disconnect policy was applied
+    """
+
+    def __init__(self, send: Callable[[OutboundMessage], Awaitable[None]], maxsize: int,
+                 policies: Iterable[str] = OVERFLOW_POLICIES,
+                 on_disconnect: Optional[Callable[[], Awaitable[None]]] = None):
+        """
+        Args:
+            send (Callable): Coroutine function writing one message to the socket
+            maxsize (int): Messages that may be queued
+            policies (Iterable[str]): Overflow policies, in the order they are tried
+            on_disconnect (Callable, optional): Coroutine function closing the socket,
+                called once if the disconnect policy is applied
+
+        Raises:
+            ValueError: If a policy is unknown
+        """
+        self.policies = tuple(policies)
+        unknown = [policy for policy in self.policies if policy not in OVERFLOW_POLICIES]
+        if unknown:
+            raise ValueError(f"Unknown outbound overflow policy: {', '.join(unknown)}")
+        self.send = send
+        self.maxsize = maxsize
+        self.on_disconnect = on_disconnect
+        self._items: Deque[OutboundMessage] = deque()
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self.high_water = 0
+        self.dropped_audio = 0
+        self.purged_audio = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.overflowed = False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def start(self):
+        """Start the writer task"""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write())
+
+    def close(self):
+        """Stop the writer task; queued messages are discarded"""
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        self._items.clear()
+
+    def put(self, item: OutboundMessage) -> bool:
+        """
+        Queue a message without waiting
+
+        Args:
+            item (OutboundMessage): The message
+
+        Returns:
+            bool: False if the message was dropped (or the queue overflowed)
+        """
+        if self.overflowed:
+            return False
+        if len(self._items) >= self.maxsize:
+            for policy in self.policies:
+                if policy == DROP_AUDIO and self._drop_oldest_audio():
+                    break
+                if policy == COALESCE and self._coalesce(item):
+                    return True
+                if policy == DISCONNECT:
+                    self._overflow()
+                    return False
+            else:
+                self.dropped += 1
+                return False
+        self._items.append(item)
+        self.high_water = max(self.high_water, len(self._items))
+        self._ready.set()
+        return True
+
+    def drop_audio(self) -> int:
+        """
+        Drop all queued audio, keeping the other messages in order
+
+        Returns:
+            int: Audio messages dropped
+        """
+        kept = deque(item for item in self._items if item.kind != "audio")
+        dropped = len(self._items) - len(kept)
+        self._items = kept
+        self.purged_audio += dropped
+        return dropped
+
+    def _drop_oldest_audio(self) -> bool:
+        for index, queued in enumerate(self._items):
+            if queued.kind == "audio":
+                del self._items[index]
+                self.dropped_audio += 1
+                return True
+        return False
+
+    def _coalesce(self, item: OutboundMessage) -> bool:
+        """
+        Merge a text message into the last queued message if it has the same type
+
+        Only the tail is merged into, so the message never moves ahead of
+        anything queued after an earlier message of its type.
+        """
+        if item.message is None or item.message.get("type") not in COALESCIBLE_TYPES:
+            return False
+        queued = self._items[-1] if self._items else None
+        if queued is None or queued.message is None or queued.message.get("type") != item.message["type"]:
+            return False
+        merged_text = f"{queued.message.get('text', '')} {item.message.get('text', '')}"
+        queued.message = {**queued.message, "text": merged_text}
+        self.coalesced += 1
+        return True
+
+    def _overflow(self):
+        self.overflowed = True
+        self._items.clear()
+        if self.on_disconnect is not None:
+            task = asyncio.create_task(self.on_disconnect())
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _write(self):
+        while True:
+            while not self._items:
+                self._ready.clear()
+                await self._ready.wait()
+            item = self._items.popleft()
+            try:
+                await self.send(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error sending to frontend: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return this queue's depth, high-water mark and overflow counters"""
+        return {
+            "depth": len(self._items),
+            "high_water": self.high_water,
+            "max_size": self.maxsize,
+            "dropped_audio": self.dropped_audio,
+            "purged_audio": self.purged_audio,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "disconnected": self.overflowed
+        }
@@ -0,0 +1,186 @@
+"""
+PDF Text Extraction
+
+Story PDFs are often image-heavy and several MB, while the agent only
+needs their text. This module extracts the text of a PDF with PyPDF2 so
+the much smaller text document can be uploaded instead.
+
+Parsing a PDF is CPU-bound, so it runs in a process pool and never blocks
+the event loop (or the other requests waiting on it). Extracted text is
+kept per page in SQLite, keyed by the SHA-256 of the PDF, so the same file
+is only ever parsed once.
+"""
+
+import asyncio
+import io
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from PyPDF2 import PdfReader
+
+
+def extract_pages(pdf_bytes: bytes) -> List[str]:
+    """
+    Extract the text of every page of a PDF (runs in a worker process)
+
+    Args:
+        pdf_bytes (bytes): Content of the PDF file
+
+    Returns:
+        List[str]: Text per page, in page order ("" for pages without text)
+    """
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    return [(page.extract_text() or "").strip() for page in reader.pages]
+
+
+class PdfTextExtractor:
+    """
+    Process-pool PDF text extraction with a per-page text cache
+
+    This class handles:
+    - Running PyPDF2 in worker processes
+    - Storing and reading extracted pages by content hash
+    - Extraction time and size counters for monitoring
+    """
+
+    def __init__(self, db_path: str, max_workers: int):
+        """
+        Args:
+            db_path (str): Path of the SQLite database holding extracted pages
+            max_workers (int): Worker processes used for parsing
+        """
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pdf_pages (
+                content_hash TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (content_hash, page_number)
+            )
+            """
+        )
+        self._db.commit()
+
+        # Metrics
+        self.extractions = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.pages_extracted = 0
+        self.extract_seconds = 0.0
+        self.pdf_bytes = 0
+        self.text_bytes = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Return the worker pool, starting it on first use"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    async def extract(self, content_hash: str, pdf_bytes: bytes) -> Tuple[List[str], float, bool]:
+        """
+        Return the text of a PDF, per page
+
+        Args:
+            content_hash (str): SHA-256 of the PDF content
+            pdf_bytes (bytes): Content of the PDF file
+
+        Returns:
+            Tuple[List[str], float, bool]: Page texts, seconds spent extracting
+                (0 on a cache hit) and whether the text came from the cache
+
+        Raises:
+            Exception: If PyPDF2 can't parse the file
+        """
+        loop = asyncio.get_running_loop()
+        pages = await self.cached_pages(content_hash)
+        if pages:
+            self.cache_hits += 1
+            return pages, 0.0, True
+
+        started = time.perf_counter()
+        try:
+            pages = await loop.run_in_executor(self._get_pool(), extract_pages, pdf_bytes)
+        except Exception:
+            self.errors += 1
+            raise
+        elapsed = time.perf_counter() - started
+
+        self.extractions += 1
+        self.pages_extracted += len(pages)
+        self.extract_seconds += elapsed
+        self.pdf_bytes += len(pdf_bytes)
+        self.text_bytes += sum(len(page.encode("utf-8")) for page in pages)
+        await loop.run_in_executor(None, self._write_pages, content_hash, pages)
+        return pages, elapsed, False
+
+    async def cached_pages(self, content_hash: str) -> List[str]:
+        """
+        Return the cached pages of a PDF without parsing it
+
+        Args:
+            content_hash (str): SHA-256 of the PDF content
+
+        Returns:
+            List[str]: Page texts, or an empty list if the PDF was never extracted
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._read_pages, content_hash)
+
+    def _read_pages(self, content_hash: str) -> List[str]:
+        """Read the cached pages of a PDF (runs in a worker thread)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT text FROM pdf_pages WHERE content_hash = ? ORDER BY page_number",
+                (content_hash,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _write_pages(self, content_hash: str, pages: List[str]):
+        """Store the extracted pages of a PDF (runs in a worker thread)"""
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO pdf_pages VALUES (?, ?, ?)",
+                [(content_hash, number, text) for number, text in enumerate(pages)]
+            )
+            self._db.commit()
+
+    def close(self):
+        """Shut down the worker processes and close the database"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return extraction counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Extractions, cache hits, time spent and size reduction
+        """
+        return {
+            "extractions": self.extractions,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "pages_extracted": self.pages_extracted,
+            "total_extract_seconds": round(self.extract_seconds, 3),
+            "avg_extract_seconds": round(self.extract_seconds / self.extractions, 3) if self.extractions else 0.0,
+            "pdf_bytes": self.pdf_bytes,
+            "text_bytes": self.text_bytes,
+            "size_reduction": round(1 - self.text_bytes / self.pdf_bytes, 3) if self.pdf_bytes else 0.0
+        }
@@ -0,0 +1,281 @@
+"""
+Upstream Resilience
+
+This module wraps every ElevenLabs REST call with:
+- Jittered exponential backoff retries for idempotent calls
+- Retry-After handling when ElevenLabs answers 429 Too Many Requests
+- A circuit breaker per endpoint that fails fast while ElevenLabs is unhealthy
+- Counters for retries, breaker trips and recoveries
+
+Without this layer a transient 5xx turns straight into an HTTP 500 for the
+browser, which then retries blindly and adds even more load upstream.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling ElevenLabs while an endpoint's circuit is open
+
+    Attributes:
+        endpoint (str): Name of the endpoint whose circuit is open
+        retry_after (float): Seconds until the circuit lets a probe call through
+    """
+
+    def __init__(self, endpoint: str, retry_after: float):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(f"ElevenLabs endpoint '{endpoint}' is unavailable, retry in {retry_after:.0f}s")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for a single upstream endpoint
+
+    States:
+    - closed: calls go through, consecutive failures are counted
+    - open: calls are rejected until recovery_timeout has passed
+    - half_open: one probe call is let through; success closes the
+      circuit, failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        """
+        Args:
+            name (str): Endpoint name, used in errors and metrics
+            failure_threshold (int): Consecutive failures that open the circuit
+            recovery_timeout (float): Seconds to stay open before probing
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+        # Metrics
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.trips = 0
+        self.recoveries = 0
+
+    def before_call(self):
+        """
+        Check whether a call may go through
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a probe already running
+        """
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.recovery_timeout - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, remaining)
+            self.state = self.HALF_OPEN
+
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.recovery_timeout)
+            self._probe_in_flight = True
+
+        self.calls += 1
+
+    def record_success(self):
+        """Record a call that reached a healthy upstream"""
+        self.consecutive_failures = 0
+        if self.state == self.HALF_OPEN:
+            self.state = self.CLOSED
+            self.recoveries += 1
+            print(f"✅ Circuit for '{self.name}' closed, ElevenLabs recovered")
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """Record a call that failed because the upstream is unhealthy"""
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+                print(f"⚠️ Circuit for '{self.name}' opened after {self.consecutive_failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def release(self):
+        """Release a half-open probe slot without recording an outcome (e.g. on cancellation)"""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the breaker state and counters"""
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+            "trips": self.trips,
+            "recoveries": self.recoveries
+        }
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """Return the HTTP status carried by an upstream error, if any"""
+    return getattr(error, "status_code", None)
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """
+    Decide whether an error means the upstream is unhealthy
+
+    Timeouts, connection errors and 5xx responses count against the circuit.
+    4xx responses (including 429) mean ElevenLabs is up and answering.
+    """
+    if isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError)):
+        return True
+    status_code = get_status_code(error)
+    return status_code is not None and status_code >= 500
+
+
+class ResilienceLayer:
+    """
+    Retry and circuit breaker policy shared by all ElevenLabs REST calls
+
+    This class handles:
+    - One circuit breaker per endpoint name
+    - Retry decisions and backoff delays
+    - Per-endpoint retry counters
+    """
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float,
+                 max_retry_after: float, failure_threshold: int, recovery_timeout: float):
+        """
+        Args:
+            max_attempts (int): Total attempts per call, including the first
+            base_delay (float): Backoff delay before the first retry, in seconds
+            max_delay (float): Upper bound for a single backoff delay
+            max_retry_after (float): Longest Retry-After we are willing to wait for
+            failure_threshold (int): Consecutive failures that open a circuit
+            recovery_timeout (float): Seconds a circuit stays open before probing
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.retries: Dict[str, int] = {}
+
+    def breaker_for(self, endpoint: str) -> CircuitBreaker:
+        """Return the circuit breaker for an endpoint, creating it on first use"""
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(endpoint, self.failure_threshold, self.recovery_timeout)
+            self.breakers[endpoint] = breaker
+        return breaker
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        Exponential backoff with full jitter
+
+        Args:
+            attempt (int): Number of the attempt that just failed (1-based)
+
+        Returns:
+            float: Seconds to wait before the next attempt
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def retry_delay(self, error: Exception, attempt: int, idempotent: bool) -> Optional[float]:
+        """
+        Decide whether to retry a failed call and how long to wait
+
+        Args:
+            error (Exception): The error raised by the attempt
+            attempt (int): Number of the attempt that just failed (1-based)
+            idempotent (bool): Whether the call is safe to repeat
+
+        Returns:
+            Optional[float]: Seconds to wait, or None to give up
+        """
+        if not idempotent or attempt >= self.max_attempts:
+            return None
+
+        if get_status_code(error) == 429:
+            retry_after = getattr(error, "retry_after", None)
+            if retry_after is None:
+                return self.backoff_delay(attempt)
+            if retry_after > self.max_retry_after:
+                # Waiting that long would hold the caller's request open; let it decide
+                return None
+            return retry_after + random.uniform(0, self.base_delay)
+
+        if is_upstream_failure(error):
+            return self.backoff_delay(attempt)
+
+        return None
+
+    async def call(self, endpoint: str, operation: Callable[[], Awaitable[Any]], idempotent: bool) -> Any:
+        """
+        Run an upstream call with circuit breaking and retries
+
+        Args:
+            endpoint (str): Endpoint name used for the circuit breaker and metrics
+            operation (Callable): Zero-argument coroutine function making one attempt
+            idempotent (bool): Whether failed attempts may be repeated
+
+        Returns:
+            Any: Whatever the operation returns
+
+        Raises:
+            CircuitOpenError: If the endpoint's circuit is open
+            Exception: The last error from the operation when retries are exhausted
+        """
+        breaker = self.breaker_for(endpoint)
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before_call()
+            try:
+                result = await operation()
+            except Exception as e:
+                if is_upstream_failure(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+                delay = self.retry_delay(e, attempt, idempotent)
+                if delay is None:
+                    raise
+                self.retries[endpoint] = self.retries.get(endpoint, 0) + 1
+                print(f"🔁 Retrying '{endpoint}' in {delay:.2f}s (attempt {attempt + 1}/{self.max_attempts})")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled mid-call: free the probe slot without judging the upstream
+                breaker.release()
+                raise
+
+            breaker.record_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return breaker state and retry counters per endpoint"""
+        return {
+            endpoint: {**breaker.stats(), "retries": self.retries.get(endpoint, 0)}
+            for endpoint, breaker in self.breakers.items()
+        }
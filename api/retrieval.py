@@ -0,0 +1,292 @@
+"""
+Local Story Retrieval
+
+ElevenLabs' own RAG runs upstream, on its schedule. This module keeps a
+small BM25 index of every uploaded story locally, so the WebSocket bridge
+can find the passages that match what the user just said in a couple of
+milliseconds and push them to the agent as a contextual update.
+
+Each story is split into overlapping passages of a few dozen words. The
+inverted index is stored in flat typed arrays (one postings list per term,
+back to back) instead of dicts of lists, which keeps it compact and quick
+to scan. At most max_stories indexes are kept in memory, the least recently
+searched dropped first; a dropped story is rebuilt the next time a session
+needs it.
+"""
+
+import heapq
+import math
+import re
+import sys
+import time
+from array import array
+from collections import Counter, OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Words too common to say anything about which passage is relevant
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from had has have he her his i if in into is it its "
+    "me my no not of on or our she so that the their them then there they this to was we "
+    "were what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search terms, without stopwords and single letters"""
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def split_passages(pages: Iterable[str], passage_words: int, overlap_words: int) -> List[str]:
+    """
+    Split a story into overlapping passages of about passage_words words
+
+    Args:
+        pages (Iterable[str]): Text of the story, page by page
+        passage_words (int): Words per passage
+        overlap_words (int): Words shared by consecutive passages, so a
+            sentence on a boundary is still found whole in one of them
+
+    Returns:
+        List[str]: The passages, in story order
+    """
+    words = " ".join(pages).split()
+    step = max(1, passage_words - overlap_words)
+    passages = []
+    for start in range(0, len(words), step):
+        passages.append(" ".join(words[start:start + passage_words]))
+        if start + passage_words >= len(words):
+            break
+    return passages
+
+
+class BM25Index:
+    """
+    BM25 index over the passages of one story
+
+    Attributes:
+        passages (list): Passage texts, indexed by passage number
+        term_ids (dict): term -> term number
+        offsets (array): Start of each term's postings in the flat arrays (one extra end entry)
+        postings (array): Passage numbers of all postings lists, back to back
+        frequencies (array): Term frequency for each posting
+        idf (array): Inverse document frequency per term
+        norms (array): Precomputed BM25 length normalization per passage
+    """
+
+    def __init__(self, passages: List[str], k1: float = 1.2, b: float = 0.75):
+        """
+        Build the index
+
+        Args:
+            passages (list): Passage texts
+            k1 (float): BM25 term frequency saturation
+            b (float): BM25 length normalization strength
+        """
+        self.passages = passages
+        self.k1 = k1
+        self.term_ids: Dict[str, int] = {}
+
+        # Collect postings per term first, then flatten them into arrays
+        term_postings: List[List[Tuple[int, int]]] = []
+        lengths = []
+        for passage_number, passage in enumerate(passages):
+            counts = Counter(tokenize(passage))
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                term_id = self.term_ids.get(term)
+                if term_id is None:
+                    term_id = self.term_ids[term] = len(term_postings)
+                    term_postings.append([])
+                term_postings[term_id].append((passage_number, count))
+
+        self.offsets = array("I", [0])
+        self.postings = array("I")
+        self.frequencies = array("H")
+        self.idf = array("f")
+        passage_count = len(passages)
+        for postings in term_postings:
+            for passage_number, count in postings:
+                self.postings.append(passage_number)
+                self.frequencies.append(min(count, 65535))
+            self.offsets.append(len(self.postings))
+            document_frequency = len(postings)
+            self.idf.append(math.log(1 + (passage_count - document_frequency + 0.5) / (document_frequency + 0.5)))
+
+        average_length = (sum(lengths) / passage_count) if passage_count else 1.0
+        self.norms = array("f", (k1 * (1 - b + b * length / average_length) for length in lengths))
+
+    def search(self, terms: List[str], top_k: int) -> List[Tuple[float, int]]:
+        """
+        Score passages for a query
+
+        Args:
+            terms (list): Query terms from tokenize()
+            top_k (int): Number of passages to return
+
+        Returns:
+            List[Tuple[float, int]]: (score, passage number), best first
+        """
+        scores: Dict[int, float] = {}
+        k1_plus_1 = self.k1 + 1
+        postings, frequencies, norms = self.postings, self.frequencies, self.norms
+        for term in set(terms):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            idf = self.idf[term_id]
+            for i in range(self.offsets[term_id], self.offsets[term_id + 1]):
+                passage_number = postings[i]
+                frequency = frequencies[i]
+                scores[passage_number] = scores.get(passage_number, 0.0) + (
+                    idf * frequency * k1_plus_1 / (frequency + norms[passage_number])
+                )
+        return heapq.nlargest(top_k, ((score, number) for number, score in scores.items()))
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the index, passage texts included"""
+        arrays = (self.offsets, self.postings, self.frequencies, self.idf, self.norms)
+        return (
+            sum(a.itemsize * len(a) for a in arrays)
+            + sys.getsizeof(self.term_ids) + sum(sys.getsizeof(term) for term in self.term_ids)
+            + sys.getsizeof(self.passages) + sum(sys.getsizeof(p) for p in self.passages)
+        )
+
+
+class StoryRetrievalIndex:
+    """
+    BM25 indexes of uploaded stories, by knowledge base ID
+
+    This class handles:
+    - Building an index from a story's extracted text
+    - Searching the stories attached to an agent
+    - Formatting the best passages as a contextual update
+    - Keeping at most max_stories indexes (LRU by search)
+    - Build time, query latency and memory counters
+    """
+
+    def __init__(self, passage_words: int, overlap_words: int, max_stories: int = 200):
+        """
+        Args:
+            passage_words (int): Words per passage
+            overlap_words (int): Words shared by consecutive passages
+            max_stories (int): Indexes kept in memory; the least recently searched is dropped
+        """
+        self.passage_words = passage_words
+        self.overlap_words = overlap_words
+        self.max_stories = max_stories
+        # Least recently searched first
+        self._indexes: "OrderedDict[str, BM25Index]" = OrderedDict()
+
+        # Metrics
+        self.evictions = 0
+        self.build_seconds = 0.0
+        self.queries = 0
+        self.queries_with_results = 0
+        self._latencies: Deque[float] = deque(maxlen=1000)
+
+    def __contains__(self, knowledge_base_id: str) -> bool:
+        return knowledge_base_id in self._indexes
+
+    def add(self, knowledge_base_id: str, pages: List[str]) -> BM25Index:
+        """
+        Build (or rebuild) the index of a story
+
+        This is CPU work of a few milliseconds per story; callers on the
+        event loop should run it in an executor.
+
+        Args:
+            knowledge_base_id (str): Knowledge base the story was uploaded as
+            pages (list): Extracted text of the story, page by page
+
+        Returns:
+            BM25Index: The new index
+        """
+        started = time.perf_counter()
+        index = BM25Index(split_passages(pages, self.passage_words, self.overlap_words))
+        self.build_seconds += time.perf_counter() - started
+        self._indexes[knowledge_base_id] = index
+        self._indexes.move_to_end(knowledge_base_id)
+        while len(self._indexes) > self.max_stories:
+            self._indexes.popitem(last=False)
+            self.evictions += 1
+        return index
+
+    def search(self, knowledge_base_ids: Iterable[str], text: str, top_k: int) -> List[Tuple[float, str, str]]:
+        """
+        Find the passages that best match some text
+
+        Args:
+            knowledge_base_ids (Iterable[str]): Stories to search
+            text (str): Query text (e.g. what the user just said)
+            top_k (int): Number of passages to return
+
+        Returns:
+            List[Tuple[float, str, str]]: (score, knowledge base ID, passage), best first
+        """
+        started = time.perf_counter()
+        terms = tokenize(text)
+        results = []
+        if terms:
+            for knowledge_base_id in knowledge_base_ids:
+                index = self._indexes.get(knowledge_base_id)
+                if index is None:
+                    continue
+                self._indexes.move_to_end(knowledge_base_id)
+                for score, number in index.search(terms, top_k):
+                    results.append((score, knowledge_base_id, index.passages[number]))
+            results = heapq.nlargest(top_k, results)
+
+        self.queries += 1
+        if results:
+            self.queries_with_results += 1
+        self._latencies.append(time.perf_counter() - started)
+        return results
+
+    def context_for(self, knowledge_base_ids: Iterable[str], text: str, top_k: int) -> Optional[str]:
+        """
+        Return the best matching passages as contextual update text, or None if nothing matches
+
+        Args:
+            knowledge_base_ids (Iterable[str]): Stories to search
+            text (str): What the user just said
+            top_k (int): Maximum passages to include
+        """
+        results = self.search(knowledge_base_ids, text, top_k)
+        if not results:
+            return None
+        passages = "\n\n".join(f"[{i}] {passage}" for i, (_, _, passage) in enumerate(results, 1))
+        return f"Passages from the story related to what the user just said:\n\n{passages}"
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return index counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Index sizes, build time and query latency percentiles
+        """
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(1000 * latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        return {
+            "stories": len(self._indexes),
+            "max_stories": self.max_stories,
+            "evicted_stories": self.evictions,
+            "passages": sum(len(index.passages) for index in self._indexes.values()),
+            "terms": sum(len(index.term_ids) for index in self._indexes.values()),
+            "memory_bytes": sum(index.memory_bytes() for index in self._indexes.values()),
+            "total_build_ms": round(1000 * self.build_seconds, 3),
+            "queries": self.queries,
+            "queries_with_results": self.queries_with_results,
+            "query_ms_p50": percentile(0.5),
+            "query_ms_p95": percentile(0.95),
+            "query_ms_max": round(1000 * latencies[-1], 3) if latencies else 0.0
+        }
@@ -11,33 +11,215 @@ and returns properly formatted responses.
 """
 
 from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends, WebSocket, WebSocketDisconnect, Request
-from fastapi.responses import JSONResponse
-from typing import Optional, Dict, List
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.datastructures import Headers
+from typing import Any, Optional, Dict, List, AsyncIterable, Union
 import aiofiles
 import os
 import json
 import asyncio
+import base64
+import math
 from datetime import datetime
 
-from api.elevenlabs_client import ElevenLabsClient
+from api.elevenlabs_client import AsyncElevenLabsClient, ElevenLabsAPIError, current_knowledge_bases
+from api.resilience import CircuitOpenError
+from api.scheduler import BACKGROUND, priority_scope
 from api.websocket_client import ElevenLabsWebSocketClient
+from api.upload_index import StoryUploadIndex, hash_content, hash_upload_file, shared_knowledge_base_name
+from api.blob_store import BlobStore
+from api.streaming_upload import UploadStreamMetrics
+from api.cache import StaleWhileRevalidateCache
+from api.transcript_store import TranscriptStore
+from api.conversation_index import ConversationIndex
+from api.export import ExportMetrics, fetch_transcripts, ndjson_record, zip_stream
+from api.batch_upload import BatchUploadMetrics, run_concurrently
+from api.pdf_text import PdfTextExtractor
+from api.upload_validation import HEADER_WINDOW, PDF_MAGIC, UploadValidationMetrics
+from api.retrieval import StoryRetrievalIndex
+from api.jobs import FINISHED_STATUSES, JobQueue, new_job_id, public_job
+from api.audio_framing import AudioFramer, AudioFramingMetrics
+from api.outbound_queue import OutboundMessage, OutboundQueue
+from api.send_lanes import SendLaneMetrics
+from api.ws_codec import get_codec
+from api.ws_events import AgentResponseCorrectionEvent, ClientToolCallEvent, EventMetrics, InterruptionEvent
+from api.ws_protocol import (
+    BASE64_SUBPROTOCOL, BINARY_SUBPROTOCOL, FRAME_AUDIO, LEGACY_PROTOCOL, BridgeMetrics, FrameError,
+    base64_size, decode_frame, encode_frame, negotiate
+)
 from config import Config
 
 # Create a router instance
 # This allows us to group related routes together
 router = APIRouter()
 
-# Create an instance of our ElevenLabs client
-elevenlabs_client = ElevenLabsClient()
+# Create a single shared instance of our ElevenLabs client
+# It owns the pooled HTTP connections, so every route reuses the same pool
+elevenlabs_client = AsyncElevenLabsClient()
+
+# Persistent index of uploaded stories by content hash
+# Lets us skip re-uploading a PDF that is already in the knowledge base
+upload_index = StoryUploadIndex(Config.UPLOAD_INDEX_FILE)
+
+# Local copies of uploaded stories by content hash, so they can be re-uploaded,
+# extracted and indexed again without the user sending the file again
+blob_store = BlobStore(Config.BLOB_STORE_FOLDER, max_bytes=Config.BLOB_STORE_MAX_BYTES)
+
+# Counters for the chunked (streaming) upload path
+upload_stream_metrics = UploadStreamMetrics()
+
+# Counters for the streaming PDF validation middleware (see main.py)
+upload_validation_metrics = UploadValidationMetrics()
+
+# PDF text extraction on a process pool, with extracted pages cached by content hash
+pdf_text_extractor = PdfTextExtractor(Config.PDF_TEXT_DB_FILE, max_workers=Config.PDF_EXTRACT_WORKERS)
+
+# Ways a story can be sent to the knowledge base
+UPLOAD_MODES = ("pdf", "text")
+
+# Local BM25 indexes of uploaded stories, by knowledge base ID, used to send
+# matching passages to the agent while the user talks
+story_index = StoryRetrievalIndex(
+    passage_words=Config.STORY_PASSAGE_WORDS,
+    overlap_words=Config.STORY_PASSAGE_OVERLAP,
+    max_stories=Config.STORY_INDEX_MAX_STORIES
+)
+# Running index builds (kept so they aren't garbage collected mid-build)
+story_index_tasks = set()
+
+# Background upload jobs (async_job=true), persisted so they survive a restart
+upload_jobs = JobQueue(
+    Config.UPLOAD_JOB_DB_FILE,
+    workers=Config.UPLOAD_JOB_WORKERS,
+    max_attempts=Config.UPLOAD_JOB_MAX_ATTEMPTS,
+    retention=Config.UPLOAD_JOB_RETENTION,
+    cleanup_interval=Config.UPLOAD_JOB_CLEANUP_INTERVAL
+)
+
+# Conversation lists by agent_id, shared by every open tab that polls them
+conversation_list_cache = StaleWhileRevalidateCache(
+    "conversation list",
+    ttl=Config.CONVERSATION_CACHE_TTL,
+    stale_ttl=Config.CONVERSATION_CACHE_STALE_TTL,
+    max_entries=Config.CONVERSATION_CACHE_MAX_ENTRIES
+)
+
+# Completed transcripts on local disk (SQLite) with an LRU memory tier
+transcript_store = TranscriptStore(
+    Config.TRANSCRIPT_DB_FILE,
+    memory_budget=Config.TRANSCRIPT_MEMORY_BUDGET,
+    disk_budget=Config.TRANSCRIPT_DISK_BUDGET
+)
+
+# Per-agent conversation metadata ordered by start time, for the latest conversation lookup
+# New latest conversations get their transcript prefetched into transcript_store
+conversation_index = ConversationIndex(
+    elevenlabs_client.iter_conversations,
+    refresh_interval=Config.CONVERSATION_INDEX_REFRESH_INTERVAL,
+    session_end_delay=Config.CONVERSATION_INDEX_SESSION_END_DELAY,
+    first_sync_size=Config.CONVERSATIONS_PAGE_SIZE,
+    prefetch=lambda conversation_id: fetch_transcript(conversation_id),
+    max_agents=Config.CONVERSATION_INDEX_MAX_AGENTS,
+    max_conversations=Config.CONVERSATION_INDEX_MAX_CONVERSATIONS,
+    idle_timeout=Config.CONVERSATION_INDEX_IDLE_TIMEOUT
+)
+
+# Counters for bulk transcript exports
+export_metrics = ExportMetrics()
+
+# Counters for multi-document (batch) story uploads
+batch_upload_metrics = BatchUploadMetrics()
+
+# Counters for the browser side of /ws/{agent_id}, by negotiated frame protocol
+bridge_metrics = BridgeMetrics()
+
+# JSON codec for both sides of the WebSocket bridge (orjson when installed)
+ws_codec = get_codec(Config.WS_JSON_CODEC)
+
+# Counters for ElevenLabs WebSocket events and their subscribers, across sessions
+ws_event_metrics = EventMetrics()
+
+# Counters for re-framing browser mic audio before it goes to ElevenLabs
+audio_framing_metrics = AudioFramingMetrics()
+
+# Counters for the control and audio send lanes to ElevenLabs
+ws_send_metrics = SendLaneMetrics()
+
+def start_background_tasks():
+    """
+    Start the API module's background tasks
+    
+    Called from the application's startup handler.
+    """
+    conversation_index.start([Config.AGENT_ID])
+    upload_jobs.register("upload_story", run_upload_job, cleanup=remove_job_file)
+    upload_jobs.start()
+
+async def close_resources():
+    """
+    Release connections and files held by the API module
+    
+    Called from the application's shutdown handler.
+    """
+    await conversation_index.stop()
+    await upload_jobs.stop()
+    await elevenlabs_client.aclose()
+    upload_jobs.close()
+    transcript_store.close()
+    pdf_text_extractor.close()
+
+def upstream_http_exception(error: Exception, message: str) -> HTTPException:
+    """
+    Turn an error from an ElevenLabs call into the HTTPException for the browser
+    
+    Errors that mean "try again later" keep their meaning so clients can back off
+    instead of retrying blindly:
+    - Open circuit breaker -> 503 with Retry-After
+    - ElevenLabs rate limit -> 429 with Retry-After
+    Everything else becomes a 500. HTTPExceptions are passed through unchanged.
+    
+    Args:
+        error (Exception): The error raised while calling ElevenLabs
+        message (str): Human readable prefix for the error detail
+        
+    Returns:
+        HTTPException: Exception ready to be raised from the route
+    """
+    if isinstance(error, HTTPException):
+        return error
+    
+    if isinstance(error, CircuitOpenError):
+        return HTTPException(
+            status_code=503,
+            detail=f"{message}: {str(error)}",
+            headers={"Retry-After": str(math.ceil(error.retry_after))}
+        )
+    
+    if isinstance(error, ElevenLabsAPIError) and error.status_code == 429:
+        retry_after = error.retry_after if error.retry_after is not None else Config.RETRY_BASE_DELAY
+        return HTTPException(
+            status_code=429,
+            detail=f"{message}: ElevenLabs rate limit reached",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+    
+    return HTTPException(status_code=500, detail=f"{message}: {str(error)}")
 
 async def validate_pdf_file(file: UploadFile) -> None:
     """
     Validate uploaded PDF file
     
     This function checks if the uploaded file meets our requirements:
-    - Correct file type (PDF)
     - Within size limits
     - Not empty
+    - Starts with the %PDF magic bytes
+    
+    The declared content type comes from the client and is only logged when
+    it isn't a PDF type; the magic bytes decide whether the file is a PDF.
+    
+    The byte-level checks (size, magic bytes, encryption, truncation) already
+    ran while the upload streamed in (see api.upload_validation.PdfUploadGuard);
+    they are repeated here cheaply in case the route is mounted without it.
     
     Args:
         file (UploadFile): The uploaded file from FastAPI
@@ -45,47 +227,68 @@ async def validate_pdf_file(file: UploadFile) -> None:
     Raises:
         HTTPException: If validation fails
     """
-    # Check file type
+    # Browsers and clients often send a generic type, so a mismatch is not an error
     if file.content_type not in Config.ALLOWED_FILE_TYPES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Only PDF files are allowed. Got: {file.content_type}"
-        )
+        print(f"⚠️ {file.filename} declared content type {file.content_type}, checking its bytes instead")
+    
+    # The client may not send a size, so measure the spooled file
+    file_size = file.size
+    if file_size is None:
+        file.file.seek(0, os.SEEK_END)
+        file_size = file.file.tell()
+        file.file.seek(0)
     
     # Check if file is empty
-    if file.size == 0:
+    if file_size == 0:
         raise HTTPException(status_code=400, detail="File is empty")
     
     # Check file size
-    if file.size > Config.MAX_FILE_SIZE:
+    if file_size > Config.MAX_FILE_SIZE:
         max_size_mb = Config.MAX_FILE_SIZE / (1024 * 1024)
         raise HTTPException(
             status_code=400,
             detail=f"File too large. Maximum size is {max_size_mb}MB"
         )
 
+    # Check the magic bytes instead of trusting the declared content type
+    header = await file.read(HEADER_WINDOW)
+    await file.seek(0)
+    if PDF_MAGIC not in header:
+        raise HTTPException(status_code=400, detail="File is not a PDF (missing %PDF header)")
+
 @router.post("/upload-story")
 async def upload_story(
     file: UploadFile = File(..., description="PDF file containing the story"),
     story_name: str = Form(..., description="Name for the story"),
-    user_id: str = Form(..., description="User identifier")
+    user_id: str = Form(..., description="User identifier"),
+    force_reupload: bool = Form(False, description="Upload even if the same file was uploaded before"),
+    upload_mode: Optional[str] = Form(None, description="'pdf' to upload the file, 'text' to upload its extracted text"),
+    async_job: bool = Form(False, description="Answer 202 with a job ID right away and upload in the background")
 ):
     """
     Upload a PDF story to ElevenLabs knowledge base
     
     This endpoint handles the complete workflow of:
     1. Validating the uploaded PDF file
-    2. Reading the file content
-    3. Uploading to ElevenLabs knowledge base
-    4. Returning the knowledge base ID for future use
+    2. Hashing the file content
+    3. Checking whether the same content was already uploaded
+    4. Uploading to ElevenLabs knowledge base (only for new content)
+    5. Returning the knowledge base ID for future use
+    
+    With async_job, steps 2-5 run on a background worker instead: the
+    response is 202 Accepted with a job ID, and the result is available
+    from /api/jobs/{job_id} (polling) or /api/jobs/{job_id}/events (SSE).
     
     Args:
         file: The PDF file to upload
         story_name: User-provided name for the story
         user_id: Identifier for the user uploading the story
+        force_reupload: Skip the dedup check and always upload
+        upload_mode: "pdf" or "text" (default Config.UPLOAD_MODE)
+        async_job: Queue the upload as a background job
         
     Returns:
-        JSON response with knowledge base information
+        JSON response with knowledge base information, or the job ID (202)
         
     Example:
         curl -X POST "http://localhost:8000/api/upload-story" \
@@ -96,54 +299,756 @@ async def upload_story(
     try:
         # Validate the uploaded file
         await validate_pdf_file(file)
+        upload_mode = resolve_upload_mode(upload_mode)
+        
+        if async_job:
+            return await queue_upload_job(file, story_name, user_id, force_reupload, upload_mode)
+        
+        result = await store_story(file, story_name, user_id, force_reupload, upload_mode)
+        await schedule_story_indexing(file, result)
+        return JSONResponse(status_code=200, content={"success": True, **result})
+        
+    except HTTPException:
+        # Re-raise HTTP exceptions (like validation errors)
+        raise
+    except Exception as e:
+        # Handle unexpected errors
+        print(f"Unexpected error in upload_story: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="An unexpected error occurred while uploading the story"
+        )
+
+async def queue_upload_job(file: UploadFile, story_name: str, user_id: str, force_reupload: bool,
+                           upload_mode: str) -> JSONResponse:
+    """
+    Helper function to save a validated PDF and queue its upload as a background job
+    
+    The spooled upload is gone once the request ends, so the PDF is copied
+    to Config.UPLOAD_JOB_FOLDER first; that copy is also what lets the job
+    run again after a restart.
+    
+    Args:
+        file: The validated PDF file
+        story_name: User-provided story name
+        user_id: User identifier
+        force_reupload: Skip the dedup check and always upload
+        upload_mode: "pdf" or "text"
+        
+    Returns:
+        JSONResponse: 202 Accepted with the job ID and where to follow it
+    """
+    job_id = new_job_id()
+    os.makedirs(Config.UPLOAD_JOB_FOLDER, exist_ok=True)
+    file_path = os.path.join(Config.UPLOAD_JOB_FOLDER, f"{job_id}.pdf")
+    
+    await file.seek(0)
+    async with aiofiles.open(file_path, "wb") as saved:
+        while True:
+            chunk = await file.read(Config.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            await saved.write(chunk)
+    
+    job = await upload_jobs.submit("upload_story", {
+        "file_path": file_path,
+        "file_name": file.filename,
+        "story_name": story_name,
+        "user_id": user_id,
+        "force_reupload": force_reupload,
+        "upload_mode": upload_mode
+    }, job_id=job_id)
+    
+    status_url = f"/api/jobs/{job_id}"
+    return JSONResponse(
+        status_code=202,
+        headers={"Location": status_url},
+        content={
+            "success": True,
+            "message": "Story upload queued",
+            "job_id": job_id,
+            "status": job["status"],
+            "status_url": status_url,
+            "events_url": f"{status_url}/events"
+        }
+    )
+
+async def run_upload_job(job: dict, report) -> dict:
+    """
+    Helper function that runs a queued story upload (see queue_upload_job)
+    
+    Args:
+        job: The job, with the upload's form fields in job["params"]
+        report: Function to call with the job's current stage
+        
+    Returns:
+        dict: Result of store_story(), stored as the job's result
+    """
+    params = job["params"]
+    upload = open_stored_pdf(params["file_path"], params["file_name"])
+    try:
+        report("uploading")
+        result = await store_story(upload, params["story_name"], params["user_id"],
+                                   params["force_reupload"], params["upload_mode"])
+        report("indexing")
+        await schedule_story_indexing(upload, result)
+        return result
+    finally:
+        await upload.close()
+
+def remove_job_file(job: dict):
+    """
+    Helper function to delete the saved PDF of a finished upload job
+    
+    Args:
+        job: The finished job
+    """
+    file_path = job["params"].get("file_path")
+    if file_path and os.path.exists(file_path):
+        os.remove(file_path)
+
+def open_stored_pdf(file_path: str, file_name: str) -> UploadFile:
+    """
+    Helper function to wrap a PDF on local disk as an UploadFile
+    
+    Lets store_story() and friends run on a saved file exactly as on a fresh upload.
+    
+    Args:
+        file_path: Path of the PDF
+        file_name: Original filename of the upload
+        
+    Returns:
+        UploadFile: The open file (close it when done)
+    """
+    return UploadFile(
+        file=open(file_path, "rb"),
+        filename=file_name,
+        headers=Headers({"content-type": "application/pdf"})
+    )
+
+def resolve_upload_mode(upload_mode: Optional[str]) -> str:
+    """
+    Helper function to validate a requested upload mode
+    
+    Args:
+        upload_mode: "pdf", "text" or None for the configured default
+        
+    Returns:
+        str: The upload mode to use
+        
+    Raises:
+        HTTPException: If the mode is unknown
+    """
+    upload_mode = upload_mode or Config.UPLOAD_MODE
+    if upload_mode not in UPLOAD_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid upload mode. Use 'pdf' or 'text'. Got: {upload_mode}"
+        )
+    return upload_mode
+
+def deduplicated_upload(existing: dict, index_key: str, content_hash: str, story_name: str, user_id: str,
+                        document_type: str) -> dict:
+    """
+    Build the upload response for content that is already in a knowledge base
+    
+    The entry may have been stored by another user, so only its knowledge base ID
+    is reused, under the entry's shared name (the same for every caller, so
+    attaching it to an agent again is recognized as a no-op); the story name,
+    user and timestamp are the caller's own.
+    
+    Args:
+        existing: Entry from the upload index
+        index_key: Key the entry is stored under
+        content_hash: SHA-256 hash of the uploaded content
+        story_name: User-provided story name
+        user_id: User identifier
+        document_type: "file" or "text"
+        
+    Returns:
+        dict: Knowledge base information in the same shape as a fresh upload
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return {
+        "message": "Story already uploaded, reusing existing knowledge base",
+        "knowledge_base_id": existing["id"],
+        "knowledge_base_name": existing.get("shared_name") or shared_knowledge_base_name(index_key),
+        "original_story_name": story_name,
+        "user_id": user_id,
+        "timestamp": timestamp,
+        "document_type": document_type,
+        "content_hash": content_hash,
+        "deduplicated": True
+    }
+
+async def store_story(file: UploadFile, story_name: str, user_id: str, force_reupload: bool,
+                      upload_mode: str = "pdf") -> dict:
+    """
+    Helper function to put a validated PDF in the knowledge base
+    
+    The file content is hashed first; content that was uploaded before maps
+    to the existing knowledge base unless force_reupload is set.
+    
+    Args:
+        file: The validated PDF file
+        story_name: User-provided story name
+        user_id: User identifier
+        force_reupload: Skip the dedup check and always upload
+        upload_mode: "pdf" to upload the file, "text" to upload its extracted text
         
-        # Read the file content into memory
-        # For large files, you might want to stream this differently
+    Returns:
+        dict: Knowledge base information, content hash and whether it was deduplicated
+    """
+    if upload_mode == "text":
+        return await store_story_text(file, story_name, user_id, force_reupload)
+    
+    if Config.STREAM_UPLOADS:
+        # Copy the spooled upload into the blob store (hashed from disk there),
+        # then stream it to ElevenLabs chunk by chunk, so the PDF is never fully in memory
+        try:
+            content_hash, file_size = await blob_store.put(file, Config.UPLOAD_CHUNK_SIZE)
+        except OSError as e:
+            print(f"⚠️ Could not keep a local copy of {file.filename}: {e}")
+            content_hash, file_size = await hash_upload_file(file, Config.UPLOAD_CHUNK_SIZE)
+        file_content = upload_stream_metrics.stream(file, Config.UPLOAD_CHUNK_SIZE)
+    else:
+        # Buffered mode: read the whole file into memory
         file_content = await file.read()
+        content_hash = hash_content(file_content)
+        file_size = len(file_content)
+        await blob_store.put_bytes(file_content, content_hash)
+    
+    # Identical content maps to the knowledge base we already created
+    if force_reupload:
+        upload_index.forced += 1
+    else:
+        existing = upload_index.lookup(content_hash)
+        if existing:
+            return deduplicated_upload(existing, content_hash, content_hash, story_name, user_id,
+                                       existing.get("document_type", "file"))
+    
+    # Call our ElevenLabs client to upload the file
+    result = await upload_to_elevenlabs(
+        file_content=file_content,
+        file_name=file.filename,
+        story_name=story_name,
+        user_id=user_id
+    )
+    upload_index.record(content_hash, result, file.filename, file_size)
+    
+    return {
+        "message": "Story uploaded successfully",
+        "knowledge_base_id": result["id"],
+        "knowledge_base_name": result["name"],
+        "original_story_name": result["original_story_name"],
+        "user_id": result["user_id"],
+        "timestamp": result["timestamp"],
+        "document_type": "file",
+        "content_hash": content_hash,
+        "deduplicated": False
+    }
+
+async def store_story_text(file: UploadFile, story_name: str, user_id: str, force_reupload: bool) -> dict:
+    """
+    Helper function to put the extracted text of a validated PDF in the knowledge base
+    
+    The PDF is parsed in pdf_text_extractor's process pool (or its pages are
+    read from the extraction cache) and only the text is uploaded. PDFs
+    without a text layer (e.g. scanned pages) are uploaded as PDFs instead.
+    
+    Args:
+        file: The validated PDF file
+        story_name: User-provided story name
+        user_id: User identifier
+        force_reupload: Skip the dedup check and always upload
         
-        # Call our ElevenLabs client to upload the file
-        result = await upload_to_elevenlabs(
-            file_content=file_content,
-            file_name=file.filename,
+    Returns:
+        dict: Knowledge base information plus extraction time and size reduction
+    """
+    # The parser needs the whole file anyway, so read it into memory
+    pdf_bytes = await file.read()
+    content_hash = hash_content(pdf_bytes)
+    await blob_store.put_bytes(pdf_bytes, content_hash)
+    
+    # Text uploads get their own knowledge base, separate from the PDF upload of the same file
+    index_key = f"text:{content_hash}"
+    if force_reupload:
+        upload_index.forced += 1
+    else:
+        existing = upload_index.lookup(index_key)
+        if existing:
+            return deduplicated_upload(existing, index_key, content_hash, story_name, user_id, "text")
+    
+    try:
+        pages, extract_seconds, cached = await pdf_text_extractor.extract(content_hash, pdf_bytes)
+    except Exception as e:
+        print(f"Error extracting text from {file.filename}: {e}")
+        raise HTTPException(status_code=400, detail=f"Could not read text from the PDF: {str(e)}")
+    
+    text = "\n\n".join(page for page in pages if page)
+    if not text.strip():
+        print(f"⚠️ No text found in {file.filename}, uploading the PDF instead")
+        await file.seek(0)
+        return await store_story(file, story_name, user_id, force_reupload, upload_mode="pdf")
+    
+    try:
+        result = await elevenlabs_client.upload_text_to_knowledge_base(
+            text=text,
             story_name=story_name,
             user_id=user_id
         )
+    except Exception as e:
+        print(f"Error uploading text to ElevenLabs: {e}")
+        raise upstream_http_exception(e, "Failed to upload story to ElevenLabs")
+    upload_index.record(index_key, result, file.filename, len(pdf_bytes))
+    
+    text_bytes = len(text.encode("utf-8"))
+    return {
+        "message": "Story text uploaded successfully",
+        "knowledge_base_id": result["id"],
+        "knowledge_base_name": result["name"],
+        "original_story_name": result["original_story_name"],
+        "user_id": result["user_id"],
+        "timestamp": result["timestamp"],
+        "document_type": "text",
+        "content_hash": content_hash,
+        "deduplicated": False,
+        "extraction": {
+            "pages": len(pages),
+            "pdf_bytes": len(pdf_bytes),
+            "text_bytes": text_bytes,
+            "size_reduction": round(1 - text_bytes / len(pdf_bytes), 3),
+            "extract_seconds": round(extract_seconds, 3),
+            "cached": cached
+        }
+    }
+
+@router.post("/reupload-story")
+async def reupload_story(
+    content_hash: str = Form(..., description="content_hash from an earlier upload of the story"),
+    story_name: str = Form(..., description="Name for the story"),
+    user_id: str = Form(..., description="User identifier"),
+    force_reupload: bool = Form(False, description="Upload even if the file is already in a knowledge base"),
+    upload_mode: Optional[str] = Form(None, description="'pdf' to upload the file, 'text' to upload its extracted text")
+):
+    """
+    Upload a story again from its local copy, without sending the file
+    
+    Every uploaded PDF is kept in the blob store by content hash (until the
+    store runs out of room), so a failed upload can be retried, or a story
+    re-attached in another mode, with just the content_hash.
+    
+    Args:
+        content_hash: SHA-256 returned by /upload-story or /upload-stories
+        story_name: User-provided name for the story
+        user_id: Identifier for the user uploading the story
+        force_reupload: Skip the dedup check and always upload
+        upload_mode: "pdf" or "text" (default Config.UPLOAD_MODE)
         
-        # Return success response with the knowledge base information
-        return JSONResponse(
-            status_code=200,
-            content={
-                "success": True,
-                "message": "Story uploaded successfully",
-                "knowledge_base_id": result["id"],
-                "knowledge_base_name": result["name"],
-                "original_story_name": result["original_story_name"],
-                "user_id": result["user_id"],
-                "timestamp": result["timestamp"]
-            }
+    Returns:
+        JSON response with knowledge base information, as for /upload-story
+    """
+    upload_mode = resolve_upload_mode(upload_mode)
+    file_path = blob_store.get(content_hash)
+    if file_path is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No local copy of this story. Upload the file again with /api/upload-story"
         )
-        
+    
+    # Reuse the original filename if we know it
+    entry = upload_index.entries.get(content_hash) or upload_index.entries.get(f"text:{content_hash}") or {}
+    upload = open_stored_pdf(file_path, entry.get("file_name") or f"{content_hash[:12]}.pdf")
+    try:
+        result = await store_story(upload, story_name, user_id, force_reupload, upload_mode)
+        await schedule_story_indexing(upload, result)
+        return JSONResponse(status_code=200, content={"success": True, **result})
     except HTTPException:
-        # Re-raise HTTP exceptions (like validation errors)
         raise
     except Exception as e:
-        # Handle unexpected errors
-        print(f"Unexpected error in upload_story: {e}")
+        print(f"Unexpected error in reupload_story: {e}")
         raise HTTPException(
             status_code=500,
             detail="An unexpected error occurred while uploading the story"
         )
+    finally:
+        await upload.close()
 
-async def upload_to_elevenlabs(file_content: bytes, file_name: str, 
-                             story_name: str, user_id: str) -> dict:
+@router.post("/upload-stories")
+async def upload_stories(
+    files: List[UploadFile] = File(..., description="PDF files, one per story"),
+    user_id: str = Form(..., description="User identifier"),
+    story_names: Optional[List[str]] = Form(None, description="Story name for each file, in order (defaults to the file name)"),
+    agent_id: Optional[str] = Form(None, description="Agent ID (uses default if not provided)"),
+    attach_to_agent: bool = Form(True, description="Add the uploaded stories to the agent's knowledge bases"),
+    replace_existing: bool = Form(False, description="Replace the agent's knowledge bases instead of adding to them"),
+    force_reupload: bool = Form(False, description="Upload even if the same file was uploaded before"),
+    upload_mode: Optional[str] = Form(None, description="'pdf' to upload the files, 'text' to upload their extracted text"),
+    concurrency: Optional[int] = Form(None, description="Uploads running at once")
+):
+    """
+    Upload several PDF stories and attach them all to an agent
+    
+    Every file is validated before anything is uploaded. The uploads then
+    run concurrently (up to a concurrency cap) and progress is streamed back
+    as NDJSON events while they run:
+    - {"event": "started", "total": ...}
+    - {"event": "uploaded", "index": ..., "file_name": ..., "knowledge_base_id": ..., ...} per file
+    - {"event": "failed", "index": ..., "file_name": ..., "error": ...} per failed file
+    - {"event": "agent_updated", ...} or {"event": "agent_update_failed", ...}
+    - {"event": "done", "uploaded": ..., "failed": ...}
+    
+    All uploaded stories are attached to the agent with a single agent
+    update at the end, not one update per file.
+    
+    Args:
+        files: The PDF files to upload
+        user_id: Identifier for the user uploading the stories
+        story_names: Optional story name per file
+        agent_id: Optional agent ID (uses default from config if not provided)
+        attach_to_agent: Whether to update the agent once the uploads finish
+        replace_existing: Replace the agent's knowledge bases instead of adding to them
+        force_reupload: Skip the dedup check and always upload
+        upload_mode: "pdf" or "text" (default Config.UPLOAD_MODE)
+        concurrency: Uploads at once (default Config.BATCH_UPLOAD_CONCURRENCY)
+        
+    Returns:
+        Streaming NDJSON response with progress events
+        
+    Example:
+        curl -N -X POST "http://localhost:8000/api/upload-stories" \
+             -F "files=@chapter1.pdf" \
+             -F "files=@chapter2.pdf" \
+             -F "user_id=user123"
+    """
+    if len(files) > Config.BATCH_UPLOAD_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files. Maximum is {Config.BATCH_UPLOAD_MAX_FILES} per batch"
+        )
+    
+    if story_names and len(story_names) != len(files):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Got {len(story_names)} story names for {len(files)} files"
+        )
+    
+    target_agent_id = agent_id or Config.AGENT_ID
+    if attach_to_agent and not target_agent_id:
+        raise HTTPException(
+            status_code=400,
+            detail="No agent ID provided and no default agent configured"
+        )
+    
+    # Reject the whole batch before uploading anything
+    for file in files:
+        try:
+            await validate_pdf_file(file)
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"{file.filename}: {e.detail}")
+    
+    upload_mode = resolve_upload_mode(upload_mode)
+    concurrency = max(1, min(concurrency or Config.BATCH_UPLOAD_CONCURRENCY, Config.BATCH_UPLOAD_MAX_CONCURRENCY))
+    names = story_names or [os.path.splitext(file.filename or "story")[0] for file in files]
+    
+    async def upload(index: int) -> dict:
+        result = await store_story(files[index], names[index], user_id, force_reupload, upload_mode)
+        await schedule_story_indexing(files[index], result)
+        return result
+    
+    async def progress_events():
+        batch_upload_metrics.batches += 1
+        batch_upload_metrics.batches_in_progress += 1
+        uploaded = []
+        failed = 0
+        try:
+            yield json.dumps({"event": "started", "total": len(files), "concurrency": concurrency}) + "\n"
+            
+            async for index, result, error in run_concurrently(len(files), upload, concurrency):
+                if error is None:
+                    uploaded.append(result)
+                    batch_upload_metrics.documents_uploaded += 1
+                    event = {"event": "uploaded", "index": index, "file_name": files[index].filename, **result}
+                else:
+                    failed += 1
+                    batch_upload_metrics.documents_failed += 1
+                    print(f"Error uploading {files[index].filename} in batch: {error}")
+                    detail = error.detail if isinstance(error, HTTPException) else str(error)
+                    event = {"event": "failed", "index": index, "file_name": files[index].filename, "error": detail}
+                yield json.dumps(event) + "\n"
+            
+            if attach_to_agent and uploaded:
+                # One merged agent update for the whole batch
+                knowledge_bases = [
+                    {
+                        "id": result["knowledge_base_id"],
+                        "name": result["knowledge_base_name"],
+                        "type": result["document_type"]
+                    }
+                    for result in uploaded
+                ]
+                try:
+                    await elevenlabs_client.attach_knowledge_bases(
+                        agent_id=target_agent_id,
+                        knowledge_bases=knowledge_bases,
+                        replace=replace_existing
+                    )
+                    batch_upload_metrics.agent_updates += 1
+                    event = {
+                        "event": "agent_updated",
+                        "agent_id": target_agent_id,
+                        "knowledge_base_ids": [kb["id"] for kb in knowledge_bases]
+                    }
+                except Exception as e:
+                    batch_upload_metrics.agent_update_errors += 1
+                    print(f"Error updating agent after batch upload: {e}")
+                    event = {"event": "agent_update_failed", "agent_id": target_agent_id, "error": str(e)}
+                yield json.dumps(event) + "\n"
+            
+            yield json.dumps({"event": "done", "uploaded": len(uploaded), "failed": failed}) + "\n"
+        finally:
+            batch_upload_metrics.batches_in_progress -= 1
+    
+    return StreamingResponse(progress_events(), media_type="application/x-ndjson")
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Get the status of a background job (e.g. an upload with async_job=true)
+    
+    Args:
+        job_id: ID returned when the job was queued
+        
+    Returns:
+        JSON response with the job's status, stage, and result or error once finished
+    """
+    job = await upload_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return JSONResponse(status_code=200, content={"success": True, **public_job(job)})
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Follow a background job as Server-Sent Events
+    
+    Sends a "job" event with the job's current state right away and another
+    one every time its status or stage changes. The stream ends after the
+    event for the finished (succeeded or failed) job.
+    
+    Args:
+        job_id: ID returned when the job was queued
+        
+    Returns:
+        StreamingResponse: text/event-stream of job events
+        
+    Example:
+        curl -N "http://localhost:8000/api/jobs/<job_id>/events"
+    """
+    # Subscribe before reading, so a change in between isn't missed
+    updates = upload_jobs.subscribe(job_id)
+    job = await upload_jobs.get(job_id)
+    if job is None:
+        upload_jobs.unsubscribe(job_id, updates)
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    async def events():
+        try:
+            current = job
+            while True:
+                yield f"event: job\ndata: {json.dumps(public_job(current))}\n\n"
+                if current["status"] in FINISHED_STATUSES:
+                    return
+                while True:
+                    try:
+                        current = await asyncio.wait_for(updates.get(), timeout=15)
+                        break
+                    except asyncio.TimeoutError:
+                        # Keep proxies from closing an idle stream
+                        yield ": keepalive\n\n"
+        finally:
+            upload_jobs.unsubscribe(job_id, updates)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def schedule_story_indexing(file: UploadFile, story: dict):
+    """
+    Helper function to build the local retrieval index of an uploaded story
+    
+    The index is built in the background from the story's extracted text. If
+    the text isn't in the extraction cache yet (PDF mode), the PDF is
+    extracted in the process pool from its copy in the blob store, or, if
+    there is no copy, from the spooled upload, read now while it is still open.
+    
+    Args:
+        file: The uploaded PDF file
+        story: Result of store_story()
+    """
+    knowledge_base_id = story["knowledge_base_id"]
+    if not Config.STORY_INDEX_ENABLED or knowledge_base_id in story_index:
+        return
+    
+    content_hash = story["content_hash"]
+    pdf_bytes = None
+    if content_hash not in blob_store and not await pdf_text_extractor.cached_pages(content_hash):
+        await file.seek(0)
+        pdf_bytes = await file.read()
+    
+    task = asyncio.create_task(index_story(knowledge_base_id, content_hash, pdf_bytes))
+    story_index_tasks.add(task)
+    task.add_done_callback(story_index_tasks.discard)
+
+async def index_story(knowledge_base_id: str, content_hash: str, pdf_bytes: Optional[bytes] = None) -> bool:
+    """
+    Helper function to (re)build the retrieval index of one story
+    
+    Args:
+        knowledge_base_id: Knowledge base the story was uploaded as
+        content_hash: SHA-256 of the story PDF
+        pdf_bytes: The PDF, if it isn't in the blob store (only needed if its
+            text was never extracted)
+        
+    Returns:
+        bool: True if the story is indexed
+    """
+    try:
+        pages = await pdf_text_extractor.cached_pages(content_hash)
+        if not pages:
+            if pdf_bytes is None:
+                pdf_bytes = await blob_store.read(content_hash)
+            if pdf_bytes is None:
+                return False
+            pages, _, _ = await pdf_text_extractor.extract(content_hash, pdf_bytes)
+        if not pages:
+            return False
+        # Building takes milliseconds of CPU per story, so keep it off the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, story_index.add, knowledge_base_id, pages)
+        return True
+    except Exception as e:
+        print(f"⚠️ Indexing story {knowledge_base_id} failed: {e}")
+        return False
+
+async def load_story_indexes(agent_id: str) -> List[str]:
+    """
+    Helper function to find the indexed stories attached to an agent
+    
+    Stories that aren't indexed yet (e.g. after a restart) are rebuilt from
+    the extraction cache or the blob store, using the upload index to map
+    knowledge base IDs back to content hashes.
+    
+    Args:
+        agent_id: Agent whose knowledge bases to look up
+        
+    Returns:
+        List[str]: Knowledge base IDs that have a local index
+    """
+    if not Config.STORY_INDEX_ENABLED:
+        return []
+    config = await elevenlabs_client.agent_configs.get(agent_id, elevenlabs_client.get_agent)
+    knowledge_base_ids = [entry["id"] for entry in current_knowledge_bases(config) if entry.get("id")]
+    
+    missing = {kb_id for kb_id in knowledge_base_ids if kb_id not in story_index}
+    if missing:
+        for key, entry in list(upload_index.entries.items()):
+            if entry.get("id") in missing:
+                content_hash = key.split(":", 1)[-1]  # Text uploads are keyed "text:<hash>"
+                if await index_story(entry["id"], content_hash):
+                    missing.discard(entry["id"])
+    
+    return [kb_id for kb_id in knowledge_base_ids if kb_id in story_index]
+
+async def fetch_conversation_list(agent_id: Optional[str]) -> dict:
+    """
+    Helper function to list an agent's conversations through the cache
+    
+    Many tabs poll the same agent's conversation list, so reads are served from
+    conversation_list_cache and ElevenLabs is asked at most once per TTL per agent.
+    
+    Args:
+        agent_id: Agent ID to list conversations for
+        
+    Returns:
+        dict: Response from ElevenLabs API (possibly cached)
+    """
+    return await conversation_list_cache.get(
+        agent_id,
+        lambda: elevenlabs_client.list_conversations(agent_id=agent_id)
+    )
+
+async def stream_conversations_ndjson(agent_id: Optional[str], page_size: Optional[int]) -> StreamingResponse:
+    """
+    Helper function to stream an agent's complete conversation history as NDJSON
+    
+    The first page is fetched before the response starts, so an upstream
+    failure still produces a normal HTTP error. Later pages are fetched as
+    the client reads. If a later page fails, a final {"error": ...} line is
+    written and the stream ends.
+    
+    Args:
+        agent_id: Agent ID to list conversations for
+        page_size: Conversations per upstream page
+        
+    Returns:
+        StreamingResponse: application/x-ndjson response
+    """
+    conversations = elevenlabs_client.iter_conversations(agent_id=agent_id, page_size=page_size)
+    try:
+        first = await conversations.__anext__()
+    except StopAsyncIteration:
+        first = None
+    
+    async def ndjson_lines():
+        try:
+            if first is None:
+                return
+            yield json.dumps(first) + "\n"
+            async for conversation in conversations:
+                yield json.dumps(conversation) + "\n"
+        except Exception as e:
+            print(f"Error streaming conversations: {e}")
+            yield json.dumps({"error": f"Failed to list conversations: {str(e)}"}) + "\n"
+        finally:
+            await conversations.aclose()
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+async def fetch_transcript(conversation_id: str) -> dict:
+    """
+    Helper function to get a transcript, from the local store when possible
+    
+    Finished conversations never change, so after the first fetch their
+    transcripts are served from transcript_store. Conversations that are
+    still running always go to ElevenLabs.
+    
+    Args:
+        conversation_id: ID of the conversation
+        
+    Returns:
+        dict: Conversation transcript
+    """
+    transcript = await transcript_store.get(conversation_id)
+    if transcript is not None:
+        return transcript
+    
+    transcript = await elevenlabs_client.get_conversation_transcript(conversation_id)
+    await transcript_store.put(conversation_id, transcript)
+    return transcript
+
+async def upload_to_elevenlabs(file_content: Union[bytes, AsyncIterable[bytes]], file_name: str,
+                               story_name: str, user_id: str) -> dict:
     """
     Helper function to upload file to ElevenLabs
     
     This is separated into its own function to make testing easier
-    and to handle the async/sync boundary properly.
+    and to keep the upload error handling in one place.
     
     Args:
-        file_content: The PDF file content as bytes
+        file_content: The PDF file content as bytes or as an async stream of chunks
         file_name: Original filename
         story_name: User-provided story name
         user_id: User identifier
@@ -152,9 +1057,9 @@ async def upload_to_elevenlabs(file_content: bytes, file_name: str,
         dict: Response from ElevenLabs API
     """
     try:
-        # Note: The ElevenLabs client method is synchronous
-        # In a production app, you might want to make it async
-        return elevenlabs_client.upload_story_to_knowledge_base(
+        # The client is async, so the event loop keeps serving other
+        # requests (and live WebSocket bridges) while the upload runs
+        return await elevenlabs_client.upload_story_to_knowledge_base(
             file_content=file_content,
             file_name=file_name,
             story_name=story_name,
@@ -162,17 +1067,15 @@ async def upload_to_elevenlabs(file_content: bytes, file_name: str,
         )
     except Exception as e:
         print(f"Error uploading to ElevenLabs: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to upload story to ElevenLabs: {str(e)}"
-        )
+        raise upstream_http_exception(e, "Failed to upload story to ElevenLabs")
 
 @router.post("/update-agent")
 async def update_agent(
     knowledge_base_id: str = Form(..., description="ID of the knowledge base to use"),
     knowledge_base_name: str = Form(..., description="Name of the knowledge base"),
     agent_id: Optional[str] = Form(None, description="Agent ID (uses default if not provided)"),
-    agent_name: Optional[str] = Form(None, description="New name for the agent")
+    agent_name: Optional[str] = Form(None, description="New name for the agent"),
+    knowledge_base_type: str = Form("file", description="'file' for PDF uploads, 'text' for text uploads")
 ):
     """
     Update an ElevenLabs agent to use a specific knowledge base
@@ -185,6 +1088,7 @@ async def update_agent(
         knowledge_base_name: The name of the knowledge base
         agent_id: Optional agent ID (uses default from config if not provided)
         agent_name: Optional new name for the agent
+        knowledge_base_type: document_type from the upload response ("file" or "text")
         
     Returns:
         JSON response with updated agent configuration
@@ -205,11 +1109,12 @@ async def update_agent(
             )
         
         # Call ElevenLabs client to update the agent
-        result = elevenlabs_client.update_agent_knowledge_base(
+        result = await elevenlabs_client.update_agent_knowledge_base(
             agent_id=target_agent_id,
             knowledge_base_id=knowledge_base_id,
             knowledge_base_name=knowledge_base_name,
-            agent_name=agent_name
+            agent_name=agent_name,
+            document_type=knowledge_base_type
         )
         
         return JSONResponse(
@@ -225,34 +1130,46 @@ async def update_agent(
         
     except Exception as e:
         print(f"Error updating agent: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to update agent: {str(e)}"
-        )
+        raise upstream_http_exception(e, "Failed to update agent")
 
 @router.get("/conversations")
-async def list_conversations(agent_id: Optional[str] = None):
+async def list_conversations(
+    agent_id: Optional[str] = None,
+    stream: bool = False,
+    page_size: Optional[int] = None
+):
     """
     List conversations for an agent
     
     This endpoint retrieves conversation history and transcripts.
     You can filter by agent ID or get all conversations.
     
+    By default it returns the first page of conversations as JSON. With
+    stream=true it walks the complete history page by page and streams it
+    as NDJSON (one conversation per line), so the first rows arrive right
+    away and memory stays flat however long the history is.
+    
     Args:
         agent_id: Optional agent ID to filter conversations
+        stream: Stream the full history as NDJSON instead of returning one page
+        page_size: Conversations per upstream page when streaming
         
     Returns:
-        JSON response with list of conversations
+        JSON response with list of conversations, or an NDJSON stream
         
     Example:
         curl "http://localhost:8000/api/conversations"
         curl "http://localhost:8000/api/conversations?agent_id=agent_123"
+        curl -N "http://localhost:8000/api/conversations?stream=true"
     """
     try:
         # Use provided agent_id or default
         target_agent_id = agent_id or Config.AGENT_ID
         
-        result = elevenlabs_client.list_conversations(agent_id=target_agent_id)
+        if stream:
+            return await stream_conversations_ndjson(target_agent_id, page_size)
+        
+        result = await fetch_conversation_list(target_agent_id)
         
         return JSONResponse(
             status_code=200,
@@ -265,10 +1182,102 @@ async def list_conversations(agent_id: Optional[str] = None):
         
     except Exception as e:
         print(f"Error listing conversations: {e}")
+        raise upstream_http_exception(e, "Failed to list conversations")
+
+@router.get("/conversations/export")
+async def export_conversations(
+    agent_id: Optional[str] = None,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    format: str = "ndjson",
+    concurrency: Optional[int] = None
+):
+    """
+    Export every transcript of an agent
+    
+    This endpoint walks the agent's conversation history (optionally limited
+    to a time range) and fetches the transcripts concurrently, up to a
+    concurrency cap. Transcripts already in the local transcript store are
+    reused. Each transcript is written out as soon as it arrives, either as
+    an NDJSON line or as a file in a streamed zip archive, so the export is
+    never built in memory.
+    
+    Args:
+        agent_id: Optional agent ID (uses default if not provided)
+        start_time: Only conversations started at or after this Unix time
+        end_time: Only conversations started at or before this Unix time
+        format: "ndjson" (default) or "zip"
+        concurrency: Transcripts fetched at once (default Config.EXPORT_CONCURRENCY)
+        
+    Returns:
+        Streaming NDJSON or zip response
+        
+    Example:
+        curl -N "http://localhost:8000/api/conversations/export"
+        curl -o transcripts.zip "http://localhost:8000/api/conversations/export?format=zip&start_time=1733011200"
+    """
+    target_agent_id = agent_id or Config.AGENT_ID
+    
+    if not target_agent_id:
         raise HTTPException(
-            status_code=500,
-            detail=f"Failed to list conversations: {str(e)}"
+            status_code=400,
+            detail="No agent ID provided and no default agent configured"
+        )
+    
+    if format not in ("ndjson", "zip"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid export format. Use 'ndjson' or 'zip'. Got: {format}"
         )
+    
+    concurrency = max(1, min(concurrency or Config.EXPORT_CONCURRENCY, Config.EXPORT_MAX_CONCURRENCY))
+    
+    # Exports are bulk work, so their upstream calls yield to interactive requests
+    async def conversations_in_range():
+        # ElevenLabs filters by time range too; this guards the exact bounds
+        conversations = elevenlabs_client.iter_conversations(
+            agent_id=target_agent_id,
+            start_after=start_time - 1 if start_time is not None else None,
+            start_before=end_time + 1 if end_time is not None else None
+        )
+        try:
+            while True:
+                with priority_scope(BACKGROUND):
+                    try:
+                        conversation = await conversations.__anext__()
+                    except StopAsyncIteration:
+                        break
+                started = conversation.get("start_time_unix_secs")
+                if not conversation.get("conversation_id"):
+                    continue
+                if start_time is not None and (started is None or started < start_time):
+                    continue
+                if end_time is not None and (started is None or started > end_time):
+                    continue
+                yield conversation
+        finally:
+            await conversations.aclose()
+    
+    async def fetch_transcript_in_background(conversation_id: str) -> dict:
+        with priority_scope(BACKGROUND):
+            return await fetch_transcript(conversation_id)
+    
+    results = export_metrics.track(
+        fetch_transcripts(conversations_in_range(), fetch_transcript_in_background, concurrency)
+    )
+    
+    if format == "zip":
+        return StreamingResponse(
+            zip_stream(results),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="transcripts_{target_agent_id}.zip"'}
+        )
+    
+    async def ndjson_lines():
+        async for conversation, transcript, error in results:
+            yield ndjson_record(conversation, transcript, error)
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 @router.get("/conversations/{conversation_id}")
 async def get_conversation_transcript(conversation_id: str):
@@ -288,7 +1297,7 @@ async def get_conversation_transcript(conversation_id: str):
         curl "http://localhost:8000/api/conversations/conv_123"
     """
     try:
-        result = elevenlabs_client.get_conversation_transcript(conversation_id)
+        result = await fetch_transcript(conversation_id)
         
         return JSONResponse(
             status_code=200,
@@ -301,10 +1310,7 @@ async def get_conversation_transcript(conversation_id: str):
         
     except Exception as e:
         print(f"Error getting conversation transcript: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to get conversation transcript: {str(e)}"
-        )
+        raise upstream_http_exception(e, "Failed to get conversation transcript")
 
 @router.get("/latest-conversation")
 async def get_latest_conversation(agent_id: Optional[str] = None):
@@ -312,7 +1318,9 @@ async def get_latest_conversation(agent_id: Optional[str] = None):
     Get the latest conversation data for a specific agent
     
     This endpoint automatically fetches the most recent conversation
-    and its transcript in a single request.
+    and its transcript in a single request. The latest conversation comes
+    from the local conversation index, and its transcript is usually already
+    prefetched into the transcript store.
     
     Args:
         agent_id: Optional agent ID (uses default if not provided)
@@ -334,35 +1342,10 @@ async def get_latest_conversation(agent_id: Optional[str] = None):
                 detail="No agent ID provided and no default agent configured"
             )
         
-        # First, get the list of conversations
-        conversations_response = elevenlabs_client.list_conversations(agent_id=target_agent_id)
-        
-        # Check if there are any conversations
-        if not conversations_response:
-            return JSONResponse(
-                status_code=200,
-                content={
-                    "success": True,
-                    "message": "No conversations found for this agent",
-                    "agent_id": target_agent_id
-                }
-            )
+        # Constant-time lookup in the locally maintained conversation index
+        latest_conversation = await conversation_index.latest(target_agent_id)
         
-        # Extract the conversations list from the response
-        # The API returns a nested structure: response.conversations.conversations
-        conversations = []
-        if isinstance(conversations_response, dict):
-            # Handle nested structure: response.conversations.conversations
-            if "conversations" in conversations_response:
-                if isinstance(conversations_response["conversations"], dict) and "conversations" in conversations_response["conversations"]:
-                    conversations = conversations_response["conversations"]["conversations"]
-                elif isinstance(conversations_response["conversations"], list):
-                    conversations = conversations_response["conversations"]
-        elif isinstance(conversations_response, list):
-            conversations = conversations_response
-        
-        # Check if we have any conversations after extraction
-        if not conversations:
+        if not latest_conversation:
             return JSONResponse(
                 status_code=200,
                 content={
@@ -372,45 +1355,10 @@ async def get_latest_conversation(agent_id: Optional[str] = None):
                 }
             )
         
-        # Make sure each item is a dictionary
-        valid_conversations = [c for c in conversations if isinstance(c, dict)]
-        
-        # Sort conversations by start_time_unix_secs (newest first)
-        # The ElevenLabs API uses start_time_unix_secs instead of created_at
-        sorted_conversations = sorted(
-            [c for c in valid_conversations if "start_time_unix_secs" in c],
-            key=lambda x: x.get("start_time_unix_secs", 0),
-            reverse=True
-        )
-        
-        # Check if we have any valid conversations after filtering
-        if not sorted_conversations:
-            return JSONResponse(
-                status_code=200,
-                content={
-                    "success": True,
-                    "message": "No valid conversations found with timestamps",
-                    "agent_id": target_agent_id
-                }
-            )
-        
-        # Get the latest conversation ID
-        latest_conversation = sorted_conversations[0]
         latest_conversation_id = latest_conversation.get("conversation_id")
         
-        if not latest_conversation_id:
-            return JSONResponse(
-                status_code=200,
-                content={
-                    "success": True,
-                    "message": "Latest conversation has no ID",
-                    "agent_id": target_agent_id,
-                    "conversation_metadata": latest_conversation
-                }
-            )
-        
         # Get the transcript for the latest conversation
-        transcript = elevenlabs_client.get_conversation_transcript(latest_conversation_id)
+        transcript = await fetch_transcript(latest_conversation_id)
         
         return JSONResponse(
             status_code=200,
@@ -424,10 +1372,7 @@ async def get_latest_conversation(agent_id: Optional[str] = None):
         
     except Exception as e:
         print(f"Error getting latest conversation: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to get latest conversation: {str(e)}"
-        )
+        raise upstream_http_exception(e, "Failed to get latest conversation")
 
 @router.get("/agent-info")
 async def get_agent_info():
@@ -450,6 +1395,42 @@ async def get_agent_info():
         }
     )
 
+@router.get("/stats")
+async def get_stats():
+    """
+    Get performance counters for the application's internal components
+    
+    Returns:
+        JSON response with counters for each component
+    """
+    return JSONResponse(
+        status_code=200,
+        content={
+            "success": True,
+            "upload_dedup": upload_index.stats(),
+            "upload_streaming": upload_stream_metrics.stats(),
+            "blob_store": blob_store.stats(),
+            "upload_validation": upload_validation_metrics.stats(),
+            "pdf_text_extraction": pdf_text_extractor.stats(),
+            "upstream_resilience": elevenlabs_client.resilience.stats(),
+            "upstream_coalescing": elevenlabs_client.single_flight.stats(),
+            "upstream_scheduler": elevenlabs_client.scheduler.stats(),
+            "agent_config_cache": elevenlabs_client.agent_configs.stats(),
+            "conversation_list_cache": conversation_list_cache.stats(),
+            "transcript_store": transcript_store.stats(),
+            "conversation_index": conversation_index.stats(),
+            "transcript_export": export_metrics.stats(),
+            "story_index": story_index.stats(),
+            "batch_upload": batch_upload_metrics.stats(),
+            "websocket_bridge": {**bridge_metrics.stats(), "json_codec": ws_codec.name},
+            "websocket_events": ws_event_metrics.stats(),
+            "audio_framing": audio_framing_metrics.stats(),
+            "outbound_queues": manager.outbound_stats(),
+            "upstream_send_lanes": ws_send_metrics.stats(),
+            "upload_jobs": upload_jobs.stats()
+        }
+    )
+
 @router.post("/transcript")
 async def receive_transcript(request: Request):
     """
@@ -514,6 +1495,8 @@ class ConnectionManager:
     
     This class handles:
     - Multiple client connections
+    - Frame protocol negotiation (binary audio frames, base64 pass-through or hex-in-JSON,
+      see api.ws_protocol)
     - Message routing between frontend and ElevenLabs
     - Connection cleanup
     """
@@ -521,20 +1504,49 @@ class ConnectionManager:
     def __init__(self):
         # Store active connections: {websocket: elevenlabs_client}
         self.active_connections: Dict[WebSocket, ElevenLabsWebSocketClient] = {}
+        # Negotiated frame protocol per connection: {websocket: protocol}
+        self.protocols: Dict[WebSocket, str] = {}
+        # Sequence number of the next binary audio frame per connection
+        self.audio_sequences: Dict[WebSocket, int] = {}
+        # Mic audio re-framing per connection: {websocket: framer}
+        self.framers: Dict[WebSocket, AudioFramer] = {}
+        # Messages waiting for each browser, written by a task per connection
+        self.outbound: Dict[WebSocket, OutboundQueue] = {}
+        self.agent_ids: Dict[WebSocket, str] = {}
     
     async def connect(self, websocket: WebSocket, agent_id: str):
         """Accept WebSocket connection and connect to ElevenLabs"""
-        await websocket.accept()
+        subprotocol = negotiate(
+            websocket.scope.get("subprotocols", []),
+            allow_binary=Config.WS_BINARY_FRAMES,
+            prefer_passthrough=Config.WS_AUDIO_PASSTHROUGH
+        )
+        await websocket.accept(subprotocol=subprotocol)
+        self.protocols[websocket] = subprotocol or LEGACY_PROTOCOL
+        self.audio_sequences[websocket] = 0
+        bridge_metrics.record_session(self.protocols[websocket])
+        
+        # Everything for the browser goes through a bounded queue and its own writer task,
+        # so a slow browser never holds up the ElevenLabs listener
+        self.outbound[websocket] = OutboundQueue(
+            lambda item: self._write_to_frontend(websocket, item),
+            maxsize=Config.WS_OUTBOUND_QUEUE_SIZE,
+            policies=Config.WS_OUTBOUND_OVERFLOW,
+            on_disconnect=lambda: self._close_slow_client(websocket)
+        )
+        self.outbound[websocket].start()
+        self.agent_ids[websocket] = agent_id
         
         # Create ElevenLabs WebSocket client
-        elevenlabs_client = ElevenLabsWebSocketClient(agent_id)
+        elevenlabs_client = ElevenLabsWebSocketClient(
+            agent_id, codec=ws_codec, event_metrics=ws_event_metrics, send_metrics=ws_send_metrics
+        )
+        # Base64 clients get agent audio exactly as ElevenLabs sent it
+        elevenlabs_client.audio_passthrough = subprotocol == BASE64_SUBPROTOCOL
         
         # Set up event callbacks with proper async handling
         async def on_audio_received(audio):
-            await self._send_to_frontend(websocket, {
-                "type": "audio",
-                "audio_data": audio.hex()
-            })
+            await self._send_audio_to_frontend(websocket, audio)
         
         async def on_transcript_received(transcript):
             await self._send_to_frontend(websocket, {
@@ -561,6 +1573,14 @@ class ConnectionManager:
             })
         
         async def on_disconnected():
+            # The session just ended, so the agent's cached conversation list is out of date
+            # and the conversation index should pick up the new conversation
+            conversation_list_cache.invalidate(agent_id)
+            conversation_index.notify_session_ended(
+                agent_id,
+                elevenlabs_client.conversation_id,
+                elevenlabs_client.conversation_started_at
+            )
             await self._send_to_frontend(websocket, {
                 "type": "disconnected",
                 "message": "Disconnected from ElevenLabs"
@@ -575,6 +1595,55 @@ class ConnectionManager:
             on_disconnected=on_disconnected
         )
         
+        # The user talked over the agent: drop its audio still waiting for the browser,
+        # and tell the browser to stop playing what it already has
+        async def on_interruption(event: InterruptionEvent):
+            queue = self.outbound.get(websocket)
+            if queue is not None:
+                queue.drop_audio()
+            await self._send_to_frontend(websocket, {"type": "interruption"})
+        
+        async def on_agent_response_correction(event: AgentResponseCorrectionEvent):
+            await self._send_to_frontend(websocket, {
+                "type": "agent_response_correction",
+                "text": event.corrected
+            })
+        
+        # The browser has no client tools, so tell the agent instead of leaving it waiting
+        async def on_client_tool_call(event: ClientToolCallEvent):
+            await elevenlabs_client.send_client_tool_result(
+                event.tool_call_id, f"Client tool {event.tool_name} is not available", is_error=True
+            )
+        
+        elevenlabs_client.subscribe("interruption", on_interruption)
+        elevenlabs_client.subscribe("agent_response_correction", on_agent_response_correction)
+        elevenlabs_client.subscribe("client_tool_call", on_client_tool_call)
+        
+        # Coalesce the browser's mic chunks into fixed-duration frames
+        if Config.WS_AUDIO_FRAMING:
+            self.framers[websocket] = AudioFramer(
+                elevenlabs_client.send_audio_chunk,
+                frame_bytes=Config.WS_AUDIO_FRAME_MS * Config.WS_AUDIO_BYTES_PER_MS,
+                flush_after=Config.WS_AUDIO_FLUSH_MS / 1000,
+                metrics=audio_framing_metrics
+            )
+        
+        # Push story passages matching what the user says as contextual updates.
+        # The agent's stories are looked up in the background so connecting isn't delayed;
+        # until then there is simply no context to send.
+        session_stories: List[str] = []
+        
+        async def find_session_stories():
+            try:
+                session_stories.extend(await load_story_indexes(agent_id))
+            except Exception as e:
+                print(f"⚠️ Looking up stories for agent {agent_id} failed: {e}")
+        
+        elevenlabs_client.context_provider = lambda transcript: story_index.context_for(
+            session_stories, transcript, Config.STORY_CONTEXT_PASSAGES
+        )
+        elevenlabs_client._stories_task = asyncio.create_task(find_session_stories())
+        
         try:
             # Connect to ElevenLabs
             await elevenlabs_client.connect()
@@ -588,22 +1657,33 @@ class ConnectionManager:
             elevenlabs_client._listen_task = listen_task
             
         except Exception as e:
+            elevenlabs_client._stories_task.cancel()
             await websocket.close(code=1000, reason=f"Failed to connect to ElevenLabs: {e}")
     
     async def disconnect(self, websocket: WebSocket):
         """Disconnect from both frontend and ElevenLabs"""
-        if websocket in self.active_connections:
-            elevenlabs_client = self.active_connections[websocket]
-            
+        self.protocols.pop(websocket, None)
+        self.audio_sequences.pop(websocket, None)
+        framer = self.framers.pop(websocket, None)
+        if framer:
+            framer.close()
+        self.agent_ids.pop(websocket, None)
+        # Removed up front, as a slow-client close and the endpoint can both get here
+        elevenlabs_client = self.active_connections.pop(websocket, None)
+        if elevenlabs_client is not None:
             # Cancel the listening task if it exists
             if hasattr(elevenlabs_client, '_listen_task'):
                 elevenlabs_client._listen_task.cancel()
+            # The story lookup may still be running if the session was short
+            if hasattr(elevenlabs_client, '_stories_task'):
+                elevenlabs_client._stories_task.cancel()
             
             # Disconnect from ElevenLabs
             await elevenlabs_client.disconnect()
-            
-            # Remove from active connections
-            del self.active_connections[websocket]
+        
+        queue = self.outbound.pop(websocket, None)
+        if queue is not None:
+            queue.close()
     
     async def send_to_elevenlabs(self, websocket: WebSocket, message: dict):
         """Forward message from frontend to ElevenLabs"""
@@ -615,11 +1695,33 @@ class ConnectionManager:
         try:
             message_type = message.get("type")
             
-            if message_type == "audio":
+            if message_type == "audio" and "audio_base_64" in message:
+                audio_base64 = message["audio_base_64"]
+                bridge_metrics.record_audio_in(
+                    self.protocols.get(websocket, LEGACY_PROTOCOL), base64_size(audio_base64), len(audio_base64)
+                )
+                framer = self.framers.get(websocket)
+                if framer is None or framer.take_whole_frame(base64_size(audio_base64)):
+                    # Base64 pass-through: already in the encoding ElevenLabs expects (and frame-sized)
+                    await elevenlabs_client.send_audio_base64(audio_base64)
+                else:
+                    # Framing needs the bytes, and keeps this audio in order with any partial frame
+                    await self._send_audio_upstream(websocket, elevenlabs_client, base64.b64decode(audio_base64))
+                
+            elif message_type == "audio":
                 # Convert hex string back to bytes
                 audio_hex = message.get("audio_data", "")
                 audio_data = bytes.fromhex(audio_hex)
-                await elevenlabs_client.send_audio_chunk(audio_data)
+                bridge_metrics.record_audio_in(
+                    self.protocols.get(websocket, LEGACY_PROTOCOL), len(audio_data), len(audio_hex)
+                )
+                await self._send_audio_upstream(websocket, elevenlabs_client, audio_data)
+                
+            elif message_type == "audio_end":
+                # The user stopped talking: send the partial frame now
+                framer = self.framers.get(websocket)
+                if framer:
+                    await framer.flush()
                 
             elif message_type == "text":
                 text = message.get("text", "")
@@ -635,12 +1737,102 @@ class ConnectionManager:
                 "message": f"Error sending to ElevenLabs: {e}"
             })
     
+    async def send_frame_to_elevenlabs(self, websocket: WebSocket, frame: bytes):
+        """Forward a binary frame from the frontend to ElevenLabs"""
+        if websocket not in self.active_connections:
+            return
+        
+        elevenlabs_client = self.active_connections[websocket]
+        
+        try:
+            kind, _, payload = decode_frame(frame)
+            if kind != FRAME_AUDIO:
+                raise FrameError(f"Unknown binary frame kind {kind}")
+            bridge_metrics.record_audio_in(BINARY_SUBPROTOCOL, len(payload), len(frame))
+            await self._send_audio_upstream(websocket, elevenlabs_client, payload)
+            
+        except FrameError as e:
+            bridge_metrics.bad_frames += 1
+            await self._send_to_frontend(websocket, {
+                "type": "error",
+                "message": f"Invalid frame: {e}"
+            })
+        except Exception as e:
+            await self._send_to_frontend(websocket, {
+                "type": "error",
+                "message": f"Error sending to ElevenLabs: {e}"
+            })
+    
+    async def _send_audio_upstream(self, websocket: WebSocket, elevenlabs_client: ElevenLabsWebSocketClient,
+                                   audio: Union[bytes, memoryview]):
+        """Send mic audio to ElevenLabs, through the connection's framer if it has one"""
+        framer = self.framers.get(websocket)
+        if framer:
+            await framer.push(audio)
+        else:
+            await elevenlabs_client.send_audio_chunk(audio)
+    
+    async def _send_audio_to_frontend(self, websocket: WebSocket, audio: Union[bytes, str]):
+        """
+        Queue agent audio for the frontend in the connection's frame protocol
+        
+        Audio is a base64 string for pass-through connections and bytes otherwise.
+        """
+        protocol = self.protocols.get(websocket, LEGACY_PROTOCOL)
+        if protocol == BINARY_SUBPROTOCOL:
+            sequence = self.audio_sequences.get(websocket, 0)
+            self.audio_sequences[websocket] = sequence + 1
+            item = OutboundMessage("audio", data=encode_frame(FRAME_AUDIO, sequence, audio), audio_bytes=len(audio))
+        elif protocol == BASE64_SUBPROTOCOL:
+            text = ws_codec.encode_frontend_audio("audio_base_64", audio)
+            item = OutboundMessage("audio", data=text, audio_bytes=base64_size(audio))
+        else:
+            text = ws_codec.encode_frontend_audio("audio_data", audio.hex())
+            item = OutboundMessage("audio", data=text, audio_bytes=len(audio))
+        self._enqueue(websocket, item)
+    
     async def _send_to_frontend(self, websocket: WebSocket, message: dict):
-        """Send message to frontend WebSocket"""
+        """Queue a message for the frontend WebSocket"""
+        self._enqueue(websocket, OutboundMessage("control", message=message))
+    
+    def _enqueue(self, websocket: WebSocket, item: OutboundMessage):
+        """Add a message to the connection's outbound queue (never waits for the browser)"""
+        queue = self.outbound.get(websocket)
+        if queue is not None:
+            queue.put(item)
+    
+    async def _write_to_frontend(self, websocket: WebSocket, item: OutboundMessage):
+        """Write one queued message to the frontend WebSocket (run by the queue's writer task)"""
+        if item.message is not None:
+            await websocket.send_text(ws_codec.dumps(item.message))
+            return
+        if isinstance(item.data, bytes):
+            await websocket.send_bytes(item.data)
+        else:
+            await websocket.send_text(item.data)
+        if item.kind == "audio":
+            bridge_metrics.record_audio_out(self.protocols.get(websocket, LEGACY_PROTOCOL), item.audio_bytes, len(item.data))
+    
+    async def _close_slow_client(self, websocket: WebSocket):
+        """Drop a browser that can't keep up with its outbound queue"""
+        print("⚠️ Closing WebSocket: outbound queue overflowed")
         try:
-            await websocket.send_text(json.dumps(message))
+            await websocket.close(code=1013, reason="Client too slow")
         except Exception as e:
-            print(f"Error sending to frontend: {e}")
+            print(f"Error closing slow WebSocket: {e}")
+        await self.disconnect(websocket)
+    
+    def outbound_stats(self) -> List[Dict[str, Any]]:
+        """
+        Return the outbound queue of every open session for monitoring
+        
+        Returns:
+            List[Dict[str, Any]]: Agent ID, queue depth, high-water mark and overflow counters per session
+        """
+        return [
+            {"agent_id": self.agent_ids.get(websocket), **queue.stats()}
+            for websocket, queue in self.outbound.items()
+        ]
 
 # Create global connection manager
 manager = ConnectionManager()
@@ -657,9 +1849,17 @@ async def websocket_endpoint(websocket: WebSocket, agent_id: str):
         websocket: FastAPI WebSocket connection
         agent_id: ElevenLabs agent ID to connect to
         
+    Clients that offer the "storyagent.binary.v1" subprotocol exchange audio
+    as binary frames (a 6 byte header, then the raw audio; see
+    api.ws_protocol) and use JSON text frames only for the control messages
+    below. Clients that offer "storyagent.base64.v1" send and receive audio
+    as {"type": "audio", "audio_base_64": "..."}, which is passed to and from
+    ElevenLabs without re-encoding. Clients that offer "storyagent.json.v1"
+    or no subprotocol send and receive audio as hex strings in JSON.
+    
     Message format from frontend:
     {
-        "type": "audio",           // Message type
+        "type": "audio",           // Message type (JSON protocol only)
         "audio_data": "hex_string" // Audio data as hex string
     }
     
@@ -673,9 +1873,13 @@ async def websocket_endpoint(websocket: WebSocket, agent_id: str):
         "context": "User is looking at page 5"
     }
     
+    {
+        "type": "audio_end"        // User stopped talking: send any buffered audio now
+    }
+    
     Message format to frontend:
     {
-        "type": "audio",           // Audio response from AI
+        "type": "audio",           // Audio response from AI (JSON protocol only)
         "audio_data": "hex_string" // Audio data as hex string
     }
     
@@ -688,17 +1892,30 @@ async def websocket_endpoint(websocket: WebSocket, agent_id: str):
         "type": "agent_response",  // AI text response
         "text": "AI response"
     }
+    
+    {
+        "type": "agent_response_correction",  // AI text response, as cut short by an interruption
+        "text": "AI resp"
+    }
+    
+    {
+        "type": "interruption"     // User interrupted the agent: stop playing its audio
+    }
     """
     await manager.connect(websocket, agent_id)
     
     try:
         while True:
-            # Receive message from frontend
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            # Receive message from frontend: binary audio frames or JSON text
+            data = await websocket.receive()
+            if data["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(data.get("code", 1000))
             
             # Forward to ElevenLabs
-            await manager.send_to_elevenlabs(websocket, message)
+            if data.get("bytes") is not None:
+                await manager.send_frame_to_elevenlabs(websocket, data["bytes"])
+            else:
+                await manager.send_to_elevenlabs(websocket, ws_codec.loads(data["text"]))
             
     except WebSocketDisconnect:
         await manager.disconnect(websocket)
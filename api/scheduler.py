@@ -0,0 +1,285 @@
+"""
+Upstream Request Scheduler
+
+All ElevenLabs REST traffic shares one API key quota. This module puts a
+scheduler in front of it so that:
+- Requests are paced by a token bucket per API key
+- The bucket adapts to 429 responses: it slows down (and pauses for
+  Retry-After), then speeds back up gradually while calls succeed
+- Interactive calls (a user is waiting) always get the next token before
+  background work such as history polling, prefetching and exports
+
+The priority of a call is taken from a context variable, so background
+tasks mark themselves once with `priority_scope(BACKGROUND)` instead of
+passing a priority through every layer.
+"""
+
+import asyncio
+import contextvars
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Optional
+
+# Priority classes, lower value is served first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("upstream_priority", default=INTERACTIVE)
+
+
+def current_priority() -> int:
+    """Return the priority class of the current task"""
+    return _current_priority.get()
+
+
+@contextmanager
+def priority_scope(priority: int):
+    """
+    Run a block of code with a given upstream priority
+
+    Tasks created inside the block inherit the priority.
+
+    Example:
+        with priority_scope(BACKGROUND):
+            await elevenlabs_client.list_conversations(agent_id)
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket whose refill rate adapts to upstream rate limiting
+
+    On a 429 the rate is multiplied by decrease_factor (not below min_rate)
+    and the bucket is paused for Retry-After. Every successful call adds
+    increase_step back to the rate, up to max_rate.
+    """
+
+    def __init__(self, rate: float, capacity: float, min_rate: float,
+                 decrease_factor: float = 0.5, increase_step: float = 0.1):
+        """
+        Args:
+            rate (float): Starting and maximum refill rate in requests per second
+            capacity (float): Burst size (maximum stored tokens)
+            min_rate (float): Lowest rate the bucket backs off to
+            decrease_factor (float): Rate multiplier applied on a 429
+            increase_step (float): Requests per second added back per success
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.tokens = capacity
+        self.paused_until = 0.0
+        self._updated_at = time.monotonic()
+        self.rate_limited = 0
+
+    def _refill(self, now: float):
+        """Add the tokens earned since the last update"""
+        elapsed = max(0.0, now - max(self._updated_at, self.paused_until))
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self._updated_at = max(self._updated_at, now)
+
+    def time_until_token(self) -> float:
+        """Return seconds until a token is available (0 if one is available now)"""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Consume one token (call only when time_until_token() is 0)"""
+        self.tokens -= 1
+
+    def on_rate_limited(self, retry_after: Optional[float]):
+        """Slow down after a 429 and pause for Retry-After if given"""
+        self.rate_limited += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.tokens = 0
+        self._updated_at = time.monotonic()
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def on_success(self):
+        """Speed back up gradually after a successful call"""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the bucket state"""
+        return {
+            "rate_per_second": round(self.rate, 2),
+            "max_rate_per_second": self.max_rate,
+            "tokens": round(self.tokens, 2),
+            "paused_for_seconds": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            "rate_limited_responses": self.rate_limited
+        }
+
+
+class _Lane:
+    """Waiting callers and wait-time counters for one priority class"""
+
+    def __init__(self):
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.granted = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, waited: float):
+        self.granted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": len(self.waiters),
+            "max_queue_depth": self.max_depth,
+            "granted": self.granted,
+            "avg_wait_ms": round(1000 * self.total_wait / self.granted, 1) if self.granted else 0.0,
+            "max_wait_ms": round(1000 * self.max_wait, 1)
+        }
+
+
+class _KeySchedule:
+    """Token bucket, priority lanes and dispatcher for one API key"""
+
+    def __init__(self, bucket: AdaptiveTokenBucket):
+        self.bucket = bucket
+        self.lanes: Dict[int, _Lane] = {priority: _Lane() for priority in PRIORITY_NAMES}
+        self.dispatcher: Optional[asyncio.Task] = None
+
+    def has_waiters(self, up_to_priority: Optional[int] = None) -> bool:
+        """Return True if anyone is waiting at the given priority or higher"""
+        return any(
+            lane.waiters for priority, lane in self.lanes.items()
+            if up_to_priority is None or priority <= up_to_priority
+        )
+
+
+class UpstreamScheduler:
+    """
+    Paces upstream calls per API key and serves them by priority
+
+    This class handles:
+    - One adaptive token bucket per API key
+    - A FIFO lane per priority class; higher priority lanes are always served first
+    - Feedback from responses (429 and Retry-After, successes)
+    - Queue depth and wait time counters per class
+    """
+
+    def __init__(self, rate: float, burst: float, min_rate: float):
+        """
+        Args:
+            rate (float): Requests per second allowed per API key
+            burst (float): Requests that may be sent back to back
+            min_rate (float): Lowest rate a key backs off to after 429s
+        """
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self._keys: Dict[str, _KeySchedule] = {}
+
+    def _schedule_for(self, api_key: str) -> _KeySchedule:
+        """Return the schedule for an API key, creating it on first use"""
+        schedule = self._keys.get(api_key)
+        if schedule is None:
+            schedule = _KeySchedule(AdaptiveTokenBucket(self.rate, self.burst, self.min_rate))
+            self._keys[api_key] = schedule
+        return schedule
+
+    async def acquire(self, api_key: str, priority: Optional[int] = None):
+        """
+        Wait until a call with this API key and priority may be sent
+
+        Args:
+            api_key (str): API key the call will use
+            priority (int, optional): INTERACTIVE or BACKGROUND; defaults to current_priority()
+        """
+        if priority is None:
+            priority = current_priority()
+        schedule = self._schedule_for(api_key)
+        lane = schedule.lanes[priority]
+
+        # Fast path: nobody of equal or higher priority is queued and a token is free
+        if not schedule.has_waiters(priority) and schedule.bucket.time_until_token() == 0:
+            schedule.bucket.take()
+            lane.record_wait(0.0)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        lane.max_depth = max(lane.max_depth, len(lane.waiters))
+        queued_at = time.monotonic()
+        self._ensure_dispatcher(schedule)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter in lane.waiters:
+                lane.waiters.remove(waiter)
+            raise
+        lane.record_wait(time.monotonic() - queued_at)
+
+    def _ensure_dispatcher(self, schedule: _KeySchedule):
+        """Start the dispatcher for a key if it isn't running"""
+        if schedule.dispatcher is None or schedule.dispatcher.done():
+            schedule.dispatcher = asyncio.create_task(self._dispatch(schedule))
+
+    async def _dispatch(self, schedule: _KeySchedule):
+        """Hand out tokens to waiting callers, highest priority first"""
+        while schedule.has_waiters():
+            delay = schedule.bucket.time_until_token()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            for priority in sorted(schedule.lanes):
+                lane = schedule.lanes[priority]
+                while lane.waiters and lane.waiters[0].done():
+                    lane.waiters.popleft()  # Cancelled while waiting
+                if lane.waiters:
+                    schedule.bucket.take()
+                    lane.waiters.popleft().set_result(None)
+                    break
+            # Let the released caller run before handing out the next token
+            await asyncio.sleep(0)
+
+    def record_response(self, api_key: str, status_code: int, retry_after: Optional[float] = None):
+        """
+        Feed a response back into the key's token bucket
+
+        Args:
+            api_key (str): API key the call used
+            status_code (int): HTTP status of the response
+            retry_after (float, optional): Seconds from the Retry-After header
+        """
+        bucket = self._schedule_for(api_key).bucket
+        if status_code == 429:
+            bucket.on_rate_limited(retry_after)
+        elif status_code < 500:
+            bucket.on_success()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return bucket state and per-class queue counters for every API key
+
+        Keys are shown by their last four characters only.
+        """
+        return {
+            f"...{(api_key or '')[-4:]}": {
+                "bucket": schedule.bucket.stats(),
+                "lanes": {PRIORITY_NAMES[p]: lane.stats() for p, lane in schedule.lanes.items()}
+            }
+            for api_key, schedule in self._keys.items()
+        }
@@ -0,0 +1,154 @@
+"""
+Priority Send Lanes for the ElevenLabs WebSocket
+
+ElevenLabs closes a conversation whose pings go unanswered. When every message
+went straight to websocket.send(), a pong sent during heavy speech queued up
+behind all the user_audio_chunk messages already waiting, and could miss its
+deadline. A PrioritySender puts one task in charge of the socket with two lanes:
+
+- CONTROL (pong, contextual_update, user_message, ...) is always sent next
+- AUDIO (user_audio_chunk) is sent only when no control message is waiting
+
+The sender awaits each send, and websocket.send() waits for the write buffer
+to drain, so at most one audio message (plus the socket's write buffer) is
+ever ahead of a control message.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+CONTROL = 0
+AUDIO = 1
+LANE_NAMES = {CONTROL: "control", AUDIO: "audio"}
+
+
+class PrioritySender:
+    """
+    Sends messages over one socket, control messages ahead of audio
+
+    Callers await their own message being sent and get its send error, if any.
+    """
+
+    def __init__(self, send: Callable[[Any], Awaitable[None]], metrics: Optional["SendLaneMetrics"] = None,
+                 prioritize: bool = True):
+        """
+        Args:
+            send (Callable): Coroutine function writing one message to the socket
+            metrics (SendLaneMetrics, optional): Shared counters to update
+            prioritize (bool): Serve the control lane first; False sends in arrival order
+        """
+        self._send = send
+        self.metrics = metrics or SendLaneMetrics()
+        self.prioritize = prioritize
+        self._lanes: Dict[int, Deque[Tuple[Any, int, float, asyncio.Future]]] = {CONTROL: deque(), AUDIO: deque()}
+        self._fifo: Deque[Tuple[Any, int, float, asyncio.Future]] = deque()
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def send(self, message: Any, lane: int = CONTROL):
+        """
+        Queue a message on a lane and wait until it has been sent
+
+        Args:
+            message (Any): Message for the socket
+            lane (int): CONTROL or AUDIO
+
+        Raises:
+            Exception: Whatever sending this message raised
+        """
+        future = asyncio.get_running_loop().create_future()
+        entry = (message, lane, time.monotonic(), future)
+        (self._lanes[lane] if self.prioritize else self._fifo).append(entry)
+        self.metrics.record_depth(lane, len(self._lanes[lane]) if self.prioritize else len(self._fifo))
+        self._ready.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        await future
+
+    def close(self):
+        """Stop sending; messages still queued fail with RuntimeError"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for queue in (self._lanes[CONTROL], self._lanes[AUDIO], self._fifo):
+            while queue:
+                future = queue.popleft()[3]
+                if not future.done():
+                    future.set_exception(RuntimeError("WebSocket not connected"))
+
+    def _next(self) -> Optional[Tuple[Any, int, float, asyncio.Future]]:
+        for queue in (self._lanes[CONTROL], self._lanes[AUDIO], self._fifo):
+            if queue:
+                return queue.popleft()
+        return None
+
+    async def _run(self):
+        while True:
+            entry = self._next()
+            if entry is None:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            message, lane, queued_at, future = entry
+            if future.cancelled():
+                continue
+            self.metrics.record_wait(lane, time.monotonic() - queued_at)
+            try:
+                await self._send(message)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_exception(RuntimeError("WebSocket not connected"))
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(None)
+
+
+class SendLaneMetrics:
+    """Counters for the send lanes of all sessions"""
+
+    def __init__(self):
+        self.sent: Dict[int, int] = {CONTROL: 0, AUDIO: 0}
+        self.max_depth: Dict[int, int] = {CONTROL: 0, AUDIO: 0}
+        self._waits: Dict[int, Deque[float]] = {CONTROL: deque(maxlen=1000), AUDIO: deque(maxlen=1000)}
+
+    def record_depth(self, lane: int, depth: int):
+        """Note how many messages a lane holds after a message was queued"""
+        if depth > self.max_depth[lane]:
+            self.max_depth[lane] = depth
+
+    def record_wait(self, lane: int, seconds: float):
+        """Count a message leaving its lane after waiting `seconds`"""
+        self.sent[lane] += 1
+        self._waits[lane].append(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return lane counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Per lane, messages sent, deepest backlog, and queueing
+                delay percentiles (ms) over the last 1000 messages
+        """
+        lanes = {}
+        for lane, name in LANE_NAMES.items():
+            waits = sorted(self._waits[lane])
+
+            def percentile(p: float) -> float:
+                if not waits:
+                    return 0.0
+                return round(1000 * waits[min(len(waits) - 1, int(p * len(waits)))], 3)
+
+            lanes[name] = {
+                "sent": self.sent[lane],
+                "max_depth": self.max_depth[lane],
+                "wait_ms_p50": percentile(0.5),
+                "wait_ms_p99": percentile(0.99),
+                "wait_ms_max": round(1000 * waits[-1], 3) if waits else 0.0
+            }
+        return lanes
@@ -0,0 +1,83 @@
+"""
+Single-Flight Request Coalescing
+
+When a whole class opens the sketchbook at the same moment, we get many
+identical ElevenLabs reads at once. A SingleFlight group makes concurrent
+callers with the same key wait for one in-flight call and share its result
+(or its error) instead of each making their own request.
+
+Only calls that overlap in time are coalesced; nothing is cached once the
+call finishes.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that have the same key
+
+    Attributes:
+        calls (int): Calls made through the group
+        executions (int): Calls that actually ran the function
+        coalesced (int): Calls that joined an in-flight execution instead
+    """
+
+    def __init__(self):
+        """Initialize the group with no calls in flight"""
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a call, or join the identical call that is already running
+
+        Callers share the same result object, so they must not mutate it.
+
+        Args:
+            key (Hashable): Identifies identical calls (e.g. endpoint and arguments)
+            function (Callable): Zero-argument coroutine function making the call
+
+        Returns:
+            Any: The result of the (shared) call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.create_task(self._run(key, function))
+            # Mark the exception as retrieved even if every caller went away
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._in_flight[key] = task
+        else:
+            self.coalesced += 1
+
+        # Shield the shared call so one cancelled caller doesn't cancel it for the others
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """Run the function and forget the key once it finishes"""
+        try:
+            return await function()
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return coalescing counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Calls, executions, coalesced calls and calls in flight
+        """
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
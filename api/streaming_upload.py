@@ -0,0 +1,90 @@
+"""
+Streaming Uploads
+
+This module pipes an uploaded file to ElevenLabs in fixed-size chunks
+instead of reading it fully into memory. FastAPI already spools large
+uploads to a temporary file on disk, so by reading that file chunk by chunk
+and handing the chunks to the multipart writer, each upload only holds about
+one chunk in memory no matter how large the PDF is.
+
+It also keeps counters for the streaming path so we can see how many bytes
+are in flight across all uploads and how large any single buffer got.
+"""
+
+from typing import AsyncIterator, Dict, Any
+
+from fastapi import UploadFile
+
+
+class UploadStreamMetrics:
+    """
+    Tracks memory use of streaming uploads
+
+    Attributes:
+        active_uploads (int): Uploads currently streaming
+        bytes_in_flight (int): Bytes read from disk but not yet handed to the socket
+        peak_bytes_in_flight (int): Highest bytes_in_flight seen
+        peak_buffer_bytes (int): Largest single chunk held by one upload
+        total_bytes_streamed (int): Bytes streamed since startup
+        completed_uploads (int): Streams that reached the end of their file
+    """
+
+    def __init__(self):
+        """Initialize all counters to zero"""
+        self.active_uploads = 0
+        self.bytes_in_flight = 0
+        self.peak_bytes_in_flight = 0
+        self.peak_buffer_bytes = 0
+        self.total_bytes_streamed = 0
+        self.completed_uploads = 0
+
+    async def stream(self, upload_file: UploadFile, chunk_size: int) -> AsyncIterator[bytes]:
+        """
+        Yield the content of an uploaded file in chunks
+
+        The file is read from its current position, so call
+        `await upload_file.seek(0)` first if it has been read before.
+
+        Args:
+            upload_file (UploadFile): The spooled upload from FastAPI
+            chunk_size (int): Maximum bytes to read per chunk
+
+        Yields:
+            bytes: The next chunk of the file
+        """
+        self.active_uploads += 1
+        try:
+            while True:
+                chunk = await upload_file.read(chunk_size)
+                if not chunk:
+                    self.completed_uploads += 1
+                    break
+
+                chunk_length = len(chunk)
+                self.bytes_in_flight += chunk_length
+                self.peak_bytes_in_flight = max(self.peak_bytes_in_flight, self.bytes_in_flight)
+                self.peak_buffer_bytes = max(self.peak_buffer_bytes, chunk_length)
+                try:
+                    # The consumer asks for the next chunk once this one is written
+                    yield chunk
+                finally:
+                    self.bytes_in_flight -= chunk_length
+                self.total_bytes_streamed += chunk_length
+        finally:
+            self.active_uploads -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return streaming counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Current and peak buffer usage
+        """
+        return {
+            "active_uploads": self.active_uploads,
+            "bytes_in_flight": self.bytes_in_flight,
+            "peak_bytes_in_flight": self.peak_bytes_in_flight,
+            "peak_buffer_bytes": self.peak_buffer_bytes,
+            "total_bytes_streamed": self.total_bytes_streamed,
+            "completed_uploads": self.completed_uploads
+        }
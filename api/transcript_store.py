@@ -0,0 +1,262 @@
+"""
+Local Transcript Store
+
+A finished conversation never changes, so once we have fetched its transcript
+from ElevenLabs there is no reason to fetch it again. This module keeps
+completed transcripts on local disk in SQLite (WAL mode, so reads don't block
+the writer) with a small LRU memory tier on top.
+
+Both tiers are bounded by a byte budget:
+- Memory: least recently used transcripts are dropped from memory
+- Disk: least recently accessed rows are deleted from the database
+
+Access times for the disk LRU are collected in memory and written in
+batches (before evicting, or every ACCESS_FLUSH_BATCH reads or
+ACCESS_FLUSH_INTERVAL seconds), so a disk read is not also a disk write.
+
+Transcripts of conversations that are still running are never stored, so
+those keep coming from ElevenLabs.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# ElevenLabs statuses after which a conversation's transcript is final
+COMPLETED_STATUSES = {"done", "failed"}
+
+# Pending access times are written once this many have built up, or this many seconds passed
+ACCESS_FLUSH_BATCH = 256
+ACCESS_FLUSH_INTERVAL = 60.0
+
+
+def is_completed(transcript: Dict[str, Any]) -> bool:
+    """Return True if a transcript belongs to a conversation that has ended"""
+    return isinstance(transcript, dict) and transcript.get("status") in COMPLETED_STATUSES
+
+
+class TranscriptStore:
+    """
+    Two-tier (memory LRU + SQLite) store for completed transcripts
+
+    This class handles:
+    - Reading transcripts from memory, then disk
+    - Storing completed transcripts on both tiers
+    - Evicting by size budget on both tiers
+    - Hit/miss counters for monitoring
+
+    SQLite calls run in the default thread pool so the event loop never
+    waits on disk I/O.
+    """
+
+    def __init__(self, db_path: str, memory_budget: int, disk_budget: int):
+        """
+        Args:
+            db_path (str): Path of the SQLite database file
+            memory_budget (int): Maximum bytes of transcript JSON kept in memory
+            disk_budget (int): Maximum bytes of transcript JSON kept on disk
+        """
+        self.db_path = db_path
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+
+        self._memory: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        # conversation_id -> last access time not yet written to disk
+        self._pending_access: Dict[str, float] = {}
+        self._access_flushed_at = time.monotonic()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS transcripts (
+                conversation_id TEXT PRIMARY KEY,
+                agent_id TEXT,
+                data TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS transcripts_last_access ON transcripts (last_access)")
+        self._db.commit()
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+
+        # Metrics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.skipped_incomplete = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+        self.access_flushes = 0
+
+    async def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a stored transcript, or None if we don't have it
+
+        Args:
+            conversation_id (str): ID of the conversation
+
+        Returns:
+            Optional[Dict[str, Any]]: The transcript, or None on a miss
+        """
+        cached = self._memory.get(conversation_id)
+        if cached is not None:
+            self._memory.move_to_end(conversation_id)
+            self.memory_hits += 1
+            return cached[0]
+
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, self._read_row, conversation_id)
+        if data is None:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        transcript = json.loads(data)
+        self._remember(conversation_id, transcript, len(data))
+        return transcript
+
+    async def put(self, conversation_id: str, transcript: Dict[str, Any]) -> bool:
+        """
+        Store a transcript if its conversation has ended
+
+        Args:
+            conversation_id (str): ID of the conversation
+            transcript (dict): Transcript as returned by ElevenLabs
+
+        Returns:
+            bool: True if stored, False if the conversation is still in progress
+        """
+        if not is_completed(transcript):
+            self.skipped_incomplete += 1
+            return False
+        if conversation_id in self._memory:
+            # Already stored (e.g. by another caller that shared the same fetch)
+            return True
+
+        data = json.dumps(transcript)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, self._write_row, conversation_id, transcript.get("agent_id"), data
+        )
+        self._remember(conversation_id, transcript, len(data))
+        self.stored += 1
+        return True
+
+    def _remember(self, conversation_id: str, transcript: Dict[str, Any], size: int):
+        """Put a transcript in the memory tier and evict down to the memory budget"""
+        if size > self.memory_budget:
+            return
+        previous = self._memory.pop(conversation_id, None)
+        if previous is not None:
+            self._memory_bytes -= previous[1]
+        self._memory[conversation_id] = (transcript, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_budget:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self.memory_evictions += 1
+
+    def _read_row(self, conversation_id: str) -> Optional[str]:
+        """Read a transcript row and note its access time (runs in a worker thread)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM transcripts WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._pending_access[conversation_id] = time.time()
+            if (len(self._pending_access) >= ACCESS_FLUSH_BATCH
+                    or time.monotonic() - self._access_flushed_at >= ACCESS_FLUSH_INTERVAL):
+                self._flush_access()
+                self._db.commit()
+            return row[0]
+
+    def _flush_access(self):
+        """Write the pending access times in one statement (caller holds the lock and commits)"""
+        self._access_flushed_at = time.monotonic()
+        if not self._pending_access:
+            return
+        self._db.executemany(
+            "UPDATE transcripts SET last_access = ? WHERE conversation_id = ?",
+            [(accessed_at, conversation_id) for conversation_id, accessed_at in self._pending_access.items()]
+        )
+        self._pending_access.clear()
+        self.access_flushes += 1
+
+    def _write_row(self, conversation_id: str, agent_id: Optional[str], data: str):
+        """Insert or replace a transcript row and evict down to the disk budget (runs in a worker thread)"""
+        now = time.time()
+        size = len(data)
+        with self._lock:
+            previous = self._db.execute(
+                "SELECT size FROM transcripts WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+            if previous is not None:
+                self._disk_bytes -= previous[0]
+            self._db.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?, ?)",
+                (conversation_id, agent_id, data, size, now, now)
+            )
+            self._disk_bytes += size
+
+            while self._disk_bytes > self.disk_budget:
+                # Evict by up-to-date access times
+                self._flush_access()
+                oldest = self._db.execute(
+                    "SELECT conversation_id, size FROM transcripts ORDER BY last_access LIMIT 1"
+                ).fetchone()
+                if oldest is None or oldest[0] == conversation_id:
+                    break
+                self._db.execute("DELETE FROM transcripts WHERE conversation_id = ?", (oldest[0],))
+                self._disk_bytes -= oldest[1]
+                self.disk_evictions += 1
+            self._db.commit()
+
+    def close(self):
+        """Write pending access times and close the database connection"""
+        with self._lock:
+            self._flush_access()
+            self._db.commit()
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return store counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Tier sizes, hit/miss counters and evictions
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_budget_bytes": self.memory_budget,
+            "disk_bytes": self._disk_bytes,
+            "disk_budget_bytes": self.disk_budget,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "stored": self.stored,
+            "skipped_incomplete": self.skipped_incomplete,
+            "memory_evictions": self.memory_evictions,
+            "disk_evictions": self.disk_evictions,
+            "pending_access_updates": len(self._pending_access),
+            "access_flushes": self.access_flushes
+        }
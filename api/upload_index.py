@@ -0,0 +1,183 @@
+"""
+Story Upload Index
+
+This module keeps a small persistent index of the stories we have already
+uploaded to the ElevenLabs knowledge base, keyed by the SHA-256 hash of the
+file content. When the same PDF is uploaded again we can hand back the
+existing knowledge base instead of uploading it a second time.
+
+The index is a JSON file in the data folder. It is small (one entry per
+distinct story) so it is loaded fully into memory and rewritten atomically
+on every change.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Optional, Dict, Any, Tuple
+
+from fastapi import UploadFile
+
+
+def hash_content(file_content: bytes) -> str:
+    """
+    Compute the content hash used as the index key
+
+    Args:
+        file_content (bytes): Raw file content
+
+    Returns:
+        str: Hex encoded SHA-256 digest
+    """
+    return hashlib.sha256(file_content).hexdigest()
+
+
+async def hash_upload_file(upload_file: UploadFile, chunk_size: int) -> Tuple[str, int]:
+    """
+    Compute the content hash of an uploaded file without loading it into memory
+
+    The file is read in chunks from the start and rewound afterwards so it
+    can be streamed again.
+
+    Args:
+        upload_file (UploadFile): The spooled upload from FastAPI
+        chunk_size (int): Bytes to read per chunk
+
+    Returns:
+        Tuple[str, int]: Hex encoded SHA-256 digest and file size in bytes
+    """
+    digest = hashlib.sha256()
+    file_size = 0
+    await upload_file.seek(0)
+    while True:
+        chunk = await upload_file.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        file_size += len(chunk)
+    await upload_file.seek(0)
+    return digest.hexdigest(), file_size
+
+
+def shared_knowledge_base_name(index_key: str) -> str:
+    """
+    Return the name under which a deduplicated knowledge base is handed out
+
+    The knowledge base's real name contains the first uploader's user ID and
+    story name, so later uploaders of the same content get this stable name
+    derived from the index key instead.
+
+    Args:
+        index_key (str): Content hash, optionally prefixed with the upload mode ("text:...")
+
+    Returns:
+        str: e.g. "story_9f2c41d07a3b" or "story_text_9f2c41d07a3b"
+    """
+    mode, _, digest = index_key.rpartition(":")
+    prefix = f"story_{mode}_" if mode else "story_"
+    return f"{prefix}{digest[:12]}"
+
+
+class StoryUploadIndex:
+    """
+    Persistent map of content hash -> knowledge base entry
+
+    This class handles:
+    - Loading and saving the index file
+    - Looking up previous uploads by content hash
+    - Counting dedup hits and misses
+    """
+
+    def __init__(self, index_path: str):
+        """
+        Initialize the index and load any existing entries from disk
+
+        Args:
+            index_path (str): Path of the JSON index file
+        """
+        self.index_path = index_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.forced = 0
+        self._load()
+
+    def _load(self):
+        """Load the index file if it exists"""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            # A broken index only costs us extra uploads, so start fresh
+            print(f"⚠️ Could not read upload index {self.index_path}: {e}")
+            self.entries = {}
+
+    def _save(self):
+        """Write the index atomically (write to a temp file, then rename)"""
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(temp_path, self.index_path)
+
+    def lookup(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a previous upload with the same content and count the hit or miss
+
+        Args:
+            content_hash (str): Hash from hash_content()
+
+        Returns:
+            Optional[Dict[str, Any]]: The stored entry, or None if not found
+        """
+        entry = self.entries.get(content_hash)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def record(self, content_hash: str, result: Dict[str, Any], file_name: str, file_size: int):
+        """
+        Store the knowledge base created for a piece of content
+
+        Args:
+            content_hash (str): Hash from hash_content()
+            result (dict): Upload result from the ElevenLabs client
+            file_name (str): Original filename of the upload
+            file_size (int): Size of the upload in bytes
+        """
+        self.entries[content_hash] = {
+            "id": result["id"],
+            "name": result["name"],
+            "original_story_name": result.get("original_story_name"),
+            "user_id": result.get("user_id"),
+            "timestamp": result.get("timestamp"),
+            "document_type": result.get("document_type", "file"),
+            "shared_name": shared_knowledge_base_name(content_hash),
+            "file_name": file_name,
+            "file_size": file_size,
+            "indexed_at": datetime.now().isoformat()
+        }
+        self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return dedup counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Entry count, hits, misses, forced re-uploads and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "forced_reuploads": self.forced,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,327 @@
+"""
+Streaming PDF Upload Validation
+
+FastAPI parses a multipart upload completely (spooling it to memory and
+then disk) before the route gets to look at it, and the client-supplied
+content type and size can't be trusted. This module validates PDF uploads
+while the request body is still arriving instead:
+
+- Content-Length above what the route can accept is rejected before any
+  of the body is read
+- Every file part must start with the %PDF magic bytes
+- File parts are counted byte by byte and the upload is aborted as soon as
+  one crosses MAX_FILE_SIZE
+- Encrypted PDFs (an /Encrypt entry) and truncated PDFs (no %%EOF near the
+  end) are rejected with cheap byte scans, without parsing the PDF
+
+A rejected upload is never fully buffered and never reaches ElevenLabs.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+# Extra bytes allowed on top of the file sizes for multipart framing and form fields
+MULTIPART_OVERHEAD = 65536
+
+# PDF readers accept the header anywhere in the first 1KB; so do we
+HEADER_WINDOW = 1024
+# The %%EOF marker must be within the last 1KB of the file
+TRAILER_WINDOW = 1024
+
+ENCRYPT_MARKER = b"/Encrypt"
+EOF_MARKER = b"%%EOF"
+PDF_MAGIC = b"%PDF-"
+
+
+class UploadRejected(Exception):
+    """
+    Raised when an upload fails validation
+
+    Attributes:
+        status_code (int): HTTP status to answer with (400 or 413)
+        reason (str): Short machine readable reason, used in metrics
+        detail (str): Human readable message for the client
+    """
+
+    def __init__(self, status_code: int, reason: str, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.reason = reason
+        self.detail = detail
+
+
+class PdfStreamValidator:
+    """
+    Validates one PDF as its bytes arrive
+
+    Only the first HEADER_WINDOW bytes, the last TRAILER_WINDOW bytes and a
+    few bytes of overlap between chunks are kept, whatever the file size.
+    """
+
+    def __init__(self, file_name: str, max_size: int):
+        """
+        Args:
+            file_name (str): Name of the uploaded file, used in error messages
+            max_size (int): Maximum accepted file size in bytes
+        """
+        self.file_name = file_name
+        self.max_size = max_size
+        self.size = 0
+        self._head = b""
+        self._tail = b""
+        self._header_checked = False
+
+    def feed(self, data: bytes):
+        """
+        Validate the next chunk of the file
+
+        Raises:
+            UploadRejected: If the file is too large, not a PDF or encrypted
+        """
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise UploadRejected(
+                413, "too_large",
+                f"{self.file_name}: File too large. Maximum size is {self.max_size / (1024 * 1024)}MB"
+            )
+
+        if not self._header_checked:
+            self._head += data[:HEADER_WINDOW - len(self._head)]
+            if len(self._head) >= HEADER_WINDOW:
+                self._check_header()
+
+        # Scan with a little overlap so a marker split across chunks is still found
+        window = self._tail[-len(ENCRYPT_MARKER):] + data
+        if ENCRYPT_MARKER in window:
+            raise UploadRejected(
+                400, "encrypted",
+                f"{self.file_name}: Encrypted PDFs are not supported"
+            )
+        self._tail = (self._tail + data)[-TRAILER_WINDOW:]
+
+    def finish(self):
+        """
+        Validate the end of the file
+
+        Raises:
+            UploadRejected: If the file is empty, not a PDF or truncated
+        """
+        if self.size == 0:
+            raise UploadRejected(400, "empty", f"{self.file_name}: File is empty")
+        if not self._header_checked:
+            self._check_header()
+        if EOF_MARKER not in self._tail:
+            raise UploadRejected(
+                400, "corrupt",
+                f"{self.file_name}: PDF is corrupt or truncated (no end-of-file marker)"
+            )
+
+    def _check_header(self):
+        """Check for the %PDF magic bytes at the start of the file"""
+        self._header_checked = True
+        if PDF_MAGIC not in self._head:
+            raise UploadRejected(
+                400, "not_pdf",
+                f"{self.file_name}: File is not a PDF (missing %PDF header)"
+            )
+
+
+class _MultipartValidator:
+    """Feeds a multipart body through a parser and validates every file part"""
+
+    def __init__(self, boundary: bytes, max_files: int, max_file_size: int):
+        self.max_files = max_files
+        self.max_file_size = max_file_size
+        self.files = 0
+        self.bytes_received = 0
+        self.error: Optional[UploadRejected] = None
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._validator: Optional[PdfStreamValidator] = None
+        self._parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def feed(self, chunk: bytes):
+        """
+        Validate the next chunk of the request body
+
+        Raises:
+            UploadRejected: If any file part fails validation
+        """
+        self.bytes_received += len(chunk)
+        self._parser.write(chunk)
+
+    def _on_part_begin(self):
+        self._headers = {}
+        self._validator = None
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        file_name = options.get(b"filename")
+        if file_name is None:
+            return  # A plain form field
+        self.files += 1
+        if self.files > self.max_files:
+            raise UploadRejected(400, "too_many_files", f"Too many files. Maximum is {self.max_files}")
+        self._validator = PdfStreamValidator(file_name.decode("utf-8", "replace"), self.max_file_size)
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._validator is not None:
+            self._validator.feed(data[start:end])
+
+    def _on_part_end(self):
+        if self._validator is not None:
+            self._validator.finish()
+            self._validator = None
+
+
+class UploadValidationMetrics:
+    """Counters for streaming upload validation"""
+
+    def __init__(self):
+        self.checked_uploads = 0
+        self.checked_files = 0
+        self.rejected: Dict[str, int] = {}
+        self.bytes_read_before_reject = 0
+
+    def record_rejection(self, reason: str, bytes_read: int):
+        """Count a rejected upload and how much of it we had to read"""
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        self.bytes_read_before_reject += bytes_read
+
+    def stats(self) -> Dict[str, Any]:
+        """Return validation counters for monitoring"""
+        return {
+            "checked_uploads": self.checked_uploads,
+            "checked_files": self.checked_files,
+            "rejected": dict(self.rejected),
+            "bytes_read_before_reject": self.bytes_read_before_reject
+        }
+
+
+class PdfUploadGuard:
+    """
+    ASGI middleware that validates PDF uploads while the body streams in
+
+    The request body is passed to the application unchanged and parsed a
+    second time on the side. When a file fails validation the application
+    is told the client disconnected (so it stops reading), and the client
+    gets a 400 or 413 JSON error in the usual {"detail": ...} format.
+    """
+
+    def __init__(self, app, metrics: UploadValidationMetrics, max_files_by_path: Dict[str, int],
+                 max_file_size: int):
+        """
+        Args:
+            app: The ASGI application to wrap
+            metrics (UploadValidationMetrics): Counters to update
+            max_files_by_path (dict): Upload path -> maximum PDF files per request
+            max_file_size (int): Maximum size of each PDF in bytes
+        """
+        self.app = app
+        self.metrics = metrics
+        self.max_files_by_path = max_files_by_path
+        self.max_file_size = max_file_size
+
+    async def __call__(self, scope, receive, send):
+        max_files = self.max_files_by_path.get(scope.get("path")) if scope["type"] == "http" else None
+        if max_files is None or scope.get("method") != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_type, options = parse_options_header(headers.get(b"content-type", b""))
+        boundary = options.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            await self.app(scope, receive, send)
+            return
+
+        self.metrics.checked_uploads += 1
+        content_length = _parse_content_length(headers.get(b"content-length"))
+        max_body = max_files * self.max_file_size + MULTIPART_OVERHEAD
+        if content_length is not None and content_length > max_body:
+            self.metrics.record_rejection("content_length", 0)
+            await _send_error(send, 413, f"Upload too large. Maximum is {max_files} file(s) of "
+                                         f"{self.max_file_size / (1024 * 1024)}MB each")
+            return
+
+        validator = _MultipartValidator(boundary, max_files, self.max_file_size)
+        response_started = False
+
+        async def validating_receive():
+            if validator.error is not None:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                try:
+                    validator.feed(message.get("body", b""))
+                except UploadRejected as e:
+                    validator.error = e
+                    return {"type": "http.disconnect"}
+                if not message.get("more_body", False):
+                    self.metrics.checked_files += validator.files
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if validator.error is not None:
+                return  # Our own error response replaces whatever the app answers
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, validating_receive, guarded_send)
+        except Exception:
+            if validator.error is None:
+                raise
+
+        if validator.error is not None and not response_started:
+            error = validator.error
+            self.metrics.checked_files += validator.files
+            self.metrics.record_rejection(error.reason, validator.bytes_received)
+            print(f"⚠️ Rejected upload: {error.detail}")
+            await _send_error(send, error.status_code, error.detail)
+
+
+def _parse_content_length(value: Optional[bytes]) -> Optional[int]:
+    """Return the Content-Length header as an int, or None if missing or invalid"""
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def _send_error(send, status_code: int, detail: str):
+    """Send a JSON error response in FastAPI's HTTPException format"""
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+            (b"connection", b"close")
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
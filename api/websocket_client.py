@@ -9,10 +9,17 @@ https://elevenlabs.io/docs/conversational-ai/api-reference/conversational-ai/web
 """
 
 import asyncio
+import time
 import websockets
 import json
 import base64
-from typing import Optional, Dict, Any, Callable
+from typing import Optional, Dict, Any, Awaitable, Callable
+from api.send_lanes import AUDIO, CONTROL, PrioritySender, SendLaneMetrics
+from api.ws_codec import WebSocketCodec, get_codec
+from api.ws_events import (
+    AgentResponseEvent, AudioEvent, ConversationStartedEvent, Event, EventBus, EventMetrics,
+    PingEvent, UnknownEvent, UserTranscriptEvent, parse_event
+)
 from config import Config
 
 class ElevenLabsWebSocketClient:
@@ -26,16 +33,25 @@ class ElevenLabsWebSocketClient:
     - Error handling and reconnection
     """
     
-    def __init__(self, agent_id: str):
+    def __init__(self, agent_id: str, codec: Optional[WebSocketCodec] = None,
+                 event_metrics: Optional[EventMetrics] = None, send_metrics: Optional[SendLaneMetrics] = None):
         """
         Initialize the WebSocket client
         
         Args:
             agent_id (str): The ElevenLabs agent ID to connect to
+            codec (WebSocketCodec, optional): JSON codec for messages (the fastest installed by default)
+            event_metrics (EventMetrics, optional): Event counters shared with other sessions
+            send_metrics (SendLaneMetrics, optional): Send lane counters shared with other sessions
         """
         self.agent_id = agent_id
         self.websocket = None
         self.is_connected = False
+        self.codec = codec or get_codec()
+        
+        # Set from the conversation initiation metadata once the conversation starts
+        self.conversation_id: Optional[str] = None
+        self.conversation_started_at: Optional[float] = None
         
         # WebSocket URL from ElevenLabs documentation
         self.ws_url = f"wss://api.elevenlabs.io/v1/convai/conversation?agent_id={agent_id}"
@@ -53,6 +69,26 @@ class ElevenLabsWebSocketClient:
         self.on_connected: Optional[Callable] = None
         self.on_disconnected: Optional[Callable] = None
         
+        # When set, on_audio_received gets agent audio as the base64 string
+        # ElevenLabs sent instead of decoded bytes
+        self.audio_passthrough = False
+        
+        # Optional function returning context for a user transcript (or None);
+        # its result is sent to the agent as a contextual update
+        self.context_provider: Optional[Callable[[str], Optional[str]]] = None
+        self._last_context: Optional[str] = None
+        
+        # Subscribers per ElevenLabs message type; the client's own handlers come first
+        self.events = EventBus(queue_size=Config.WS_SUBSCRIBER_QUEUE_SIZE, metrics=event_metrics)
+        self.events.subscribe("conversation_initiation_metadata", self._on_conversation_started)
+        self.events.subscribe("ping", self._on_ping)
+        self.events.subscribe("user_transcript", self._on_user_transcript)
+        self.events.subscribe("agent_response", self._on_agent_response)
+        self.events.subscribe("audio", self._on_audio)
+        
+        # Outgoing messages: control messages (pong first of all) go ahead of queued audio
+        self._sender = PrioritySender(lambda message_str: self.websocket.send(message_str), metrics=send_metrics)
+        
     async def connect(self, conversation_config: Optional[Dict[str, Any]] = None):
         """
         Establish WebSocket connection and send initial configuration
@@ -140,11 +176,26 @@ class ElevenLabsWebSocketClient:
         # Encode audio data as base64
         audio_base64 = base64.b64encode(audio_data).decode('utf-8')
         
+        await self._send_text(self.codec.encode_audio_chunk(audio_base64), "user_audio_chunk", lane=AUDIO)
+    
+    async def send_audio_base64(self, audio_base64: str):
+        """
+        Send audio that is already base64 encoded to the AI agent
+        
+        The string is forwarded as is, without decoding and re-encoding it.
+        
+        Args:
+            audio_base64 (str): Base64 encoded audio data
+        """
+        if not self.is_connected:
+            raise RuntimeError("WebSocket not connected")
+        
+        # The string comes from a client, so it goes through the JSON encoder to be escaped
         message = {
             "user_audio_chunk": audio_base64
         }
         
-        await self._send_message(message)
+        await self._send_text(self.codec.dumps(message), "user_audio_chunk", lane=AUDIO)
     
     async def send_text_message(self, text: str):
         """
@@ -182,18 +233,30 @@ class ElevenLabsWebSocketClient:
     
     async def _send_message(self, message: Dict[str, Any]):
         """
-        Send a message through the WebSocket
+        Send a control message through the WebSocket
         
         Args:
             message (dict): Message to send
         """
+        await self._send_text(self.codec.dumps(message), message.get('type', 'unknown'))
+    
+    async def _send_text(self, message_str: str, message_type: str, lane: int = CONTROL):
+        """
+        Send an encoded message through the WebSocket
+        
+        Control messages are sent before any audio still waiting in the audio lane.
+        
+        Args:
+            message_str (str): JSON message
+            message_type (str): Message type, for logging
+            lane (int): CONTROL, or AUDIO for user_audio_chunk messages
+        """
         if not self.is_connected or not self.websocket:
             raise RuntimeError("WebSocket not connected")
             
         try:
-            message_str = json.dumps(message)
-            print(f"📤 Sending message: {message.get('type', 'unknown')}")
-            await self.websocket.send(message_str)
+            print(f"📤 Sending message: {message_type}")
+            await self._sender.send(message_str, lane)
         except Exception as e:
             print(f"❌ Error sending message: {e}")
             self.is_connected = False
@@ -231,62 +294,112 @@ class ElevenLabsWebSocketClient:
         """
         Handle incoming messages from ElevenLabs
         
+        Each message is turned into a typed event (see api.ws_events) and
+        published to its subscribers. Audio messages, the bulk of the traffic,
+        are recognized without a full JSON parse when the codec can slice the
+        audio out directly.
+        
         Args:
             message (str): JSON message from WebSocket
         """
         try:
-            data = json.loads(message)
-            message_type = data.get("type")
+            event = None
+            if self.codec.peek_type(message) == "audio":
+                audio_base64 = self.codec.audio_payload(message)
+                if audio_base64 is not None:
+                    event = AudioEvent(audio_base64)
+            if event is None:
+                event = parse_event(self.codec.loads(message))
             
-            if message_type == "conversation_initiation_metadata":
-                # Conversation started successfully
-                metadata = data.get("conversation_initiation_metadata_event", {})
-                conversation_id = metadata.get("conversation_id")
-                print(f"✅ Conversation started: {conversation_id}")
-                
-            elif message_type == "user_transcript":
-                # User speech was transcribed
-                transcript_event = data.get("user_transcription_event", {})
-                transcript = transcript_event.get("user_transcript")
-                if self.on_transcript_received and transcript:
-                    await self.on_transcript_received(transcript)
-                    
-            elif message_type == "agent_response":
-                # AI agent responded with text
-                response_event = data.get("agent_response_event", {})
-                response = response_event.get("agent_response")
-                if self.on_agent_response and response:
-                    await self.on_agent_response(response)
-                    
-            elif message_type == "audio":
-                # AI agent responded with audio
-                audio_event = data.get("audio_event", {})
-                audio_base64 = audio_event.get("audio_base_64")
-                if self.on_audio_received and audio_base64:
-                    # Decode base64 audio
-                    audio_data = base64.b64decode(audio_base64)
-                    await self.on_audio_received(audio_data)
-                    
-            elif message_type == "ping":
-                # Respond to ping with pong
-                ping_event = data.get("ping_event", {})
-                event_id = ping_event.get("event_id")
-                await self._send_pong(event_id)
-                
-            elif message_type == "vad_score":
-                # Voice Activity Detection score (can be used for UI feedback)
-                vad_event = data.get("vad_score_event", {})
-                vad_score = vad_event.get("vad_score")
-                # This could be used to show if the user is speaking
-                
-            else:
-                print(f"📨 Received unknown message type: {message_type}")
+            if isinstance(event, AudioEvent) and event.audio and not self.audio_passthrough:
+                # Decode base64 audio once for all subscribers
+                event.audio = base64.b64decode(event.audio)
+            elif isinstance(event, UnknownEvent):
+                print(f"📨 Received unknown message type: {event.message_type}")
+            
+            await self.events.publish(event)
                 
         except json.JSONDecodeError as e:
             print(f"❌ Failed to parse WebSocket message: {e}")
         except Exception as e:
             print(f"❌ Error handling message: {e}")
     
+    def subscribe(self, message_type: str, handler: Callable[[Event], Awaitable[None]], background: bool = False):
+        """
+        Call handler with every event of a message type
+        
+        Handlers run in the listener by default, so they should be quick;
+        pass background=True for anything slow (storage, network calls).
+        
+        Args:
+            message_type (str): ElevenLabs message type, e.g. "interruption", or ALL_EVENTS
+            handler (Callable): Coroutine function taking the event
+            background (bool): Run the handler in its own task instead of in the listener
+        """
+        self.events.subscribe(message_type, handler, background=background)
+    
+    async def _on_conversation_started(self, event: ConversationStartedEvent):
+        # Conversation started successfully
+        self.conversation_id = event.conversation_id
+        self.conversation_started_at = time.time()
+        print(f"✅ Conversation started: {event.conversation_id}")
+    
+    async def _on_user_transcript(self, event: UserTranscriptEvent):
+        # User speech was transcribed
+        if self.on_transcript_received and event.text:
+            await self.on_transcript_received(event.text)
+        if self.context_provider and event.text:
+            await self._send_context_for(event.text)
+    
+    async def _on_agent_response(self, event: AgentResponseEvent):
+        # AI agent responded with text
+        if self.on_agent_response and event.text:
+            await self.on_agent_response(event.text)
+    
+    async def _on_audio(self, event: AudioEvent):
+        # AI agent responded with audio (base64 text in pass-through mode)
+        if self.on_audio_received and event.audio:
+            await self.on_audio_received(event.audio)
+    
+    async def _on_ping(self, event: PingEvent):
+        # Respond to ping with pong
+        await self._send_pong(event.event_id)
+    
+    async def _send_context_for(self, transcript: str):
+        """
+        Send the context_provider's context for a user transcript as a contextual update
+        
+        The same context is not sent twice in a row.
+        
+        Args:
+            transcript (str): What the user just said
+        """
+        context = self.context_provider(transcript)
+        if context and context != self._last_context:
+            self._last_context = context
+            await self.send_contextual_update(context)
+    
+    async def send_client_tool_result(self, tool_call_id: str, result: str, is_error: bool = False):
+        """
+        Answer a client_tool_call from the AI agent
+        
+        Args:
+            tool_call_id (str): ID from the client_tool_call event
+            result (str): Tool output, or the error message
+            is_error (bool): Whether the tool call failed
+        """
+        if not self.is_connected:
+            raise RuntimeError("WebSocket not connected")
+        
+        message = {
+            "type": "client_tool_result",
+            "tool_call_id": tool_call_id,
+            "result": result,
+            "is_error": is_error
+        }
+        
+        await self._send_message(message)
+    
     async def _send_pong(self, event_id: int):
         """
         Send pong response to ping
@@ -308,6 +421,8 @@ class ElevenLabsWebSocketClient:
             await self.websocket.close()
         
         self.is_connected = False
+        self.events.close()
+        self._sender.close()
         print("📡 WebSocket disconnected")
         
         if self.on_disconnected:
@@ -0,0 +1,164 @@
+"""
+WebSocket JSON Codec
+
+Every message on the WebSocket bridge is JSON, and most of them are audio:
+ElevenLabs sends agent audio as {"audio_event": {"audio_base_64": "..."}, "type": "audio"}
+and we send mic audio as {"user_audio_chunk": "..."}. This module keeps the
+JSON work on that hot path small:
+
+- a codec uses orjson when it is installed and the standard json module otherwise
+  (WS_JSON_CODEC picks one explicitly)
+- peek_type() reads a message's "type" from the start or end of the message
+  without parsing it
+- audio_payload() slices the base64 audio straight out of an audio message, and
+  encode_audio_chunk() / encode_frontend_audio() build audio messages by
+  concatenation, so audio never goes through an intermediate dict
+
+The fast paths only use single-character scans and short anchored matches, as
+scanning a 10KB base64 string for a multi-character pattern costs about as much
+as parsing the whole message. Anything they are not sure about falls back to
+a full parse.
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# "type" as the first key of the top-level object...
+_LEADING_TYPE = re.compile(r'\s*\{\s*"type"\s*:\s*"([A-Za-z0-9_]*)"')
+# ...or as its last key
+_TRAILING_TYPE = re.compile(r'"type"\s*:\s*"([A-Za-z0-9_]*)"\s*\}\s*$')
+# How far into the message to look for "type" or "audio_base_64"
+_PEEK_WINDOW = 128
+# What follows the "audio_base_64" key up to the opening quote of its value
+_VALUE_START = re.compile(r'\s*:\s*"')
+
+
+class WebSocketCodec:
+    """
+    JSON encoder/decoder for WebSocket messages
+
+    Args:
+        name (str): Codec name reported in stats
+        loads (Callable): Parses a str or bytes message
+        dumps (Callable): Serializes a message to a str
+    """
+
+    def __init__(self, name: str, loads: Callable[[Union[str, bytes]], Any], dumps: Callable[[Any], str]):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    @staticmethod
+    def peek_type(message: Union[str, bytes]) -> Optional[str]:
+        """
+        Read a message's type without parsing it
+
+        Only the first and last key of the top-level object are looked at, so
+        a "type" key in a nested event can't be mistaken for the message type.
+
+        Args:
+            message (Union[str, bytes]): Raw JSON message
+
+        Returns:
+            Optional[str]: The message type, or None if it can't be told cheaply
+        """
+        if isinstance(message, bytes):
+            message = message.decode("utf-8")
+        match = _LEADING_TYPE.match(message) or _TRAILING_TYPE.search(message, max(len(message) - _PEEK_WINDOW, 0))
+        return match.group(1) if match else None
+
+    @staticmethod
+    def audio_payload(message: Union[str, bytes]) -> Optional[str]:
+        """
+        Slice the base64 audio out of an ElevenLabs audio message
+
+        Args:
+            message (Union[str, bytes]): Raw JSON audio message
+
+        Returns:
+            Optional[str]: The audio_base_64 string, or None if the message needs a full parse
+        """
+        if isinstance(message, bytes):
+            message = message.decode("utf-8")
+        key = message.find('"audio_base_64"', 0, _PEEK_WINDOW)
+        if key < 0:
+            return None
+        value = _VALUE_START.match(message, key + 15)
+        if not value:
+            return None
+        start = value.end()
+        end = message.find('"', start)
+        if end < 0:
+            return None
+        audio_base64 = message[start:end]
+        # Escaped characters (e.g. "\/") are legal JSON but need the real parser
+        if "\\" in audio_base64:
+            return None
+        return audio_base64
+
+    def encode_audio_chunk(self, audio_base64: str) -> str:
+        """
+        Build a user_audio_chunk message for ElevenLabs
+
+        The audio is not escaped, so it must be base64 we encoded or checked;
+        use dumps() for base64 from a client.
+
+        Args:
+            audio_base64 (str): Base64 encoded audio
+
+        Returns:
+            str: JSON message
+        """
+        return '{"user_audio_chunk":"' + audio_base64 + '"}'
+
+    def encode_frontend_audio(self, field: str, audio_text: str) -> str:
+        """
+        Build an audio message for the browser
+
+        Args:
+            field (str): "audio_data" (hex) or "audio_base_64"
+            audio_text (str): Hex from bytes.hex() or base64 from ElevenLabs (not escaped)
+
+        Returns:
+            str: JSON message
+        """
+        return '{"type":"audio","' + field + '":"' + audio_text + '"}'
+
+
+def _orjson_dumps(message: Any) -> str:
+    # orjson returns bytes, but WebSocket text frames need a str
+    return orjson.dumps(message).decode("utf-8")
+
+
+CODECS: Dict[str, Callable[[], WebSocketCodec]] = {
+    "json": lambda: WebSocketCodec("json", json.loads, json.dumps),
+    "orjson": lambda: WebSocketCodec("orjson", orjson.loads, _orjson_dumps),
+}
+
+
+def get_codec(name: str = "auto") -> WebSocketCodec:
+    """
+    Create a codec by name
+
+    Args:
+        name (str): "json", "orjson", or "auto" for the fastest one installed
+
+    Returns:
+        WebSocketCodec: The codec
+
+    Raises:
+        ValueError: If the codec is unknown or its library isn't installed
+    """
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name not in CODECS:
+        raise ValueError(f"Unknown WebSocket JSON codec: {name}")
+    if name == "orjson" and orjson is None:
+        raise ValueError("WS_JSON_CODEC=orjson but orjson is not installed")
+    return CODECS[name]()
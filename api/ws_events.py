@@ -0,0 +1,361 @@
+"""
+ElevenLabs WebSocket Events
+
+Messages from the ElevenLabs conversation WebSocket are turned into small
+typed event objects and handed to subscribers:
+
+- EVENT_PARSERS maps each message type to a function that builds its event;
+  a new type is supported by adding one @parser function
+- An EventBus lets any number of subscribers listen to a message type (or to
+  every type with ALL_EVENTS), e.g. one forwarding to the browser, one
+  recording metrics
+- Subscribers registered with background=True get events through their own
+  bounded queue and task, so a slow subscriber never holds up the listener
+  (and with it audio delivery); if its queue is full, events for it are dropped
+
+Message types without a parser become an UnknownEvent, which ALL_EVENTS
+subscribers still receive.
+
+Based on the ElevenLabs WebSocket API documentation:
+https://elevenlabs.io/docs/conversational-ai/api-reference/conversational-ai/websocket
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+# Subscribe to this to receive every event
+ALL_EVENTS = "*"
+
+
+class Event:
+    """Base class for ElevenLabs events; `type` is the message type it was parsed from"""
+    __slots__ = ()
+    type = ""
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
+
+
+class ConversationStartedEvent(Event):
+    __slots__ = ("conversation_id", "agent_output_audio_format")
+    type = "conversation_initiation_metadata"
+
+    def __init__(self, conversation_id: Optional[str], agent_output_audio_format: Optional[str]):
+        self.conversation_id = conversation_id
+        self.agent_output_audio_format = agent_output_audio_format
+
+
+class UserTranscriptEvent(Event):
+    __slots__ = ("text",)
+    type = "user_transcript"
+
+    def __init__(self, text: Optional[str]):
+        self.text = text
+
+
+class AgentResponseEvent(Event):
+    __slots__ = ("text",)
+    type = "agent_response"
+
+    def __init__(self, text: Optional[str]):
+        self.text = text
+
+
+class AgentResponseCorrectionEvent(Event):
+    __slots__ = ("original", "corrected")
+    type = "agent_response_correction"
+
+    def __init__(self, original: Optional[str], corrected: Optional[str]):
+        self.original = original
+        self.corrected = corrected
+
+
+class TentativeAgentResponseEvent(Event):
+    __slots__ = ("text",)
+    type = "internal_tentative_agent_response"
+
+    def __init__(self, text: Optional[str]):
+        self.text = text
+
+
+class AudioEvent(Event):
+    """Agent audio; `audio` is base64 text when the client is in pass-through mode, bytes otherwise"""
+    __slots__ = ("audio", "event_id")
+    type = "audio"
+
+    def __init__(self, audio: Union[bytes, str, None], event_id: Optional[int] = None):
+        self.audio = audio
+        self.event_id = event_id
+
+
+class InterruptionEvent(Event):
+    __slots__ = ("event_id", "reason")
+    type = "interruption"
+
+    def __init__(self, event_id: Optional[int], reason: Optional[str]):
+        self.event_id = event_id
+        self.reason = reason
+
+
+class ClientToolCallEvent(Event):
+    __slots__ = ("tool_name", "tool_call_id", "parameters")
+    type = "client_tool_call"
+
+    def __init__(self, tool_name: Optional[str], tool_call_id: Optional[str], parameters: Dict[str, Any]):
+        self.tool_name = tool_name
+        self.tool_call_id = tool_call_id
+        self.parameters = parameters
+
+
+class PingEvent(Event):
+    __slots__ = ("event_id", "ping_ms")
+    type = "ping"
+
+    def __init__(self, event_id: Optional[int], ping_ms: Optional[int]):
+        self.event_id = event_id
+        self.ping_ms = ping_ms
+
+
+class VadScoreEvent(Event):
+    __slots__ = ("score",)
+    type = "vad_score"
+
+    def __init__(self, score: Optional[float]):
+        self.score = score
+
+
+class UnknownEvent(Event):
+    """A message type without a parser, with the whole message"""
+    __slots__ = ("message_type", "data")
+
+    def __init__(self, message_type: Optional[str], data: Dict[str, Any]):
+        self.message_type = message_type
+        self.data = data
+
+    @property
+    def type(self):
+        return self.message_type or "unknown"
+
+
+# Message type -> function building its event from the parsed message
+EVENT_PARSERS: Dict[str, Callable[[Dict[str, Any]], Event]] = {}
+
+
+def parser(message_type: str):
+    """Register the decorated function as the parser for a message type"""
+    def register(function: Callable[[Dict[str, Any]], Event]):
+        EVENT_PARSERS[message_type] = function
+        return function
+    return register
+
+
+@parser("conversation_initiation_metadata")
+def _parse_conversation_started(data):
+    metadata = data.get("conversation_initiation_metadata_event", {})
+    return ConversationStartedEvent(metadata.get("conversation_id"), metadata.get("agent_output_audio_format"))
+
+
+@parser("user_transcript")
+def _parse_user_transcript(data):
+    return UserTranscriptEvent(data.get("user_transcription_event", {}).get("user_transcript"))
+
+
+@parser("agent_response")
+def _parse_agent_response(data):
+    return AgentResponseEvent(data.get("agent_response_event", {}).get("agent_response"))
+
+
+@parser("agent_response_correction")
+def _parse_agent_response_correction(data):
+    correction = data.get("agent_response_correction_event", {})
+    return AgentResponseCorrectionEvent(
+        correction.get("original_agent_response"), correction.get("corrected_agent_response")
+    )
+
+
+@parser("internal_tentative_agent_response")
+def _parse_tentative_agent_response(data):
+    return TentativeAgentResponseEvent(
+        data.get("tentative_agent_response_internal_event", {}).get("tentative_agent_response")
+    )
+
+
+@parser("audio")
+def _parse_audio(data):
+    # Left as base64 here; the client decodes it unless it is in pass-through mode
+    audio_event = data.get("audio_event", {})
+    return AudioEvent(audio_event.get("audio_base_64"), audio_event.get("event_id"))
+
+
+@parser("interruption")
+def _parse_interruption(data):
+    interruption = data.get("interruption_event", {})
+    return InterruptionEvent(interruption.get("event_id"), interruption.get("reason"))
+
+
+@parser("client_tool_call")
+def _parse_client_tool_call(data):
+    call = data.get("client_tool_call", {})
+    return ClientToolCallEvent(call.get("tool_name"), call.get("tool_call_id"), call.get("parameters") or {})
+
+
+@parser("ping")
+def _parse_ping(data):
+    ping = data.get("ping_event", {})
+    return PingEvent(ping.get("event_id"), ping.get("ping_ms"))
+
+
+@parser("vad_score")
+def _parse_vad_score(data):
+    return VadScoreEvent(data.get("vad_score_event", {}).get("vad_score"))
+
+
+def parse_event(data: Dict[str, Any]) -> Event:
+    """
+    Build the event for a parsed ElevenLabs message
+
+    Args:
+        data (dict): Parsed JSON message
+
+    Returns:
+        Event: The typed event, or an UnknownEvent for types without a parser
+    """
+    message_type = data.get("type")
+    parse = EVENT_PARSERS.get(message_type)
+    if parse is None:
+        return UnknownEvent(message_type, data)
+    return parse(data)
+
+
+Subscriber = Callable[[Event], Awaitable[None]]
+
+
+class _BackgroundSubscriber:
+    """A subscriber fed through its own bounded queue and worker task"""
+
+    def __init__(self, handler: Subscriber, queue_size: int):
+        self.handler = handler
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def offer(self, event: Event, bus: "EventBus"):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run(bus))
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            bus.metrics.dropped += 1
+
+    async def _run(self, bus: "EventBus"):
+        while True:
+            event = await self.queue.get()
+            await bus._call(self.handler, event)
+
+
+class EventBus:
+    """
+    Delivers events to the subscribers of their message type
+
+    Inline subscribers are awaited one after another in the listener;
+    background subscribers are only queued there.
+    """
+
+    def __init__(self, queue_size: int = 256, metrics: Optional["EventMetrics"] = None):
+        """
+        Args:
+            queue_size (int): Events a background subscriber may have waiting
+            metrics (EventMetrics, optional): Shared counters to update
+        """
+        self.queue_size = queue_size
+        self.metrics = metrics or EventMetrics()
+        self._inline: Dict[str, List[Subscriber]] = {}
+        self._background: Dict[str, List[_BackgroundSubscriber]] = {}
+
+    def subscribe(self, message_type: str, handler: Subscriber, background: bool = False):
+        """
+        Call handler with every event of a message type
+
+        Args:
+            message_type (str): Message type, e.g. "audio", or ALL_EVENTS
+            handler (Callable): Coroutine function taking the event
+            background (bool): Run the handler in its own task instead of in the listener
+        """
+        if background:
+            self._background.setdefault(message_type, []).append(_BackgroundSubscriber(handler, self.queue_size))
+        else:
+            self._inline.setdefault(message_type, []).append(handler)
+
+    def has_subscribers(self, message_type: str) -> bool:
+        """Whether any subscriber (other than ALL_EVENTS ones) listens to a message type"""
+        return bool(self._inline.get(message_type) or self._background.get(message_type))
+
+    async def publish(self, event: Event):
+        """
+        Deliver an event to its subscribers and the ALL_EVENTS subscribers
+
+        Args:
+            event (Event): The event
+        """
+        self.metrics.received[event.type] = self.metrics.received.get(event.type, 0) + 1
+        for key in (event.type, ALL_EVENTS):
+            for subscriber in self._background.get(key, ()):
+                subscriber.offer(event, self)
+            for handler in self._inline.get(key, ()):
+                await self._call(handler, event)
+
+    async def _call(self, handler: Subscriber, event: Event):
+        # A failing subscriber must not stop the listener or the other subscribers
+        started = time.perf_counter()
+        try:
+            await handler(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.metrics.errors += 1
+            print(f"❌ Event subscriber failed on {event.type}: {e}")
+        finally:
+            self.metrics.record_latency(event.type, time.perf_counter() - started)
+
+    def close(self):
+        """Stop the background subscribers' tasks"""
+        for subscribers in self._background.values():
+            for subscriber in subscribers:
+                if subscriber.task is not None:
+                    subscriber.task.cancel()
+                    subscriber.task = None
+
+
+class EventMetrics:
+    """Counters for ElevenLabs events and their subscribers, shared by all sessions"""
+
+    def __init__(self):
+        self.received: Dict[str, int] = {}
+        self.handler_seconds: Dict[str, float] = {}
+        self.slowest_handler: Dict[str, float] = {}
+        self.errors = 0
+        self.dropped = 0
+
+    def record_latency(self, message_type: str, seconds: float):
+        """Add the time one subscriber spent on an event"""
+        self.handler_seconds[message_type] = self.handler_seconds.get(message_type, 0.0) + seconds
+        if seconds > self.slowest_handler.get(message_type, 0.0):
+            self.slowest_handler[message_type] = seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """Return event counts, subscriber time per type, errors and drops for monitoring"""
+        return {
+            "received": dict(sorted(self.received.items())),
+            "handler_ms": {
+                message_type: {
+                    "total": round(seconds * 1000, 3),
+                    "max": round(self.slowest_handler.get(message_type, 0.0) * 1000, 3)
+                }
+                for message_type, seconds in sorted(self.handler_seconds.items())
+            },
+            "subscriber_errors": self.errors,
+            "dropped_background_events": self.dropped
+        }
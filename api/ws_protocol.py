@@ -0,0 +1,175 @@
+"""
+Browser WebSocket Frame Protocol
+
+The bridge at /api/ws/{agent_id} used to carry audio as hex strings inside
+JSON, which doubles the bytes on the wire and costs an encode and a decode
+per chunk. Clients can now negotiate binary frames with a WebSocket
+subprotocol:
+
+- "storyagent.binary.v1": audio travels as binary frames (a 6 byte header
+  followed by the raw audio bytes); JSON text frames carry only control
+  events (transcripts, agent responses, errors, text and context messages)
+- "storyagent.base64.v1": audio is base64 inside JSON, in the same encoding
+  ElevenLabs uses, so the server forwards it in both directions without
+  decoding or re-encoding it (pass-through mode)
+- "storyagent.json.v1", or no subprotocol at all (older clients): audio is
+  hex inside JSON, exactly as before
+
+The server prefers binary frames, or base64 pass-through when
+WS_AUDIO_PASSTHROUGH is set.
+
+Binary frame header (big-endian):
+
+    byte 0     frame kind (FRAME_AUDIO = 1)
+    byte 1     flags (reserved, 0)
+    bytes 2-5  sequence number (uint32, per direction, wraps around)
+"""
+
+import struct
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+BINARY_SUBPROTOCOL = "storyagent.binary.v1"
+BASE64_SUBPROTOCOL = "storyagent.base64.v1"
+JSON_SUBPROTOCOL = "storyagent.json.v1"
+
+# What a session uses when the client offered no subprotocol we know
+LEGACY_PROTOCOL = "legacy"
+
+FRAME_AUDIO = 1
+
+FRAME_HEADER = struct.Struct("!BBI")
+HEADER_SIZE = FRAME_HEADER.size
+
+
+class FrameError(ValueError):
+    """Raised when a binary frame from a client is malformed"""
+
+
+def negotiate(offered: Iterable[str], allow_binary: bool = True, prefer_passthrough: bool = False) -> Optional[str]:
+    """
+    Pick the subprotocol for a connection from the ones the client offered
+
+    Args:
+        offered (Iterable[str]): Subprotocols from the Sec-WebSocket-Protocol header
+        allow_binary (bool): Whether binary frames may be chosen
+        prefer_passthrough (bool): Prefer base64 pass-through over binary frames
+
+    Returns:
+        Optional[str]: Subprotocol to accept, or None to accept without one (legacy JSON)
+    """
+    offered = list(offered)
+    preferred = [BINARY_SUBPROTOCOL, BASE64_SUBPROTOCOL] if allow_binary else [BASE64_SUBPROTOCOL]
+    if prefer_passthrough:
+        preferred.sort(key=lambda protocol: protocol != BASE64_SUBPROTOCOL)
+    for protocol in preferred + [JSON_SUBPROTOCOL]:
+        if protocol in offered:
+            return protocol
+    return None
+
+
+def base64_size(audio_base64: str) -> int:
+    """
+    Number of bytes a base64 string decodes to, without decoding it
+
+    Args:
+        audio_base64 (str): Padded base64 text
+
+    Returns:
+        int: Decoded size in bytes
+    """
+    return len(audio_base64) * 3 // 4 - audio_base64[-2:].count("=")
+
+
+def encode_frame(kind: int, sequence: int, payload: bytes) -> bytes:
+    """
+    Build a binary frame
+
+    Args:
+        kind (int): Frame kind, e.g. FRAME_AUDIO
+        sequence (int): Sequence number (taken modulo 2**32)
+        payload (bytes): Frame body
+
+    Returns:
+        bytes: Header followed by the payload
+    """
+    return FRAME_HEADER.pack(kind, 0, sequence & 0xFFFFFFFF) + payload
+
+
+def decode_frame(frame: bytes) -> Tuple[int, int, memoryview]:
+    """
+    Split a binary frame into its header fields and payload
+
+    The payload is a view into the frame, not a copy.
+
+    Args:
+        frame (bytes): Frame received from a client
+
+    Returns:
+        Tuple[int, int, memoryview]: Frame kind, sequence number and payload
+
+    Raises:
+        FrameError: If the frame is shorter than the header
+    """
+    if len(frame) < HEADER_SIZE:
+        raise FrameError(f"Binary frame too short ({len(frame)} bytes)")
+    kind, _, sequence = FRAME_HEADER.unpack_from(frame)
+    return kind, sequence, memoryview(frame)[HEADER_SIZE:]
+
+
+class BridgeMetrics:
+    """Counters for the browser side of the WebSocket bridge, by protocol"""
+
+    def __init__(self):
+        self.sessions: Dict[str, int] = {}
+        self.frames_out: Dict[str, int] = {}
+        self.audio_bytes_out: Dict[str, int] = {}
+        self.wire_bytes_out: Dict[str, int] = {}
+        self.frames_in: Dict[str, int] = {}
+        self.audio_bytes_in: Dict[str, int] = {}
+        self.wire_bytes_in: Dict[str, int] = {}
+        self.bad_frames = 0
+
+    def record_session(self, protocol: str):
+        """Count a new session using a protocol"""
+        self.sessions[protocol] = self.sessions.get(protocol, 0) + 1
+
+    def record_audio_out(self, protocol: str, audio_bytes: int, wire_bytes: int):
+        """Count an audio frame sent to a browser"""
+        _add(self.frames_out, protocol, 1)
+        _add(self.audio_bytes_out, protocol, audio_bytes)
+        _add(self.wire_bytes_out, protocol, wire_bytes)
+
+    def record_audio_in(self, protocol: str, audio_bytes: int, wire_bytes: int):
+        """Count an audio frame received from a browser"""
+        _add(self.frames_in, protocol, 1)
+        _add(self.audio_bytes_in, protocol, audio_bytes)
+        _add(self.wire_bytes_in, protocol, wire_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return bridge counters for monitoring
+
+        Returns:
+            Dict[str, Any]: Sessions, audio frames and bytes per protocol, with
+                the wire overhead (wire bytes per audio byte) in each direction
+        """
+        protocols = {}
+        for protocol in sorted(set(self.sessions) | set(self.frames_out) | set(self.frames_in)):
+            audio_out = self.audio_bytes_out.get(protocol, 0)
+            audio_in = self.audio_bytes_in.get(protocol, 0)
+            protocols[protocol] = {
+                "sessions": self.sessions.get(protocol, 0),
+                "audio_frames_out": self.frames_out.get(protocol, 0),
+                "audio_bytes_out": audio_out,
+                "wire_bytes_out": self.wire_bytes_out.get(protocol, 0),
+                "overhead_out": round(self.wire_bytes_out.get(protocol, 0) / audio_out, 3) if audio_out else 0.0,
+                "audio_frames_in": self.frames_in.get(protocol, 0),
+                "audio_bytes_in": audio_in,
+                "wire_bytes_in": self.wire_bytes_in.get(protocol, 0),
+                "overhead_in": round(self.wire_bytes_in.get(protocol, 0) / audio_in, 3) if audio_in else 0.0
+            }
+        return {"protocols": protocols, "bad_frames": self.bad_frames}
+
+
+def _add(counters: Dict[str, int], key: str, amount: int):
+    counters[key] = counters.get(key, 0) + amount
@@ -0,0 +1,91 @@
+"""
+Microbenchmark: base64 pass-through vs. transcoding of WebSocket audio
+
+Times the per-chunk server work for one audio chunk in each direction of the
+/api/ws/{agent_id} bridge:
+
+- agent audio: ElevenLabs JSON -> browser (hex JSON, binary frame, base64 pass-through)
+- mic audio:   browser -> ElevenLabs JSON (hex JSON, binary frame, base64 pass-through)
+
+Only the standard library and api.ws_protocol are needed. Run from the repo root:
+
+    python benchmarks/ws_audio_passthrough.py [--chunk-bytes 8000] [--number 20000]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.ws_protocol import FRAME_AUDIO, decode_frame, encode_frame
+
+
+def outbound_cases(chunk: bytes):
+    """Agent audio as ElevenLabs sends it, through each frontend protocol"""
+    upstream = json.dumps({"type": "audio", "audio_event": {"audio_base_64": base64.b64encode(chunk).decode(), "event_id": 1}})
+
+    def hex_json():
+        audio = base64.b64decode(json.loads(upstream)["audio_event"]["audio_base_64"])
+        return json.dumps({"type": "audio", "audio_data": audio.hex()})
+
+    def binary_frame():
+        audio = base64.b64decode(json.loads(upstream)["audio_event"]["audio_base_64"])
+        return encode_frame(FRAME_AUDIO, 1, audio)
+
+    def passthrough():
+        audio_base64 = json.loads(upstream)["audio_event"]["audio_base_64"]
+        return json.dumps({"type": "audio", "audio_base_64": audio_base64})
+
+    return {"hex-json": hex_json, "binary": binary_frame, "base64 pass-through": passthrough}
+
+
+def inbound_cases(chunk: bytes):
+    """Mic audio from the browser in each frontend protocol, turned into an ElevenLabs message"""
+    hex_message = json.dumps({"type": "audio", "audio_data": chunk.hex()})
+    frame = encode_frame(FRAME_AUDIO, 1, chunk)
+    base64_message = json.dumps({"type": "audio", "audio_base_64": base64.b64encode(chunk).decode()})
+
+    def hex_json():
+        audio = bytes.fromhex(json.loads(hex_message)["audio_data"])
+        return json.dumps({"user_audio_chunk": base64.b64encode(audio).decode("utf-8")})
+
+    def binary_frame():
+        _, _, audio = decode_frame(frame)
+        return json.dumps({"user_audio_chunk": base64.b64encode(audio).decode("utf-8")})
+
+    def passthrough():
+        return json.dumps({"user_audio_chunk": json.loads(base64_message)["audio_base_64"]})
+
+    return {"hex-json": hex_json, "binary": binary_frame, "base64 pass-through": passthrough}
+
+
+def run(title: str, cases, number: int):
+    """Time each case and print microseconds per chunk, relative to hex-json"""
+    print(title)
+    results = {}
+    for name, case in cases.items():
+        results[name] = min(timeit.repeat(case, number=number, repeat=5)) / number * 1e6
+    baseline = results["hex-json"]
+    for name, micros in results.items():
+        print(f"  {name:<20} {micros:8.2f} us/chunk   {baseline / micros:5.2f}x   saves {baseline - micros:7.2f} us")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunk-bytes", type=int, default=8000, help="Audio bytes per chunk (8000 = 250ms of 16kHz PCM)")
+    parser.add_argument("--number", type=int, default=20000, help="Chunks per timing run")
+    args = parser.parse_args()
+
+    chunk = os.urandom(args.chunk_bytes)
+    print(f"{args.chunk_bytes} byte chunks, best of 5 x {args.number}\n")
+    run("Agent audio -> browser", outbound_cases(chunk), args.number)
+    run("Browser mic audio -> ElevenLabs", inbound_cases(chunk), args.number)
+
+
+if __name__ == "__main__":
+    main()
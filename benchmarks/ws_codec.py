@@ -0,0 +1,104 @@
+"""
+Benchmark: WebSocket JSON codec throughput (messages per second on one core)
+
+Decodes a realistic mix of ElevenLabs messages (mostly audio, plus transcripts,
+agent responses, VAD scores and pings) and encodes mic audio chunks, with:
+
+- "full parse": json.loads / orjson.loads on every message, as before
+- "peek + slice": peek_type() and audio_payload() for audio, full parse otherwise
+
+Only api.ws_codec is imported, so this runs without the app's dependencies
+(orjson rows are skipped if it isn't installed). Run from the repo root:
+
+    python benchmarks/ws_codec.py [--chunk-bytes 8000] [--seconds 1]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.ws_codec import CODECS, orjson
+
+
+def upstream_messages(chunk_bytes: int):
+    """A conversation's worth of ElevenLabs messages, 90% of them audio"""
+    audio = json.dumps({
+        "audio_event": {"audio_base_64": base64.b64encode(os.urandom(chunk_bytes)).decode(), "event_id": 7},
+        "type": "audio"
+    })
+    others = [
+        json.dumps({"type": "vad_score", "vad_score_event": {"vad_score": 0.93}}),
+        json.dumps({"type": "ping", "ping_event": {"event_id": 7, "ping_ms": 40}}),
+        json.dumps({"type": "user_transcript", "user_transcription_event": {"user_transcript": "Why did the fox leave the forest?"}}),
+        json.dumps({"type": "agent_response", "agent_response_event": {"agent_response": "Because winter came early that year."}}),
+    ]
+    messages = [audio] * 36 + others
+    return messages
+
+
+def full_parse(codec, messages):
+    for message in messages:
+        data = codec.loads(message)
+        if data.get("type") == "audio":
+            data["audio_event"]["audio_base_64"]
+
+
+def peek_and_slice(codec, messages):
+    for message in messages:
+        if codec.peek_type(message) == "audio":
+            audio_base64 = codec.audio_payload(message)
+            if audio_base64 is not None:
+                continue
+        codec.loads(message)
+
+
+def encode_dumps(codec, chunks):
+    for audio_base64 in chunks:
+        codec.dumps({"user_audio_chunk": audio_base64})
+
+
+def encode_concat(codec, chunks):
+    for audio_base64 in chunks:
+        codec.encode_audio_chunk(audio_base64)
+
+
+def rate(function, codec, batch, seconds: float) -> float:
+    """Messages per second for function over repeated batches"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        function(codec, batch)
+        count += len(batch)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunk-bytes", type=int, default=8000, help="Audio bytes per message (8000 = 250ms of 16kHz PCM)")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Seconds per measurement")
+    args = parser.parse_args()
+
+    messages = upstream_messages(args.chunk_bytes)
+    chunks = [base64.b64encode(os.urandom(args.chunk_bytes)).decode()] * 40
+    codecs = [name for name in CODECS if name != "orjson" or orjson is not None]
+
+    print(f"{args.chunk_bytes} byte audio chunks, messages/second on one core\n")
+    print(f"{'':28}" + "".join(f"{name:>14}" for name in codecs))
+    rows = [
+        ("decode: full parse", full_parse, messages),
+        ("decode: peek + slice", peek_and_slice, messages),
+        ("encode: dumps", encode_dumps, chunks),
+        ("encode: concatenate", encode_concat, chunks),
+    ]
+    for label, function, batch in rows:
+        rates = [rate(function, CODECS[name](), batch, args.seconds) for name in codecs]
+        print(f"{label:28}" + "".join(f"{value:14,.0f}" for value in rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Load test: pong latency under heavy mic audio, with and without priority lanes
+
+Drives api.send_lanes.PrioritySender over a simulated upstream link with a fixed
+bandwidth. Audio messages (100ms of 16kHz PCM as base64 JSON) arrive faster than
+the link can carry them, while ElevenLabs-style pings arrive every
+--ping-interval seconds; each pong that is not on the wire within
+--pong-timeout counts as a ping-timeout disconnect.
+
+- "fifo": every message is sent in arrival order, as when pongs went through
+  the same send path as audio
+- "priority": pongs use the control lane and go ahead of queued audio
+
+Only api.send_lanes is imported, so this runs without the app's dependencies.
+Run from the repo root:
+
+    python benchmarks/ws_priority_load.py [--seconds 5] [--audio-rate 1.5]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.send_lanes import AUDIO, CONTROL, PrioritySender
+
+# 100ms of 16kHz 16-bit mono PCM, base64 encoded inside {"user_audio_chunk": ...}
+AUDIO_MESSAGE = '{"user_audio_chunk":"' + "A" * 4268 + '"}'
+PONG_MESSAGE = '{"type":"pong","event_id":1}'
+
+
+async def run(prioritize: bool, args) -> dict:
+    """Run one scenario and return pong latencies and audio throughput"""
+    bandwidth = args.link_kbps * 1000 / 8
+
+    async def link(message: str):
+        # One message on the wire at a time (the sender serializes), at link speed
+        await asyncio.sleep(len(message) / bandwidth)
+
+    sender = PrioritySender(link, prioritize=prioritize)
+    audio_interval = len(AUDIO_MESSAGE) / bandwidth / args.audio_rate
+    pong_latencies = []
+    pings = 0
+    audio_sent = 0
+    tasks = []
+
+    async def send_audio():
+        nonlocal audio_sent
+        await sender.send(AUDIO_MESSAGE, AUDIO)
+        audio_sent += 1
+
+    async def send_pong():
+        started = time.monotonic()
+        await sender.send(PONG_MESSAGE, CONTROL)
+        pong_latencies.append(time.monotonic() - started)
+
+    async def audio_source():
+        # Audio keeps coming whether or not earlier chunks have gone out yet
+        while True:
+            tasks.append(asyncio.create_task(send_audio()))
+            await asyncio.sleep(audio_interval)
+
+    async def ping_source():
+        nonlocal pings
+        while True:
+            await asyncio.sleep(args.ping_interval)
+            pings += 1
+            tasks.append(asyncio.create_task(send_pong()))
+
+    sources = [asyncio.create_task(audio_source()), asyncio.create_task(ping_source())]
+    await asyncio.sleep(args.seconds)
+    for source in sources:
+        source.cancel()
+    # Give pongs sent near the end a chance to finish before the cut-off
+    await asyncio.sleep(args.pong_timeout)
+    sender.close()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, *sources, return_exceptions=True)
+
+    late = pings - sum(1 for latency in pong_latencies if latency <= args.pong_timeout)
+    return {
+        "pings": pings,
+        "timeouts": late,
+        "max_pong_ms": max(pong_latencies, default=float("inf")) * 1000,
+        "audio_per_second": audio_sent / (args.seconds + args.pong_timeout)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0, help="Length of each scenario")
+    parser.add_argument("--link-kbps", type=float, default=2000, help="Upstream link bandwidth in kbit/s")
+    parser.add_argument("--audio-rate", type=float, default=1.5, help="Audio offered, as a multiple of what the link can carry")
+    parser.add_argument("--ping-interval", type=float, default=0.5, help="Seconds between pings")
+    parser.add_argument("--pong-timeout", type=float, default=1.0, help="Seconds a pong may take before the session is dropped")
+    args = parser.parse_args()
+
+    print(f"{args.link_kbps:.0f} kbit/s link, audio offered at {args.audio_rate}x capacity, "
+          f"ping every {args.ping_interval}s, pong timeout {args.pong_timeout}s\n")
+    print(f"{'':10}{'pings':>8}{'timeouts':>10}{'max pong ms':>14}{'audio msg/s':>14}")
+    for name, prioritize in (("fifo", False), ("priority", True)):
+        result = asyncio.run(run(prioritize, args))
+        print(f"{name:10}{result['pings']:>8}{result['timeouts']:>10}"
+              f"{result['max_pong_ms']:>14.1f}{result['audio_per_second']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -28,13 +28,108 @@ class Config:
     
     # API Endpoints - These are the specific ElevenLabs endpoints we'll use
     KNOWLEDGE_BASE_UPLOAD_URL = f"{ELEVENLABS_BASE_URL}/convai/knowledge-base/file"
+    KNOWLEDGE_BASE_TEXT_URL = f"{ELEVENLABS_BASE_URL}/convai/knowledge-base/text"
     AGENT_UPDATE_URL = f"{ELEVENLABS_BASE_URL}/convai/agents"
     CONVERSATIONS_URL = f"{ELEVENLABS_BASE_URL}/convai/conversations"
+    CONVERSATIONS_PAGE_SIZE = int(os.getenv("CONVERSATIONS_PAGE_SIZE", 100))  # Conversations per page when paginating
+    
+    # HTTP Connection Pool Settings
+    # One pooled session is shared by all REST calls so keep-alive connections
+    # and TLS sessions are reused instead of being opened per request
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 100))  # Total open connections
+    HTTP_POOL_SIZE_PER_HOST = int(os.getenv("HTTP_POOL_SIZE_PER_HOST", 20))  # Open connections per host
+    HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 30))  # Seconds to keep idle connections
+    
+    # Upstream Retry and Circuit Breaker Settings
+    RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", 3))  # Attempts per idempotent call, including the first
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 0.5))  # Seconds, doubled per retry (with jitter)
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 8))  # Cap for a single backoff delay
+    RETRY_AFTER_MAX = float(os.getenv("RETRY_AFTER_MAX", 30))  # Longest 429 Retry-After we wait for before giving up
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))  # Consecutive failures that open a circuit
+    CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", 30))  # Seconds before probing again
+    
+    # Upstream Rate Limit Settings (per API key)
+    # Interactive calls are always served before background work (polling, prefetching, exports)
+    UPSTREAM_RATE_LIMIT = float(os.getenv("UPSTREAM_RATE_LIMIT", 10))  # Requests per second
+    UPSTREAM_BURST = float(os.getenv("UPSTREAM_BURST", 20))  # Requests that may be sent back to back
+    UPSTREAM_MIN_RATE = float(os.getenv("UPSTREAM_MIN_RATE", 1))  # Lowest rate after backing off on 429s
+    
+    # Agent Configuration Cache Settings
+    AGENT_CONFIG_CACHE_TTL = float(os.getenv("AGENT_CONFIG_CACHE_TTL", 300))  # Seconds before re-fetching an agent's config to diff updates against
+    
+    # Local Story Retrieval Settings
+    # Uploaded stories are indexed locally so the WebSocket bridge can send matching
+    # passages to the agent as contextual updates while the user talks
+    STORY_INDEX_ENABLED = os.getenv("STORY_INDEX_ENABLED", "True").lower() == "true"
+    STORY_PASSAGE_WORDS = int(os.getenv("STORY_PASSAGE_WORDS", 80))  # Words per indexed passage
+    STORY_PASSAGE_OVERLAP = int(os.getenv("STORY_PASSAGE_OVERLAP", 20))  # Words shared by consecutive passages
+    STORY_CONTEXT_PASSAGES = int(os.getenv("STORY_CONTEXT_PASSAGES", 2))  # Passages sent per contextual update
+    STORY_INDEX_MAX_STORIES = int(os.getenv("STORY_INDEX_MAX_STORIES", 200))  # Story indexes kept in memory; least recently searched is dropped
+    
+    # Browser WebSocket Bridge Settings
+    # Clients may negotiate binary audio frames instead of hex audio in JSON
+    WS_BINARY_FRAMES = os.getenv("WS_BINARY_FRAMES", "True").lower() == "true"
+    # Prefer base64 pass-through (no audio re-encoding on the server) when a client offers it
+    WS_AUDIO_PASSTHROUGH = os.getenv("WS_AUDIO_PASSTHROUGH", "False").lower() == "true"
+    WS_JSON_CODEC = os.getenv("WS_JSON_CODEC", "auto")  # "auto" (orjson if installed), "orjson" or "json"
+    WS_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("WS_SUBSCRIBER_QUEUE_SIZE", 256))  # Events a background subscriber may fall behind by
+    WS_OUTBOUND_QUEUE_SIZE = int(os.getenv("WS_OUTBOUND_QUEUE_SIZE", 64))  # Messages that may wait for a slow browser
+    # Tried in order when a browser's queue is full: drop_audio, coalesce, disconnect
+    WS_OUTBOUND_OVERFLOW = [
+        policy.strip() for policy in os.getenv("WS_OUTBOUND_OVERFLOW", "drop_audio,coalesce,disconnect").split(",")
+        if policy.strip()
+    ]
+    
+    # Inbound Audio Framing Settings
+    WS_AUDIO_FRAMING = os.getenv("WS_AUDIO_FRAMING", "True").lower() == "true"  # Coalesce mic chunks into fixed-size frames
+    WS_AUDIO_FRAME_MS = int(os.getenv("WS_AUDIO_FRAME_MS", 100))  # Milliseconds of audio per upstream message
+    WS_AUDIO_BYTES_PER_MS = int(os.getenv("WS_AUDIO_BYTES_PER_MS", 32))  # 16kHz 16-bit mono PCM, the mic format clients must send
+    WS_AUDIO_FLUSH_MS = int(os.getenv("WS_AUDIO_FLUSH_MS", 200))  # Send a partial frame after this long without audio
+    
+    # Conversation List Cache Settings
+    CONVERSATION_CACHE_TTL = float(os.getenv("CONVERSATION_CACHE_TTL", 15))  # Seconds a cached list is fresh
+    CONVERSATION_CACHE_STALE_TTL = float(os.getenv("CONVERSATION_CACHE_STALE_TTL", 120))  # Seconds a stale list is served while refreshing
+    CONVERSATION_CACHE_MAX_ENTRIES = int(os.getenv("CONVERSATION_CACHE_MAX_ENTRIES", 256))  # Cached lists kept; least recently read is dropped
+    
+    # Conversation Index Settings (used for the latest conversation lookup)
+    CONVERSATION_INDEX_REFRESH_INTERVAL = float(os.getenv("CONVERSATION_INDEX_REFRESH_INTERVAL", 60))  # Seconds between background refreshes
+    CONVERSATION_INDEX_SESSION_END_DELAY = float(os.getenv("CONVERSATION_INDEX_SESSION_END_DELAY", 5))  # Seconds to wait after a session ends before refreshing
+    CONVERSATION_INDEX_MAX_AGENTS = int(os.getenv("CONVERSATION_INDEX_MAX_AGENTS", 100))  # Agents indexed at once; least recently looked up is dropped
+    CONVERSATION_INDEX_MAX_CONVERSATIONS = int(os.getenv("CONVERSATION_INDEX_MAX_CONVERSATIONS", 200))  # Newest conversations kept per agent
+    CONVERSATION_INDEX_IDLE_TIMEOUT = float(os.getenv("CONVERSATION_INDEX_IDLE_TIMEOUT", 3600))  # Seconds without a lookup before an agent is dropped
+    
+    # Bulk Transcript Export Settings
+    EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", 8))  # Transcripts fetched at once by default
+    EXPORT_MAX_CONCURRENCY = int(os.getenv("EXPORT_MAX_CONCURRENCY", 32))  # Upper bound a request may ask for
     
     # File Upload Settings
     MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 10485760))  # 10MB default
     ALLOWED_FILE_TYPES = ["application/pdf"]
     UPLOAD_FOLDER = "uploads"
+    UPLOAD_MODE = os.getenv("UPLOAD_MODE", "pdf")  # "pdf" uploads the file, "text" uploads its extracted text
+    PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", 2))  # Processes parsing PDFs for text uploads
+    BATCH_UPLOAD_MAX_FILES = int(os.getenv("BATCH_UPLOAD_MAX_FILES", 20))  # PDFs accepted by one batch upload
+    BATCH_UPLOAD_CONCURRENCY = int(os.getenv("BATCH_UPLOAD_CONCURRENCY", 4))  # Uploads of a batch running at once by default
+    BATCH_UPLOAD_MAX_CONCURRENCY = int(os.getenv("BATCH_UPLOAD_MAX_CONCURRENCY", 8))  # Upper bound a request may ask for
+    STREAM_UPLOADS = os.getenv("STREAM_UPLOADS", "True").lower() == "true"  # Pipe uploads to ElevenLabs in chunks
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 65536))  # 64KB per chunk when streaming
+    UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", 2))  # Background upload jobs running at once
+    UPLOAD_JOB_MAX_ATTEMPTS = int(os.getenv("UPLOAD_JOB_MAX_ATTEMPTS", 3))  # Runs before a job interrupted by restarts fails
+    UPLOAD_JOB_RETENTION = int(os.getenv("UPLOAD_JOB_RETENTION", 86400))  # Seconds finished jobs can still be looked up
+    UPLOAD_JOB_CLEANUP_INTERVAL = int(os.getenv("UPLOAD_JOB_CLEANUP_INTERVAL", 3600))  # Seconds between deletions of expired jobs
+    UPLOAD_JOB_FOLDER = os.path.join(UPLOAD_FOLDER, "jobs")  # PDFs waiting for a background upload
+    BLOB_STORE_FOLDER = os.path.join(UPLOAD_FOLDER, "blobs")  # Local copies of uploaded stories, by content hash
+    BLOB_STORE_MAX_BYTES = int(os.getenv("BLOB_STORE_MAX_BYTES", 1073741824))  # 1GB of stories kept on disk (LRU)
+    
+    # Local Data Settings
+    # Folder for small persistent indexes and caches kept between restarts
+    DATA_FOLDER = os.getenv("DATA_FOLDER", "data")
+    UPLOAD_INDEX_FILE = os.path.join(DATA_FOLDER, "upload_index.json")  # content hash -> knowledge base
+    TRANSCRIPT_DB_FILE = os.path.join(DATA_FOLDER, "transcripts.sqlite3")  # Completed conversation transcripts
+    PDF_TEXT_DB_FILE = os.path.join(DATA_FOLDER, "pdf_text.sqlite3")  # Extracted PDF text per page, by content hash
+    UPLOAD_JOB_DB_FILE = os.path.join(DATA_FOLDER, "upload_jobs.sqlite3")  # Background upload jobs and their status
+    TRANSCRIPT_MEMORY_BUDGET = int(os.getenv("TRANSCRIPT_MEMORY_BUDGET", 16777216))  # 16MB of transcripts kept in memory
+    TRANSCRIPT_DISK_BUDGET = int(os.getenv("TRANSCRIPT_DISK_BUDGET", 536870912))  # 512MB of transcripts kept on disk
     
     # Application Settings
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
@@ -77,7 +172,7 @@ class Config:
         Returns headers for multipart file uploads to ElevenLabs.
         
         Note: We don't set Content-Type for multipart uploads as 
-        the requests library handles this automatically.
+        the HTTP client sets it (with the multipart boundary) automatically.
         
         Returns:
             dict: Headers dictionary for file uploads
@@ -17,7 +17,8 @@ import os
 
 # Import our custom modules
 from config import Config
-from api.routes import router as api_router
+from api.routes import router as api_router, start_background_tasks, close_resources, upload_validation_metrics
+from api.upload_validation import PdfUploadGuard
 
 # Validate configuration at startup
 try:
@@ -37,8 +38,9 @@ app = FastAPI(
     redoc_url="/redoc"  # ReDoc documentation at /redoc
 )
 
-# Create upload directory if it doesn't exist
+# Create upload and data directories if they don't exist
 os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(Config.DATA_FOLDER, exist_ok=True)
 
 # Set up static files (CSS, JavaScript, images)
 # This allows us to serve files from the 'static' directory at '/static' URL
@@ -52,6 +54,15 @@ templates = Jinja2Templates(directory="templates")
 # All routes from api/routes.py will be available under /api prefix
 app.include_router(api_router, prefix="/api")
 
+# Validate PDF uploads while the body is still streaming in,
+# so oversized or non-PDF uploads are rejected before they are buffered
+app.add_middleware(
+    PdfUploadGuard,
+    metrics=upload_validation_metrics,
+    max_files_by_path={"/api/upload-story": 1, "/api/upload-stories": Config.BATCH_UPLOAD_MAX_FILES},
+    max_file_size=Config.MAX_FILE_SIZE
+)
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """
@@ -131,6 +142,18 @@ async def startup_event():
     print(f"🔑 API Key configured: {'Yes' if Config.ELEVENLABS_API_KEY else 'No'}")
     print(f"🤖 Agent ID: {Config.AGENT_ID}")
     print("🌐 Access the app at: http://localhost:8000")
+    start_background_tasks()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Shutdown event handler
+    
+    This function runs when the application stops.
+    It closes the pooled HTTP connections to ElevenLabs and local stores.
+    """
+    await close_resources()
+    print("👋 ElevenLabs connections and local stores closed")
 
 # If this file is run directly (not imported), start the server
 if __name__ == "__main__":